@@ -2,34 +2,79 @@ from fastapi import APIRouter, Depends, Request  # type: ignore
 from redis import Redis  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
-from app.auth.schemas import Login, LogoutResponse, Token
-from app.auth.utils import get_current_user, get_user, logout_user
-from app.db import get_db, get_redis
+from app.auth.rate_limit import release_login_attempt, reserve_login_attempt
+from app.auth.schemas import Login, LogoutResponse, RefreshRequest, Token
+from app.auth.utils import get_user, get_user_by_id
+from app.db import get_db, get_read_db, get_redis
 from app.exceptions.auth_exceptions import InvalidCredentialsException
-from app.users.schemas import UserResponse
-from app.utils.auth import create_access_token, verify_password
+from app.exceptions.token_exceptions import InvalidTokenException
+from app.exceptions.user_exceptions import UserNotFoundException
+from app.utils.auth import (
+    create_refresh_token,
+    create_user_access_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+    verify_and_update_password,
+)
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-def login(request: Login, db: Session = Depends(get_db)):
+def login(
+    request: Login,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+):
+    client_ip = http_request.client.host if http_request.client else ""
+    attempt = reserve_login_attempt(redis, client_ip, request.email)
+
     user = get_user(db, request.email)
-    if not user or not verify_password(request.password, user.hashed_password):
+    if not user:
         raise InvalidCredentialsException
-    access_token = create_access_token(data={"sub": user.email})
-    return {"access_token": access_token, "token_type": "bearer"}
 
+    valid, new_hash = verify_and_update_password(request.password, user.hashed_password)
+    if not valid:
+        raise InvalidCredentialsException
+    release_login_attempt(redis, client_ip, request.email, attempt)
 
-@router.post("/logout", response_model=LogoutResponse)
-def logout(
-    http_request: Request,
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(redis, user.id),
+    }
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(
+    request: RefreshRequest,
+    db: Session = Depends(get_read_db),
     redis: Redis = Depends(get_redis),
-    db: Session = Depends(get_db),
-    current_user: UserResponse = Depends(get_current_user),
 ):
+    user_id, refresh_token = rotate_refresh_token(redis, request.refresh_token)
+    try:
+        user = get_user_by_id(db, user_id)
+    except UserNotFoundException:
+        revoke_refresh_token(redis, refresh_token)
+        raise InvalidTokenException()
 
-    jwt_token = http_request.headers.get("Authorization").replace("Bearer ", "")
-    response = logout_user(jwt_token, redis, db)
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+# Access tokens are not revocable and simply expire; logging out ends the
+# refresh token family so no new ones can be issued.
+@router.post("/logout", response_model=LogoutResponse)
+def logout(request: RefreshRequest, redis: Redis = Depends(get_redis)):
+    if revoke_refresh_token(redis, request.refresh_token):
+        return {"detail": "Logout successful"}
 
-    return response
+    return {"detail": "Token already invalid"}
@@ -0,0 +1,87 @@
+import math
+import uuid
+from typing import List, Optional
+
+from redis import Redis  # type: ignore
+from redis.commands.core import Script
+
+from app.constants import settings
+from app.exceptions.auth_exceptions import TooManyLoginAttemptsException
+from app.utils.metrics import LOGIN_ATTEMPTS_REJECTED
+
+LIMITS = ("ip", "email")
+
+# Sliding-window log of login attempts per key in a sorted set scored by the
+# Redis server clock in milliseconds. An attempt reserves a slot on every key
+# before the password is checked, in the same script that checks the limits,
+# so parallel guesses cannot all pass the check; a successful login gives its
+# slot back, so users sharing an address who log in correctly are never
+# throttled. The script prunes expired attempts and returns {0, 0} when the
+# attempt was reserved or {index of the limiting key, retry after ms}.
+RESERVE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local rejected, retry_after = 0, 0
+
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 + i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+    if count >= limit then
+        local entry = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+        local wait = tonumber(entry[2]) + window - now
+        if wait > retry_after then
+            rejected, retry_after = i, wait
+        end
+    end
+end
+
+if rejected == 0 then
+    for _, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, ARGV[2])
+        redis.call('PEXPIRE', key, window)
+    end
+end
+return {rejected, retry_after}
+"""
+
+# Loaded on first use by whichever client runs them.
+reserve_script = Script(None, RESERVE_SCRIPT.encode())
+
+
+def login_rate_limit_keys(ip: str, email: str) -> List[str]:
+    return [f"login_attempts:ip:{ip}", f"login_attempts:email:{email.strip().lower()}"]
+
+
+def reserve_login_attempt(redis: Redis, ip: str, email: str) -> Optional[str]:
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return None
+
+    attempt = uuid.uuid4().hex
+    rejected, retry_after_ms = reserve_script(
+        keys=login_rate_limit_keys(ip, email),
+        args=[
+            settings.LOGIN_RATE_LIMIT_WINDOW * 1000,
+            attempt,
+            settings.LOGIN_RATE_LIMIT_PER_IP,
+            settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+        ],
+        client=redis,
+    )
+    if rejected:
+        LOGIN_ATTEMPTS_REJECTED.inc(LIMITS[rejected - 1])
+        raise TooManyLoginAttemptsException(math.ceil(retry_after_ms / 1000))
+    return attempt
+
+
+def release_login_attempt(
+    redis: Redis, ip: str, email: str, attempt: Optional[str]
+) -> None:
+    if attempt is None:
+        return
+
+    with redis.pipeline() as pipe:
+        for key in login_rate_limit_keys(ip, email):
+            pipe.zrem(key, attempt)
+        pipe.execute()
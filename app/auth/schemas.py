@@ -3,11 +3,21 @@ import re
 from pydantic import BaseModel, field_validator  # type: ignore
 
 from app.exceptions.auth_exceptions import InvalidEmailException
+from app.users.schemas import UserResponse
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenUser(UserResponse):
+    version: int
 
 
 class TokenData(BaseModel):
@@ -1,73 +1,61 @@
-from datetime import datetime, timezone
-from typing import Type
+from typing import Optional, Type
 
-from fastapi import Depends  # type: ignore
+from fastapi import Depends, HTTPException, WebSocket  # type: ignore
 from fastapi.security.http import HTTPAuthorizationCredentials  # type: ignore
-from jose import JWTError  # type: ignore
-from redis import Redis  # type: ignore
+from pydantic import ValidationError  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
+from app.auth.schemas import TokenUser
 from app.conf import http_bearer
 from app.constants import settings
-from app.db import get_db, get_redis
 from app.exceptions.auth_exceptions import AdminAccessException
-from app.exceptions.token_exceptions import (
-    InvalidTokenException,
-    TokenBlacklistedException,
-)
+from app.exceptions.token_exceptions import InvalidTokenException
 from app.exceptions.user_exceptions import UserNotFoundException
 from app.models.users import User
 from app.users.schemas import UserResponse
-from app.utils.auth import blacklist_token, get_payload, is_token_blacklisted
+from app.utils.auth import get_payload
+from app.utils.profiling import phase
 
 SECRET_KEY = settings.JWT_SECRET_KEY.get_secret_value()
 ALGORITHM = settings.JWT_ALGORITHM
 
 
-def logout_user(
-    token_str: str, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)
-):
-    try:
-        token = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token_str)
-        payload = get_payload(token)
-
-        email: str = payload.get("sub")
-        exp = payload.get("exp")
-
-        get_user(db, email)
-        success = blacklist_token(
-            token.credentials, datetime.fromtimestamp(exp, tz=timezone.utc), redis
-        )
-
-        if success:
-            return {"detail": "Logout successful"}
-
-    except JWTError:
-        return {"detail": "Token already invalid"}
-
-
 def get_current_user(
     token: HTTPAuthorizationCredentials = Depends(http_bearer),
-    redis: Redis = Depends(get_redis),
-    db: Session = Depends(get_db),
-) -> Type[User]:
-    try:
-        if is_token_blacklisted(token.credentials, redis):
-            raise TokenBlacklistedException()
-
-        payload = get_payload(token)
-        email: str = payload.get("sub")
-        if email is None:
+) -> TokenUser:
+    from jose import JWTError  # type: ignore
+
+    with phase("auth"):
+        try:
+            payload = get_payload(token)
+            return TokenUser(
+                id=payload["uid"],
+                email=payload["sub"],
+                role=payload["role"],
+                version=payload["ver"],
+            )
+        except (JWTError, KeyError, ValidationError):
             raise InvalidTokenException()
 
-    except JWTError:
-        raise InvalidTokenException()
 
-    user = get_user(db, email)
-    if user is None:
-        raise UserNotFoundException(email=email)
+# Browsers cannot set headers on a WebSocket handshake, so the access token
+# may also come as a query parameter. Returns None when it is missing or
+# invalid, leaving the close code to the caller.
+def get_websocket_user(
+    websocket: WebSocket, token: Optional[str] = None
+) -> Optional[TokenUser]:
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if token is None and scheme.lower() == "bearer":
+        token = credentials
+    if not token:
+        return None
 
-    return user
+    try:
+        return get_current_user(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        )
+    except HTTPException:
+        return None
 
 
 def admin_only(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
@@ -83,3 +71,11 @@ def get_user(db: Session, email: str):
         return user
 
     raise UserNotFoundException(email=email)
+
+
+def get_user_by_id(db: Session, user_id: int) -> Type[User]:
+    user = db.get(User, user_id)
+    if user:
+        return user
+
+    raise UserNotFoundException(user_id=user_id)
@@ -1,17 +1,70 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI  # type: ignore
 from fastapi.security import HTTPBearer  # type: ignore
+from sqlalchemy import text  # type: ignore
+from starlette.concurrency import run_in_threadpool  # type: ignore
 
-from app.db import Base, engine
+from app.constants import settings
+from app.db import (
+    Base,
+    close_redis_client,
+    engine,
+    migrations_at_head,
+    replicas,
+    warm_db_pool,
+    warm_redis_pool,
+)
+from app.polonus.live import live_routes
+from app.polonus.utils import close_http_client, open_http_client
 from app.utils import logger
 
 
+CREATE_TABLES_LOCK_ID = 7_340_001
+
+
+def create_tables() -> None:
+    mode = settings.DB_CREATE_TABLES_ON_STARTUP
+    if mode == "never" or (mode == "auto" and migrations_at_head()):
+        return
+
+    # Workers start concurrently; the lock makes the rest see the tables the
+    # first one created instead of racing it.
+    with engine.begin() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:id)"), {"id": CREATE_TABLES_LOCK_ID}
+        )
+        Base.metadata.create_all(bind=connection)
+
+
+async def warm_pools() -> None:
+    results = await asyncio.gather(
+        run_in_threadpool(warm_db_pool, settings.DB_POOL_WARMUP),
+        run_in_threadpool(warm_redis_pool, settings.REDIS_POOL_WARMUP),
+        return_exceptions=True,
+    )
+    for name, result in zip(("database", "redis"), results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not warm {name} connection pool: {result}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    # Connections inherited from a pre-forking parent must not be shared with
+    # it, so each worker starts from an empty pool.
+    engine.dispose(close=False)
+    replicas.dispose(close=False)
+    await run_in_threadpool(create_tables)
+    await warm_pools()
+    await open_http_client()
     yield
     logger.info("Application is shutting down.")
+    live_routes.close()
+    await close_http_client()
+    close_redis_client()
+    engine.dispose()
+    replicas.dispose()
 
 
 http_bearer = HTTPBearer()
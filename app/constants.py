@@ -1,3 +1,5 @@
+from typing import List, Literal, Optional
+
 from pydantic import SecretStr, computed_field  # type: ignore
 from pydantic_settings import BaseSettings  # type: ignore
 
@@ -14,6 +16,11 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DATABASE_USER}:{self.DATABASE_PASSWORD.get_secret_value()}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
 
+    # Read replica settings (JSON list of URLs); a replica that fails is
+    # skipped for the retry interval in seconds
+    DATABASE_REPLICA_URLS: List[str] = []
+    DATABASE_REPLICA_RETRY_INTERVAL: int = 30
+
     # Test database settings
     TEST_DATABASE_USER: str
     TEST_DATABASE_PASSWORD: SecretStr
@@ -28,6 +35,28 @@ class Settings(BaseSettings):
     # JWT settings
     JWT_SECRET_KEY: SecretStr
     JWT_ALGORITHM: str
+    # Required for ES256/RS256: directory of <kid>.pem private keys and the
+    # kid that signs (only activate a key every worker already has)
+    JWT_KEYS_DIR: Optional[str] = None
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWKS_MAX_AGE: int = 300
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+
+    # Password hashing settings
+    # New hashes use the first scheme; hashes in the others still verify and
+    # are re-hashed on the next successful login.
+    PASSWORD_SCHEMES: List[Literal["argon2", "bcrypt"]] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Login rate limit settings (attempts per window in seconds)
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_WINDOW: int = 300
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
 
     # Admin credentials
     ADMIN_LOGIN: str
@@ -47,6 +76,93 @@ class Settings(BaseSettings):
     TEST_PORT_REDIS: int
     TEST_DB_REDIS: int
 
+    # Polonus settings
+    POLONUS_BASE_URL: str = "https://polonus.dworzeconline.pl"
+    # Parsed route listings kept in memory per date
+    POLONUS_ROUTE_INDEX_TTL: int = 300
+    POLONUS_ROUTE_INDEX_SIZE: int = 64
+    # Longest date range, most route manifests and parallel upstream requests
+    # for /polonus/stats
+    POLONUS_STATS_MAX_DAYS: int = 31
+    POLONUS_STATS_MAX_ROUTES: int = 300
+    POLONUS_STATS_CONCURRENCY: int = 8
+    # Number of most recent dates kept in the passenger search index
+    POLONUS_SEARCH_MAX_DAYS: int = 3
+    # Seconds between reloads of the search index from the response cache
+    POLONUS_SEARCH_SYNC_INTERVAL: float = 5.0
+    # Live manifest updates: seconds between polls of a subscribed route,
+    # messages buffered per subscriber before a slow one is disconnected,
+    # routes polled at once per process and how many days from today a
+    # subscribed date may be
+    POLONUS_LIVE_INTERVAL: float = 10.0
+    POLONUS_LIVE_QUEUE_SIZE: int = 32
+    POLONUS_LIVE_MAX_POLLERS: int = 50
+    POLONUS_LIVE_MAX_DAYS: int = 7
+
+    # Polonus response cache settings (seconds). An entry is fresh for the
+    # TTL, then served stale for the stale window while it is refreshed in
+    # the background. Past dates no longer change, today's and later do.
+    POLONUS_CACHE_ENABLED: bool = True
+    POLONUS_CACHE_TTL_PAST: int = 86400
+    POLONUS_CACHE_STALE_PAST: int = 604800
+    POLONUS_CACHE_TTL_CURRENT: int = 60
+    POLONUS_CACHE_STALE_CURRENT: int = 600
+    POLONUS_CACHE_REFRESH_LOCK: int = 30
+
+    # Background job settings. A job that raises is retried after
+    # JOBS_RETRY_BACKOFF * 2 ** (attempt - 1) seconds; one still running after
+    # the visibility timeout (its worker died) is queued again.
+    JOBS_CONCURRENCY: int = 4
+    JOBS_MAX_ATTEMPTS: int = 3
+    JOBS_RETRY_BACKOFF: float = 10.0
+    JOBS_VISIBILITY_TIMEOUT: int = 300
+    JOBS_RESULT_TTL: int = 86400
+    JOBS_POLL_INTERVAL: float = 1.0
+    JOBS_IMPORT_MAX_USERS: int = 1000
+
+    # Mail settings (credential emails are sent by the job worker)
+    MAIL_SERVER: str = "localhost"
+    MAIL_PORT: int = 25
+    MAIL_USERNAME: str = ""
+    MAIL_PASSWORD: SecretStr = SecretStr("")
+    MAIL_FROM: str = "noreply@example.com"
+    MAIL_STARTTLS: bool = False
+    MAIL_SSL_TLS: bool = False
+    MAIL_CONCURRENCY: int = 2
+
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Logging settings
+    LOG_JSON: bool = False
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_QUEUE_POLICY: Literal["drop", "block"] = "drop"
+
+    # Profiling settings; only the newest PROFILING_MAX_FILES profiles are kept
+    PROFILING_TOKEN: Optional[SecretStr] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_OUTPUT_DIR: str = "logs/profiles"
+    PROFILING_MAX_FILES: int = 100
+
+    # Startup settings
+    DB_CREATE_TABLES_ON_STARTUP: Literal["auto", "always", "never"] = "auto"
+    DB_POOL_WARMUP: int = 2
+    REDIS_POOL_WARMUP: int = 2
+
+    # Server settings. With SERVER_WORKERS=0 there is one worker per CPU
+    # (counting the container's CPU quota), at most SERVER_MAX_WORKERS; each
+    # has its own database pool. A worker is recycled after SERVER_MAX_REQUESTS
+    # plus a random share of the jitter, so workers do not restart together.
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_MAX_WORKERS: int = 8
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "allow"}
 
 
@@ -1,22 +1,170 @@
+import itertools
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from fastapi import Depends  # type: ignore
 from redis import Redis  # type: ignore
-from sqlalchemy import create_engine  # type: ignore
-from sqlalchemy.orm import declarative_base  # type: ignore
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Engine, Select, create_engine, event  # type: ignore
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker  # type: ignore
 
 from app.constants import settings
+from app.utils.metrics import DB_QUERY_DURATION, REDIS_COMMAND_DURATION
+from app.utils.profiling import record_phase
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# The start time lives on the execution context, so a statement that fails
+# leaves nothing behind on the pooled connection.
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is None:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper()
+    DB_QUERY_DURATION.observe(time.perf_counter() - started, operation)
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    event.listen(engine, "before_cursor_execute", _start_query_timer)
+    event.listen(engine, "after_cursor_execute", _stop_query_timer)
+    return engine
+
+
+# Round-robin over the read replicas. A replica whose connection fails is
+# skipped for retry_interval seconds and then tried again by the next read
+# routed to it; with every replica down, reads fall back to the primary.
+class ReplicaPool:
+    def __init__(self, engines: Sequence[Engine], retry_interval: float):
+        self.engines = list(engines)
+        self.retry_interval = retry_interval
+        self._down_until: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+        for replica in self.engines:
+            event.listen(replica, "handle_error", self._handle_error)
+
+    def _handle_error(self, context) -> None:
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, replica: Engine) -> None:
+        self._down_until[replica] = time.monotonic() + self.retry_interval
+
+    def is_up(self, replica: Engine) -> bool:
+        return self._down_until.get(replica, 0.0) <= time.monotonic()
+
+    def choose(self) -> Optional[Engine]:
+        for _ in range(len(self.engines)):
+            replica = self.engines[next(self._counter) % len(self.engines)]
+            if self.is_up(replica):
+                return replica
+        return None
 
-redis_client = Redis(
-    host=settings.HOST_REDIS,
-    port=settings.PORT_REDIS,
-    db=settings.DB_REDIS,
-    decode_responses=True,
+    def dispose(self, close: bool = True) -> None:
+        for replica in self.engines:
+            replica.dispose(close=close)
+
+
+def is_read_only(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+# Sessions start on the primary. One marked with info["read_replica"] sends
+# plain SELECTs to a replica until it runs anything else (a flush, DML, raw
+# SQL, SELECT ... FOR UPDATE); from then on it stays on the primary, so the
+# rest of the request reads its own writes. A replica read that fails with
+# an OperationalError is retried once on the primary.
+class RoutingSession(Session):
+    def __init__(self, *args, replicas: Optional[ReplicaPool] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._used_replica = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.info.get("read_replica") and not self.info.get("on_primary"):
+            if not self._flushing and is_read_only(clause):
+                replica = self.replicas.choose() if self.replicas else None
+                if replica is not None:
+                    self._used_replica = True
+                    return replica
+            else:
+                self.info["on_primary"] = True
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _execute_internal(self, *args, **kwargs):
+        self._used_replica = False
+        try:
+            return super()._execute_internal(*args, **kwargs)
+        except OperationalError:
+            if not self._used_replica:
+                raise
+            # Only replica reads have run in this session, so nothing is lost.
+            self.rollback()
+            self.info["on_primary"] = True
+            return super()._execute_internal(*args, **kwargs)
+
+
+engine = instrument_engine(create_engine(settings.DATABASE_URL))
+replicas = ReplicaPool(
+    [
+        instrument_engine(create_engine(url, pool_pre_ping=True))
+        for url in settings.DATABASE_REPLICA_URLS
+    ],
+    settings.DATABASE_REPLICA_RETRY_INTERVAL,
+)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=RoutingSession,
+    replicas=replicas,
 )
 
+Base = declarative_base()
+
+
+class InstrumentedRedis(Redis):
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            elapsed = time.perf_counter() - started
+            REDIS_COMMAND_DURATION.observe(elapsed, str(args[0]).upper())
+            record_phase("redis", elapsed)
+
+
+@lru_cache
+def get_redis_client() -> InstrumentedRedis:
+    return InstrumentedRedis(
+        host=settings.HOST_REDIS,
+        port=settings.PORT_REDIS,
+        db=settings.DB_REDIS,
+        decode_responses=True,
+    )
+
+
+# Values are returned as bytes, for callers that store binary payloads.
+@lru_cache
+def get_binary_redis_client() -> InstrumentedRedis:
+    return InstrumentedRedis(
+        host=settings.HOST_REDIS,
+        port=settings.PORT_REDIS,
+        db=settings.DB_REDIS,
+    )
+
+
+def close_redis_client() -> None:
+    for get_client in (get_redis_client, get_binary_redis_client):
+        if get_client.cache_info().currsize:
+            get_client().close()
+            get_client.cache_clear()
+
 
 def get_db():
     db = SessionLocal()
@@ -26,5 +174,57 @@ def get_db():
         db.close()
 
 
+# For endpoints that only read. It shares the request's session with get_db,
+# so a write anywhere in the request keeps the reads after it on the primary.
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    db.info["read_replica"] = True
+    return db
+
+
 def get_redis():
-    return redis_client
+    return get_redis_client()
+
+
+def get_binary_redis():
+    return get_binary_redis_client()
+
+
+def migrations_at_head() -> bool:
+    from alembic.config import Config  # type: ignore
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    root = Path(__file__).resolve().parent.parent
+    config = Config(str(root / "alembic.ini"))
+    config.set_main_option("script_location", str(root / "migrations"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current == heads
+
+
+def warm_db_pool(size: int) -> None:
+    connections = []
+    try:
+        for _ in range(min(size, engine.pool.size())):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_redis_pool(size: int) -> None:
+    pool = get_redis_client().connection_pool
+    connections = []
+    try:
+        for _ in range(size):
+            connection = pool.get_connection("PING")
+            connections.append(connection)
+            connection.send_command("PING")
+            connection.read_response()
+    finally:
+        for connection in connections:
+            pool.release(connection)
@@ -23,3 +23,12 @@ class AdminAccessException(HTTPException):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators have access to this endpoint",
         )
+
+
+class TooManyLoginAttemptsException(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
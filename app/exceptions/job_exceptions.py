@@ -0,0 +1,9 @@
+from fastapi import HTTPException, status  # type: ignore
+
+
+class JobNotFoundException(HTTPException):
+    def __init__(self, job_id: str):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found.",
+        )
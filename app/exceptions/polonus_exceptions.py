@@ -0,0 +1,33 @@
+from fastapi import HTTPException, status  # type: ignore
+
+
+class InvalidDateRangeException(HTTPException):
+    def __init__(self, max_days: int):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"date_to must not be before date_from or more than {max_days} days after it",
+        )
+
+
+class StatsTooLargeException(HTTPException):
+    def __init__(self, max_routes: int):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stats cover at most {max_routes} route manifests; narrow the date range or pass route_id",
+        )
+
+
+class InvalidSearchException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search by either ticket or name",
+        )
+
+
+class LiveUpdatesBusyException(HTTPException):
+    def __init__(self, max_pollers: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Live updates are limited to {max_pollers} routes at once",
+        )
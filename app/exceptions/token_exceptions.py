@@ -1,11 +1,11 @@
 from fastapi import HTTPException, status  # type: ignore
 
 
-class TokenBlacklistedException(HTTPException):
+class RefreshTokenReusedException(HTTPException):
     def __init__(self):
         super().__init__(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been blacklisted",
+            detail="Refresh token has already been used, session revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
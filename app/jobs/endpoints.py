@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends  # type: ignore
+from redis import Redis  # type: ignore
+
+from app.auth.utils import admin_only
+from app.db import get_redis
+from app.exceptions.job_exceptions import JobNotFoundException
+from app.jobs.queue import JobQueue
+from app.jobs.schemas import JobResponse
+from app.models.users import User
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: str,
+    redis: Redis = Depends(get_redis),
+    current_user: User = Depends(admin_only),
+):
+    job = JobQueue(redis).get(job_id)
+    if job is None:
+        raise JobNotFoundException(job_id)
+    return JobResponse.model_validate(job._asdict())
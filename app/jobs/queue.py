@@ -0,0 +1,218 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from redis import Redis  # type: ignore
+from redis.commands.core import Script
+
+from app.constants import settings
+
+# Job state lives in a hash per job. Ids move between three structures:
+#   jobs:queue      list of ids ready to run (LPUSH in, RPOP out)
+#   jobs:running    sorted set scored by the deadline of the current attempt
+#   jobs:scheduled  sorted set scored by the time a retry becomes due
+# A worker that dies mid-job leaves its id in jobs:running; once the deadline
+# passes the id is queued again like a due retry.
+JOB_KEY_PREFIX = "jobs:"
+QUEUE_KEY = "jobs:queue"
+RUNNING_KEY = "jobs:running"
+SCHEDULED_KEY = "jobs:scheduled"
+
+CLAIM_SCRIPT = """
+local job_id = redis.call('RPOP', KEYS[1])
+if not job_id then
+    return false
+end
+local key = ARGV[3] .. job_id
+redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+redis.call('HSET', key, 'status', 'running', 'updated_at', ARGV[2])
+redis.call('HINCRBY', key, 'attempts', 1)
+return job_id
+"""
+claim_script = Script(None, CLAIM_SCRIPT.encode())
+
+REQUEUE_SCRIPT = """
+local moved = 0
+for i = 2, 3 do
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[i], '-inf', ARGV[1], 'LIMIT', 0, 100)
+    for _, job_id in ipairs(ids) do
+        redis.call('ZREM', KEYS[i], job_id)
+        redis.call('LPUSH', KEYS[1], job_id)
+        redis.call('HSET', ARGV[2] .. job_id, 'status', 'queued')
+        moved = moved + 1
+    end
+end
+return moved
+"""
+requeue_script = Script(None, REQUEUE_SCRIPT.encode())
+
+
+class Job(NamedTuple):
+    id: str
+    name: str
+    args: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Any
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+class JobContext(NamedTuple):
+    queue: "JobQueue"
+    job_id: str
+    attempt: int
+
+    # A hash kept across attempts for a job's own progress; it is deleted
+    # with the job's arguments when the job finishes.
+    @property
+    def state_key(self) -> str:
+        return job_state_key(self.job_id)
+
+
+class JobFunction(NamedTuple):
+    func: Callable[..., Any]
+    max_attempts: int
+    concurrency: Optional[int]
+
+    @property
+    def is_async(self) -> bool:
+        return asyncio.iscoroutinefunction(self.func)
+
+
+JOBS: Dict[str, JobFunction] = {}
+
+
+# Registers a job. It is called with a JobContext and the keyword arguments
+# given to enqueue, which must be JSON-serializable. Sync functions run in a
+# thread. concurrency caps how many run at once in one worker.
+def job(
+    name: str, max_attempts: Optional[int] = None, concurrency: Optional[int] = None
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        JOBS[name] = JobFunction(
+            func, max_attempts or settings.JOBS_MAX_ATTEMPTS, concurrency
+        )
+        func.job_name = name  # type: ignore[attr-defined]
+        return func
+
+    return decorator
+
+
+def job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+def job_state_key(job_id: str) -> str:
+    return f"{job_key(job_id)}:state"
+
+
+def retry_delay(attempts: int) -> float:
+    return settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1)
+
+
+class JobQueue:
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    def enqueue(self, func: Callable[..., Any], **kwargs: Any) -> str:
+        with self.redis.pipeline() as pipe:
+            job_id = self.enqueue_on(pipe, func, **kwargs)
+            pipe.execute()
+        return job_id
+
+    # Adds the commands that queue a job to `pipe`, so that it is queued in
+    # the same transaction as the caller's other writes.
+    def enqueue_on(self, pipe: Any, func: Callable[..., Any], **kwargs: Any) -> str:
+        name = func.job_name  # type: ignore[attr-defined]
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        pipe.hset(
+            job_key(job_id),
+            mapping={
+                "name": name,
+                "args": json.dumps(kwargs),
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": JOBS[name].max_attempts,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        pipe.lpush(QUEUE_KEY, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        data = self.redis.hgetall(job_key(job_id))
+        if not data:
+            return None
+
+        return Job(
+            id=job_id,
+            name=data["name"],
+            args=json.loads(data.get("args", "{}")),
+            status=data["status"],
+            attempts=int(data["attempts"]),
+            max_attempts=int(data["max_attempts"]),
+            result=json.loads(data["result"]) if "result" in data else None,
+            error=data.get("error"),
+            created_at=float(data["created_at"]),
+            updated_at=float(data["updated_at"]),
+        )
+
+    def claim(self, timeout: float) -> Optional[Job]:
+        now = time.time()
+        job_id = claim_script(
+            keys=[QUEUE_KEY, RUNNING_KEY],
+            args=[now + timeout, now, JOB_KEY_PREFIX],
+            client=self.redis,
+        )
+        return self.get(job_id) if job_id else None
+
+    # Pushes the deadline of a running job forward. XX leaves a job alone
+    # once it has finished or been queued again.
+    def touch(self, job: Job, timeout: float) -> None:
+        self.redis.zadd(RUNNING_KEY, {job.id: time.time() + timeout}, xx=True)
+
+    def requeue_due(self) -> int:
+        return requeue_script(
+            keys=[QUEUE_KEY, RUNNING_KEY, SCHEDULED_KEY],
+            args=[time.time(), JOB_KEY_PREFIX],
+            client=self.redis,
+        )
+
+    # Arguments and state may hold secrets (credential emails), so they are
+    # dropped once a job is finished; the record expires after JOBS_RESULT_TTL.
+    def _finish(self, job: Job, fields: Dict[str, Any]) -> None:
+        key = job_key(job.id)
+        pipe = self.redis.pipeline()
+        pipe.zrem(RUNNING_KEY, job.id)
+        pipe.hset(key, mapping={**fields, "updated_at": time.time()})
+        pipe.hdel(key, "args")
+        pipe.delete(job_state_key(job.id))
+        pipe.expire(key, settings.JOBS_RESULT_TTL)
+        pipe.execute()
+
+    def complete(self, job: Job, result: Any = None) -> None:
+        self._finish(job, {"status": "succeeded", "result": json.dumps(result)})
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> str:
+        if not retry or job.attempts >= job.max_attempts:
+            self._finish(job, {"status": "failed", "error": error})
+            return "failed"
+
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zrem(RUNNING_KEY, job.id)
+        pipe.zadd(SCHEDULED_KEY, {job.id: now + retry_delay(job.attempts)})
+        pipe.hset(
+            job_key(job.id),
+            mapping={"status": "retrying", "error": error, "updated_at": now},
+        )
+        pipe.execute()
+        return "retrying"
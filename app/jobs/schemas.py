@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel  # type: ignore
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobResponse(BaseModel):
+    id: str
+    name: str
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
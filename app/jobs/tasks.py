@@ -0,0 +1,135 @@
+import json
+from typing import Any, Dict, List
+
+from sqlalchemy import select  # type: ignore
+from sqlalchemy.dialects.postgresql import insert
+
+from app.constants import settings
+from app.db import SessionLocal
+from app.jobs.queue import JobContext, job
+from app.models.users import User
+from app.users.utils import bump_users_version, generate_random_password
+from app.utils.auth import get_password_hash
+
+CREDENTIALS_SUBJECT = "Your account"
+CREDENTIALS_BODY = (
+    "An account has been created for you.\n\n"
+    "Email: {email}\n"
+    "Password: {password}\n\n"
+    "Please change the password after your first login.\n"
+)
+
+
+def mail_config():
+    from fastapi_mail import ConnectionConfig  # type: ignore
+
+    return ConnectionConfig(
+        MAIL_USERNAME=settings.MAIL_USERNAME,
+        MAIL_PASSWORD=settings.MAIL_PASSWORD,
+        MAIL_FROM=settings.MAIL_FROM,
+        MAIL_PORT=settings.MAIL_PORT,
+        MAIL_SERVER=settings.MAIL_SERVER,
+        MAIL_STARTTLS=settings.MAIL_STARTTLS,
+        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+        USE_CREDENTIALS=bool(settings.MAIL_USERNAME),
+    )
+
+
+@job("send_credentials_email", max_attempts=5, concurrency=settings.MAIL_CONCURRENCY)
+async def send_credentials_email(
+    context: JobContext, email: str, password: str
+) -> None:
+    from fastapi_mail import FastMail, MessageSchema, MessageType  # type: ignore
+
+    message = MessageSchema(
+        subject=CREDENTIALS_SUBJECT,
+        recipients=[email],
+        body=CREDENTIALS_BODY.format(email=email, password=password),
+        subtype=MessageType.plain,
+    )
+    await FastMail(mail_config()).send_message(message)
+
+
+# Queues the email at most once per job, even when an attempt is retried or
+# runs twice: the job state records it in the same transaction.
+def queue_credentials_email(context: JobContext, email: str, password: str) -> None:
+    field = f"emailed:{email}"
+
+    def queue(pipe: Any) -> None:
+        if pipe.hexists(context.state_key, field):
+            return
+        pipe.multi()
+        context.queue.enqueue_on(
+            pipe, send_credentials_email, email=email, password=password
+        )
+        pipe.hset(context.state_key, field, 1)
+
+    context.queue.redis.transaction(queue, context.state_key)
+
+
+def hash_new_users(users: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    new_users: Dict[str, Dict[str, str]] = {}
+    for user in users:
+        if user["email"] not in new_users:
+            password = generate_random_password()
+            new_users[user["email"]] = {
+                "role": user["role"],
+                "password": password,
+                "hashed_password": get_password_hash(password),
+            }
+    return new_users
+
+
+# Creates the users that do not exist yet in one statement and queues a
+# credentials email for each. Hashing is what makes large imports slow.
+# Passwords and hashes are saved in the job state before the insert, so a
+# later attempt recognises the users an earlier one created by their exact
+# hash and still emails them.
+@job("import_users")
+def import_users(context: JobContext, users: List[Dict[str, str]]) -> Dict[str, Any]:
+    redis = context.queue.redis
+    saved = redis.hget(context.state_key, "users")
+    if saved is None:
+        new_users = hash_new_users(users)
+        with redis.pipeline() as pipe:
+            pipe.hsetnx(context.state_key, "users", json.dumps(new_users))
+            pipe.hget(context.state_key, "users")
+            pipe.expire(context.state_key, settings.JOBS_RESULT_TTL)
+            saved = pipe.execute()[1]
+    new_users = json.loads(saved)
+
+    with SessionLocal() as db:
+        db.execute(
+            insert(User)
+            .values(
+                [
+                    {
+                        "email": email,
+                        "role": user["role"],
+                        "hashed_password": user["hashed_password"],
+                    }
+                    for email, user in new_users.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+        )
+        db.commit()
+        stored = dict(
+            db.execute(
+                select(User.email, User.hashed_password).where(
+                    User.email.in_(list(new_users))
+                )
+            ).all()
+        )
+
+    created = [
+        email
+        for email, user in new_users.items()
+        if stored.get(email) == user["hashed_password"]
+    ]
+    for email in created:
+        queue_credentials_email(context, email, new_users[email]["password"])
+    if created:
+        bump_users_version(redis)
+
+    return {"created": len(created), "skipped": sorted(set(new_users) - set(created))}
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import signal
+from contextlib import nullcontext
+from typing import Dict, Set
+
+from redis.exceptions import RedisError  # type: ignore
+
+from app.constants import settings
+from app.db import get_redis_client
+from app.jobs.queue import JOBS, Job, JobContext, JobQueue
+from app.utils import logger
+from app.utils.metrics import JOBS_COMPLETED
+
+
+# Runs up to `concurrency` jobs at once, and no more than a job's own
+# concurrency of one kind (e.g. connections to the mail server). Sync jobs run
+# in threads. In burst mode it exits once the queue is empty and nothing is
+# running; retries scheduled for later are left for the next run.
+class Worker:
+    def __init__(self, queue: JobQueue, concurrency: int = settings.JOBS_CONCURRENCY):
+        self.queue = queue
+        self.slots = asyncio.Semaphore(concurrency)
+        self.limits: Dict[str, asyncio.Semaphore] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        self.stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def _limit(self, name: str):
+        concurrency = JOBS[name].concurrency
+        if concurrency is None:
+            return nullcontext()
+        if name not in self.limits:
+            self.limits[name] = asyncio.Semaphore(concurrency)
+        return self.limits[name]
+
+    # Keeps a long job from being handed to another worker while it runs.
+    async def _heartbeat(self, job: Job) -> None:
+        timeout = settings.JOBS_VISIBILITY_TIMEOUT
+        while True:
+            await asyncio.sleep(timeout / 3)
+            try:
+                self.queue.touch(job, timeout)
+            except Exception as exc:
+                logger.warning(f"Could not extend job {job.id}: {exc!r}")
+
+    async def execute(self, job: Job) -> str:
+        function = JOBS.get(job.name)
+        if function is None:
+            status = self.queue.fail(job, f"Unknown job {job.name!r}", retry=False)
+        elif job.attempts > job.max_attempts:
+            # Its last attempt outlived the visibility timeout.
+            status = self.queue.fail(job, "Worker lost the job", retry=False)
+        else:
+            context = JobContext(self.queue, job.id, job.attempts)
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                async with self._limit(job.name):
+                    if function.is_async:
+                        result = await function.func(context, **job.args)
+                    else:
+                        result = await asyncio.to_thread(
+                            function.func, context, **job.args
+                        )
+            except Exception as exc:
+                logger.warning(
+                    f"Job {job.name} {job.id} failed (attempt {job.attempts}): {exc!r}"
+                )
+                status = self.queue.fail(job, repr(exc))
+            else:
+                self.queue.complete(job, result)
+                status = "succeeded"
+            finally:
+                heartbeat.cancel()
+
+        JOBS_COMPLETED.inc(job.name, status)
+        return status
+
+    async def _run_job(self, job: Job) -> None:
+        try:
+            await self.execute(job)
+        except Exception as exc:
+            # Redis went away while recording the outcome; the job is queued
+            # again once its visibility timeout passes.
+            logger.error(f"Could not record outcome of job {job.id}: {exc!r}")
+        finally:
+            self.slots.release()
+
+    async def _idle(self, burst: bool) -> None:
+        if burst and self.tasks:
+            await asyncio.wait(
+                self.tasks,
+                timeout=settings.JOBS_POLL_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            return
+
+        try:
+            await asyncio.wait_for(self.stopping.wait(), settings.JOBS_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, burst: bool = False) -> None:
+        while not self.stopping.is_set():
+            await self.slots.acquire()
+            try:
+                self.queue.requeue_due()
+                job = self.queue.claim(settings.JOBS_VISIBILITY_TIMEOUT)
+            except RedisError as exc:
+                # A Redis blip must not stop the worker; poll again shortly.
+                self.slots.release()
+                logger.error(f"Could not claim a job: {exc!r}")
+                await self._idle(burst)
+                continue
+
+            if job is None:
+                self.slots.release()
+                if burst and not self.tasks:
+                    break
+                await self._idle(burst)
+                continue
+
+            task = asyncio.create_task(self._run_job(job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+
+
+async def serve(worker: Worker, burst: bool) -> None:
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.run(burst)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued background jobs.")
+    parser.add_argument("--concurrency", type=int, default=settings.JOBS_CONCURRENCY)
+    parser.add_argument(
+        "--burst", action="store_true", help="Exit once the queue is empty."
+    )
+    args = parser.parse_args()
+
+    from app.jobs import tasks  # noqa: F401
+
+    worker = Worker(JobQueue(get_redis_client()), args.concurrency)
+    logger.info(f"Job worker started with concurrency {args.concurrency}.")
+    asyncio.run(serve(worker, args.burst))
+    logger.info("Job worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,61 @@
+from pathlib import Path
+
 from fastapi import FastAPI  # type: ignore
+from fastapi.responses import ORJSONResponse, PlainTextResponse  # type: ignore
 
 from app.auth.endpoints import router as auth_router
 from app.conf import lifespan
+from app.constants import settings
+from app.jobs.endpoints import router as jobs_router
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
 from app.polonus.endpoints import polonus
 from app.users.endpoints import router as users_router
+from app.utils.jwt_keys import jwks
+from app.utils.metrics import registry
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+app.add_middleware(MetricsMiddleware, router=app.router)
+app.add_middleware(
+    ProfilingMiddleware,
+    output_dir=Path(settings.PROFILING_OUTPUT_DIR),
+    token=(
+        settings.PROFILING_TOKEN.get_secret_value()
+        if settings.PROFILING_TOKEN
+        else None
+    ),
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    max_profiles=settings.PROFILING_MAX_FILES,
 )
 
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/user", tags=["User"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
 
 app.mount("/polonus", app=polonus)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def jwks_endpoint():
+    return ORJSONResponse(
+        jwks(),
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"},
+    )
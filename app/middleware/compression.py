@@ -0,0 +1,166 @@
+import zlib
+from typing import Optional, Union
+
+from starlette.datastructures import Headers, MutableHeaders  # type: ignore
+from starlette.types import ASGIApp, Message, Receive, Scope, Send  # type: ignore
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+Compressor = Union[GzipCompressor, BrotliCompressor]
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    encodings = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(coding.strip())
+    return encodings
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def choose_encoding(self, scope: Scope) -> Optional[str]:
+        encodings = accepted_encodings(Headers(scope=scope).get("Accept-Encoding", ""))
+        if brotli is not None and "br" in encodings:
+            return "br"
+        if "gzip" in encodings:
+            return "gzip"
+        return None
+
+    def create_compressor(self, encoding: str) -> Compressor:
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream_send = send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor: Optional[Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Headers are held back until the first body chunk decides the encoding.
+            self.initial_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            if message_type == "http.response.body" and not self.started:
+                self.started = True
+                await self.downstream_send(self.initial_message)
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream_send(self.initial_message)
+                await self.downstream_send(message)
+                return
+
+            self.compressor = self.middleware.create_compressor(self.encoding)
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+
+            compressed = self.compress(body, more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(compressed))
+
+            await self.downstream_send(self.initial_message)
+            await self.downstream_send(
+                {"type": message_type, "body": compressed, "more_body": more_body}
+            )
+            return
+
+        await self.downstream_send(
+            {
+                "type": message_type,
+                "body": self.compress(body, more_body),
+                "more_body": more_body,
+            }
+        )
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        assert self.compressor is not None
+        compressed = self.compressor.process(body)
+        if more_body:
+            # Flush every chunk so streamed responses reach the client promptly.
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
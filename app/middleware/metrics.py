@@ -0,0 +1,67 @@
+import time
+from functools import lru_cache
+from typing import Optional, Sequence
+
+from starlette.routing import BaseRoute, Match, Mount, Router  # type: ignore
+from starlette.types import ASGIApp, Message, Receive, Scope, Send  # type: ignore
+
+from app.utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def find_route_template(routes: Sequence[BaseRoute], scope: Scope) -> Optional[str]:
+    partial = None
+    for route in routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.NONE:
+            continue
+
+        if isinstance(route, Mount):
+            template = find_route_template(route.routes, {**scope, **child_scope})
+            return f"{route.path}{template or ''}"
+
+        if match == Match.FULL:
+            return route.path
+        partial = partial or route.path
+    return partial
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, router: Router, cache_size: int = 4096) -> None:
+        self.app = app
+        self.router = router
+        # Concrete paths repeat constantly, so route resolution is memoized.
+        self.route_template = lru_cache(maxsize=cache_size)(self._route_template)
+
+    def _route_template(self, method: str, root_path: str, path: str) -> str:
+        scope = {"type": "http", "method": method, "root_path": root_path, "path": path}
+        return find_route_template(self.router.routes, scope) or UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_template(method, scope.get("root_path", ""), scope["path"])
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_REQUESTS_IN_PROGRESS.dec(method, route)
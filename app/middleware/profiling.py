@@ -0,0 +1,68 @@
+import random
+import secrets
+from pathlib import Path
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool  # type: ignore
+from starlette.datastructures import Headers, MutableHeaders  # type: ignore
+from starlette.types import ASGIApp, Message, Receive, Scope, Send  # type: ignore
+
+from app.utils import logger
+from app.utils.profiling import RequestProfile, current_profile
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: Path,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        max_profiles: int = 100,
+    ) -> None:
+        self.app = app
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self.token = token
+        self.sample_rate = sample_rate
+        self.active = False
+
+    def should_profile(self, scope: Scope) -> bool:
+        requested = Headers(scope=scope).get(PROFILE_HEADER)
+        if requested is not None and self.token:
+            return secrets.compare_digest(requested, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Only one request is profiled at a time: concurrent cProfile sessions on
+        # the event loop thread would replace each other. The guard does not
+        # keep other requests off the loop, so the loop-thread profile also
+        # includes whatever they run while this one is in flight.
+        if scope["type"] != "http" or self.active or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+                headers.append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        self.active = True
+        context_token = current_profile.set(profile)
+        profile.profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            profile.profiler.disable()
+            current_profile.reset(context_token)
+            self.active = False
+
+        path = await run_in_threadpool(profile.dump, self.output_dir, self.max_profiles)
+        logger.info(f"Stored profile for {scope['method']} {scope['path']} in {path}")
@@ -0,0 +1,107 @@
+import gzip
+import time
+from datetime import date
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Response  # type: ignore
+from pydantic_core import from_json, to_json  # type: ignore
+from redis import Redis  # type: ignore
+
+from app.constants import settings
+from app.middleware.compression import accepted_encodings
+from app.polonus.schemas import RouteResponse
+
+# Route responses are cached as gzipped JSON in a hash per (route_id, date):
+# "body" holds the bytes sent to clients and "fresh_until" the Unix time after
+# which the entry is served stale and refreshed.
+CACHE_KEY_PREFIX = "polonus:passengers"
+# Routes served by /get-passengers, per date, and the most recent of those
+# dates; the passenger search indexes these cache entries. Stats reads are
+# left out.
+SEARCH_KEY_PREFIX = "polonus:search"
+SEARCH_DATES_KEY = "polonus:search:dates"
+
+
+class CachedRoute(NamedTuple):
+    body: bytes
+    stale: bool
+
+
+def route_cache_key(route_id: int, day: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:{route_id}:{day}"
+
+
+def route_cache_ttls(day: str) -> Tuple[int, int]:
+    if day < date.today().isoformat():
+        return settings.POLONUS_CACHE_TTL_PAST, settings.POLONUS_CACHE_STALE_PAST
+    return settings.POLONUS_CACHE_TTL_CURRENT, settings.POLONUS_CACHE_STALE_CURRENT
+
+
+def get_cached_route(redis: Redis, route_id: int, day: str) -> Optional[CachedRoute]:
+    body, fresh_until = redis.hmget(
+        route_cache_key(route_id, day), "body", "fresh_until"
+    )
+    if body is None or fresh_until is None:
+        return None
+    return CachedRoute(body, time.time() >= float(fresh_until))
+
+
+def store_route(redis: Redis, route: RouteResponse) -> bytes:
+    body = gzip.compress(to_json(route), settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    ttl, stale = route_cache_ttls(route.date)
+    key = route_cache_key(route.route_id, route.date)
+
+    with redis.pipeline() as pipe:
+        pipe.hset(key, mapping={"body": body, "fresh_until": time.time() + ttl})
+        pipe.expire(key, ttl + stale)
+        pipe.execute()
+    return body
+
+
+def cached_passengers(body: bytes) -> List[Dict[str, Any]]:
+    return from_json(gzip.decompress(body))["passengers"]
+
+
+def search_routes_key(day: str) -> str:
+    return f"{SEARCH_KEY_PREFIX}:{day}"
+
+
+def mark_searchable(redis: Redis, route_id: int, day: str, max_days: int) -> None:
+    ttl, stale = route_cache_ttls(day)
+    key = search_routes_key(day)
+
+    with redis.pipeline() as pipe:
+        pipe.sadd(key, route_id)
+        pipe.expire(key, ttl + stale)
+        pipe.zadd(SEARCH_DATES_KEY, {day: date.fromisoformat(day).toordinal()})
+        pipe.zremrangebyrank(SEARCH_DATES_KEY, 0, -(max_days + 1))
+        pipe.execute()
+
+
+# Only one worker refreshes a stale entry; the others keep serving it.
+def claim_route_refresh(redis: Redis, route_id: int, day: str) -> bool:
+    return bool(
+        redis.set(
+            f"{route_cache_key(route_id, day)}:refresh",
+            1,
+            nx=True,
+            ex=settings.POLONUS_CACHE_REFRESH_LOCK,
+        )
+    )
+
+
+def invalidate_routes(redis: Redis, route_id: int, day: Optional[str] = None) -> int:
+    if day is not None:
+        return redis.delete(route_cache_key(route_id, day))
+
+    keys = list(redis.scan_iter(match=route_cache_key(route_id, "*"), count=500))
+    return redis.delete(*keys) if keys else 0
+
+
+def cached_route_response(body: bytes, accept_encoding: str, status: str) -> Response:
+    headers = {"Vary": "Accept-Encoding", "X-Cache": status}
+    if "gzip" in accepted_encodings(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,17 +1,260 @@
-from fastapi import FastAPI  # type: ignore
+import asyncio
+from datetime import date as Date
+from datetime import timedelta
+from functools import partial
+from typing import Any, Dict, List, Optional
 
-from app.polonus.schemas import RouteRequest, RouteResponse
-from app.polonus.utils import get_passenger_data
+from fastapi import (  # type: ignore
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    Header,
+    Query,
+    WebSocket,
+    status,
+)
+from fastapi.responses import ORJSONResponse  # type: ignore
+from redis import Redis  # type: ignore
+from starlette.concurrency import run_in_threadpool  # type: ignore
 
-polonus = FastAPI(title="Polonus", description="Polonus SubApp", version="1.0.0")
+from app.auth.schemas import TokenUser
+from app.auth.utils import admin_only, get_current_user, get_websocket_user
+from app.constants import settings
+from app.db import get_binary_redis
+from app.exceptions.polonus_exceptions import (
+    InvalidDateRangeException,
+    InvalidSearchException,
+    LiveUpdatesBusyException,
+)
+from app.middleware.compression import CompressionMiddleware
+from app.polonus.cache import (
+    cached_passengers,
+    cached_route_response,
+    claim_route_refresh,
+    get_cached_route,
+    invalidate_routes,
+    mark_searchable,
+    store_route,
+)
+from app.polonus.live import Subscription, live_routes
+from app.polonus.schemas import (
+    DATE_PATTERN,
+    RouteListResponse,
+    RouteRequest,
+    RouteResponse,
+    SearchResult,
+    StatsResponse,
+)
+from app.polonus.search import SearchEntry, search_index
+from app.polonus.stats import passenger_stats
+from app.polonus.utils import (
+    get_manifests,
+    get_passenger_data,
+    get_route_index,
+    get_route_passengers,
+)
+from app.users.schemas import UserResponse
+from app.utils import logger
+from app.utils.responses import ModelResponse
 
+polonus = FastAPI(
+    title="Polonus",
+    description="Polonus SubApp",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+polonus.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
 
-@polonus.post("/get-passengers", response_model=RouteResponse)
-async def get_passengers_v2(route_request: RouteRequest):
+
+async def build_route_response(route_request: RouteRequest) -> RouteResponse:
     passengers = await get_passenger_data(
         route_request.date, str(route_request.route_id)
     )
 
     return RouteResponse(
-        route_id=route_request.route_id, date=route_request.date, passengers=passengers
+        route_id=route_request.route_id,
+        date=route_request.date,
+        passengers=passengers,
+    )
+
+
+async def refresh_route(redis: Redis, route_request: RouteRequest) -> None:
+    try:
+        route = await build_route_response(route_request)
+        await run_in_threadpool(store_route, redis, route)
+    except Exception as exc:
+        # The stale entry keeps being served until it expires.
+        logger.warning(
+            f"Could not refresh route {route_request.route_id} "
+            f"on {route_request.date}: {exc!r}"
+        )
+
+
+@polonus.get("/routes", response_model=RouteListResponse)
+async def get_routes(date: str = Query(..., pattern=DATE_PATTERN)):
+    route_index = await get_route_index(date)
+
+    return ModelResponse(RouteListResponse(date=date, routes=route_index.routes))
+
+
+# Stats read manifests through the response cache and fill it on a miss.
+async def get_stored_passengers(
+    redis: Redis, date: str, route: str, link: str
+) -> List[Dict[str, Any]]:
+    if not settings.POLONUS_CACHE_ENABLED or not route.isdigit():
+        return await get_route_passengers(date, route, link)
+
+    cached = await run_in_threadpool(get_cached_route, redis, int(route), date)
+    if cached is not None:
+        return cached_passengers(cached.body)
+
+    passengers = await get_route_passengers(date, route, link)
+    route_response = RouteResponse(
+        route_id=int(route), date=date, passengers=passengers
+    )
+    await run_in_threadpool(store_route, redis, route_response)
+    return passengers
+
+
+@polonus.get("/stats", response_model=StatsResponse)
+async def get_stats(
+    date_from: Date,
+    date_to: Date,
+    route_id: Optional[int] = None,
+    redis: Redis = Depends(get_binary_redis),
+    current_user: UserResponse = Depends(admin_only),
+):
+    days = (date_to - date_from).days + 1
+    if not 0 < days <= settings.POLONUS_STATS_MAX_DAYS:
+        raise InvalidDateRangeException(settings.POLONUS_STATS_MAX_DAYS)
+
+    manifests, failed = await get_manifests(
+        [(date_from + timedelta(days=offset)).isoformat() for offset in range(days)],
+        None if route_id is None else str(route_id),
+        settings.POLONUS_STATS_CONCURRENCY,
+        settings.POLONUS_STATS_MAX_ROUTES,
+        partial(get_stored_passengers, redis),
+    )
+
+    return ModelResponse(
+        StatsResponse(
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat(),
+            failed=[{"date": date, "route": route} for date, route in failed],
+            **passenger_stats(manifests),
+        )
     )
+
+
+# Finds passengers of routes served by /get-passengers whose responses are
+# still cached, so nothing is found while the cache is disabled.
+@polonus.get("/search", response_model=List[SearchResult])
+async def search_passengers(
+    ticket: Optional[str] = None,
+    name: Optional[str] = Query(None, min_length=2),
+    date: Optional[Date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    redis: Redis = Depends(get_binary_redis),
+    current_user: TokenUser = Depends(get_current_user),
+):
+    if (ticket is None) == (name is None):
+        raise InvalidSearchException()
+
+    day = date.isoformat() if date else None
+
+    def search() -> List[SearchEntry]:
+        search_index.sync(redis, day)
+        if ticket is not None:
+            return search_index.find_ticket(ticket, day)[:limit]
+        return search_index.find_name(name, day, limit)
+
+    results = await run_in_threadpool(search)
+    return ModelResponse([result._asdict() for result in results])
+
+
+@polonus.post("/get-passengers", response_model=RouteResponse)
+async def get_passengers_v2(
+    route_request: RouteRequest,
+    background_tasks: BackgroundTasks,
+    accept_encoding: str = Header(""),
+    redis: Redis = Depends(get_binary_redis),
+):
+    if not settings.POLONUS_CACHE_ENABLED:
+        return ModelResponse(await build_route_response(route_request))
+
+    route_id, day = route_request.route_id, route_request.date
+    background_tasks.add_task(
+        mark_searchable, redis, route_id, day, settings.POLONUS_SEARCH_MAX_DAYS
+    )
+    cached = await run_in_threadpool(get_cached_route, redis, route_id, day)
+    if cached is None:
+        route = await build_route_response(route_request)
+        body = await run_in_threadpool(store_route, redis, route)
+        return cached_route_response(body, accept_encoding, "MISS")
+
+    if cached.stale and await run_in_threadpool(
+        claim_route_refresh, redis, route_id, day
+    ):
+        background_tasks.add_task(refresh_route, redis, route_request)
+    return cached_route_response(
+        cached.body, accept_encoding, "STALE" if cached.stale else "HIT"
+    )
+
+
+async def forward_updates(websocket: WebSocket, subscription: Subscription) -> None:
+    while (message := await subscription.queue.get()) is not None:
+        await websocket.send_text(message)
+    await websocket.close(code=subscription.close_code)
+
+
+async def wait_for_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+# Pushes a snapshot of the manifest, then the changes, from a poller shared
+# by every subscriber of the same route and date. The connection is accepted
+# first so that a refusal reaches the client as a close code: 1008 without a
+# valid token or for a date too far from today, 1013 when this process
+# already polls as many routes as it may.
+@polonus.websocket("/ws/passengers")
+async def passenger_updates(
+    websocket: WebSocket, route_id: int, date: Date, token: Optional[str] = None
+):
+    await websocket.accept()
+    user = get_websocket_user(websocket, token)
+    days_away = abs((date - Date.today()).days)
+    if user is None or days_away > settings.POLONUS_LIVE_MAX_DAYS:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        subscription = live_routes.subscribe(route_id, date.isoformat())
+    except LiveUpdatesBusyException as exc:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=exc.detail)
+        return
+
+    tasks = [
+        asyncio.create_task(forward_updates(websocket, subscription)),
+        asyncio.create_task(wait_for_disconnect(websocket)),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        live_routes.unsubscribe(subscription)
+
+
+@polonus.delete("/cache/{route_id}")
+def invalidate_route_cache(
+    route_id: int,
+    date: Optional[str] = Query(None, pattern=DATE_PATTERN),
+    redis: Redis = Depends(get_binary_redis),
+    current_user: UserResponse = Depends(admin_only),
+):
+    return {"deleted": invalidate_routes(redis, route_id, date)}
@@ -0,0 +1,181 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson  # type: ignore
+from fastapi import HTTPException, status  # type: ignore
+
+from app.constants import settings
+from app.exceptions.polonus_exceptions import LiveUpdatesBusyException
+from app.polonus import utils as polonus_utils
+from app.utils import logger
+from app.utils.metrics import POLONUS_LIVE_POLLERS, POLONUS_LIVE_SUBSCRIBERS
+
+# Dashboards subscribe to a (route_id, date) instead of polling. One poller
+# per key fetches the manifest every POLONUS_LIVE_INTERVAL seconds and sends
+# each subscriber a snapshot, then only what changed, encoded once for all.
+
+RouteKey = Tuple[int, str]
+
+
+def passenger_key(passenger: Dict[str, Any]) -> str:
+    return passenger["ticket_number"] or (
+        f"{passenger['full_name']}|{passenger['departure_time']}"
+    )
+
+
+class Subscription:
+    def __init__(self, poller: "RoutePoller", maxsize: int):
+        self.poller = poller
+        # None tells the reader to close the connection with close_code.
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize)
+        self.close_code = status.WS_1000_NORMAL_CLOSURE
+
+    def push(self, message: str) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        self.close_code = code
+        if self.queue.full():
+            # Make room for the marker by dropping the oldest message.
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class RoutePoller:
+    def __init__(self, key: RouteKey, interval: float, queue_size: int):
+        self.key = key
+        self.interval = interval
+        self.queue_size = queue_size
+        self.subscriptions: Set[Subscription] = set()
+        self.snapshot: Optional[Dict[str, Dict[str, Any]]] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+        POLONUS_LIVE_POLLERS.inc()
+        self.task.add_done_callback(lambda _: POLONUS_LIVE_POLLERS.dec())
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        if self.snapshot is not None:
+            subscription.push(self.snapshot_message(list(self.snapshot.values())))
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def snapshot_message(self, passengers: List[Dict[str, Any]]) -> str:
+        route_id, date = self.key
+        return orjson.dumps(
+            {
+                "type": "snapshot",
+                "route_id": route_id,
+                "date": date,
+                "passengers": passengers,
+            }
+        ).decode()
+
+    def broadcast(self, message: str) -> None:
+        for subscription in list(self.subscriptions):
+            if not subscription.push(message):
+                # A reader that cannot keep up is disconnected rather than
+                # buffered without bound; it can reconnect for a snapshot.
+                self.subscriptions.discard(subscription)
+                subscription.close(status.WS_1013_TRY_AGAIN_LATER)
+
+    def update(self, passengers: List[Dict[str, Any]]) -> None:
+        current = {passenger_key(passenger): passenger for passenger in passengers}
+        previous, self.snapshot = self.snapshot, current
+        if previous is None:
+            self.broadcast(self.snapshot_message(passengers))
+            return
+
+        added = [row for key, row in current.items() if key not in previous]
+        changed = [
+            row
+            for key, row in current.items()
+            if key in previous and previous[key] != row
+        ]
+        removed = [key for key in previous if key not in current]
+        if added or changed or removed:
+            self.broadcast(
+                orjson.dumps(
+                    {
+                        "type": "diff",
+                        "added": added,
+                        "changed": changed,
+                        "removed": removed,
+                    }
+                ).decode()
+            )
+
+    async def run(self) -> None:
+        route_id, date = self.key
+        while True:
+            try:
+                passengers = await polonus_utils.get_passenger_data(date, str(route_id))
+            except HTTPException as exc:
+                if exc.status_code == 404:
+                    self.broadcast(
+                        orjson.dumps({"type": "error", "detail": exc.detail}).decode()
+                    )
+                    for subscription in self.subscriptions:
+                        subscription.close()
+                    return
+                logger.warning(f"Live poll of route {route_id} on {date} failed: {exc}")
+            except Exception as exc:
+                logger.warning(
+                    f"Live poll of route {route_id} on {date} failed: {exc!r}"
+                )
+            else:
+                self.update(passengers)
+            await asyncio.sleep(self.interval)
+
+
+# Each poller keeps requesting the upstream API, so at most max_pollers run at
+# once; subscribing to one more route raises LiveUpdatesBusyException.
+class LiveRoutes:
+    def __init__(self) -> None:
+        self.pollers: Dict[RouteKey, RoutePoller] = {}
+
+    def subscribe(self, route_id: int, date: str) -> Subscription:
+        key = (route_id, date)
+        poller = self.pollers.get(key)
+        if poller is None or poller.done:
+            max_pollers = settings.POLONUS_LIVE_MAX_POLLERS
+            if sum(not other.done for other in self.pollers.values()) >= max_pollers:
+                raise LiveUpdatesBusyException(max_pollers)
+            poller = self.pollers[key] = RoutePoller(
+                key, settings.POLONUS_LIVE_INTERVAL, settings.POLONUS_LIVE_QUEUE_SIZE
+            )
+            poller.start()
+
+        POLONUS_LIVE_SUBSCRIBERS.inc()
+        return poller.subscribe()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        POLONUS_LIVE_SUBSCRIBERS.dec()
+        poller = subscription.poller
+        poller.subscriptions.discard(subscription)
+        if not poller.subscriptions:
+            poller.stop()
+            if self.pollers.get(poller.key) is poller:
+                del self.pollers[poller.key]
+
+    def close(self) -> None:
+        for poller in self.pollers.values():
+            poller.stop()
+        self.pollers.clear()
+
+
+live_routes = LiveRoutes()
@@ -1,7 +1,10 @@
 from datetime import datetime
+from typing import Dict, Optional
 
 from pydantic import BaseModel, field_validator  # type: ignore
 
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
 
 class RouteRequest(BaseModel):
     date: str
@@ -42,3 +45,51 @@ class RouteResponse(BaseModel):
     route_id: int
     date: str
     passengers: list[Passenger]
+
+
+class RouteSummary(BaseModel):
+    number: str
+    departure_time: str
+    relation: str
+    link: str
+
+
+class RouteListResponse(BaseModel):
+    date: str
+    routes: list[RouteSummary]
+
+
+class RouteStats(BaseModel):
+    date: str
+    route: str
+    passengers: int
+    revenue: Dict[str, float]
+
+
+class OriginDestinationStats(BaseModel):
+    origin: str
+    destination: str
+    passengers: int
+    revenue: Dict[str, float]
+
+
+class FailedManifest(BaseModel):
+    date: str
+    route: Optional[str]
+
+
+class StatsResponse(BaseModel):
+    date_from: str
+    date_to: str
+    passengers: int
+    revenue: Dict[str, float]
+    routes: list[RouteStats]
+    origin_destination: list[OriginDestinationStats]
+    # Manifests that could not be fetched and are left out of the totals
+    failed: list[FailedManifest]
+
+
+class SearchResult(BaseModel):
+    date: str
+    route: str
+    passenger: Passenger
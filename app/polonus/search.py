@@ -0,0 +1,229 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from math import inf
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from redis import Redis  # type: ignore
+
+from app.constants import settings
+from app.polonus.cache import (
+    SEARCH_DATES_KEY,
+    cached_passengers,
+    route_cache_key,
+    search_routes_key,
+)
+
+# "Ł" has no Unicode decomposition, so it is folded by hand; the other Polish
+# letters lose their combining marks under NFKD.
+STROKE_FOLD = str.maketrans({"Ł": "L", "ł": "l"})
+
+
+def fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.translate(STROKE_FOLD))
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+# "JAN KOWALSKI" is found by a prefix of "jan kowalski" or of "kowalski".
+def name_keys(full_name: str) -> List[str]:
+    words = fold(full_name).split()
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class SearchEntry(NamedTuple):
+    date: str
+    route: str
+    passenger: Dict[str, Any]
+
+
+class DayIndex:
+    def __init__(self, date: str):
+        self.date = date
+        # Passenger lists by route, with the version of the cache entry they
+        # were read from; replaced when the entry changes.
+        self.manifests: Dict[str, Tuple[Any, List[Dict[str, Any]]]] = {}
+        self.tickets: Dict[str, List[SearchEntry]] = {}
+        self.name_keys: List[str] = []
+        self.name_entries: List[SearchEntry] = []
+        self.stale = False
+
+    def version(self, route: str) -> Any:
+        manifest = self.manifests.get(route)
+        return manifest[0] if manifest else None
+
+    def add(
+        self, route: str, passengers: List[Dict[str, Any]], version: Any = None
+    ) -> None:
+        self.manifests[route] = (version, passengers)
+        self.stale = True
+
+    def remove(self, route: str) -> None:
+        if self.manifests.pop(route, None) is not None:
+            self.stale = True
+
+    # Rebuilt on the first lookup after new manifests arrive, so loading all
+    # routes of a day costs one sort rather than one per route.
+    def rebuild(self) -> None:
+        tickets: Dict[str, List[SearchEntry]] = {}
+        keys = []
+        for route, (_, passengers) in self.manifests.items():
+            for passenger in passengers:
+                entry = SearchEntry(self.date, route, passenger)
+                tickets.setdefault(passenger["ticket_number"], []).append(entry)
+                keys.extend((key, entry) for key in name_keys(passenger["full_name"]))
+        keys.sort(key=itemgetter(0))
+
+        self.tickets = tickets
+        self.name_keys = [key for key, _ in keys]
+        self.name_entries = [entry for _, entry in keys]
+        self.stale = False
+
+    def find_ticket(self, ticket_number: str) -> List[SearchEntry]:
+        return self.tickets.get(ticket_number, [])
+
+    def find_name(self, prefix: str, limit: int) -> List[SearchEntry]:
+        results: List[SearchEntry] = []
+        seen = set()
+        start = bisect_left(self.name_keys, prefix)
+        for position in range(start, len(self.name_keys)):
+            if len(results) >= limit or not self.name_keys[position].startswith(prefix):
+                break
+            entry = self.name_entries[position]
+            if id(entry.passenger) not in seen:
+                seen.add(id(entry.passenger))
+                results.append(entry)
+        return results
+
+
+# Passengers of the most recent max_days dates. The index is a per-process
+# copy of the Redis response cache entries listed by mark_searchable, so every
+# worker finds what any worker served; sync() loads only entries whose
+# version (fresh_until) changed. Syncs run at most once per sync_interval and
+# one at a time, with the Redis reads outside the lookup lock: searches never
+# wait for Redis, and may lag behind the cache by that interval.
+class SearchIndex:
+    def __init__(self, max_days: int, sync_interval: float):
+        self.max_days = max_days
+        self.sync_interval = sync_interval
+        self.days: Dict[str, DayIndex] = {}
+        self._lock = threading.RLock()
+        self._syncing = threading.Lock()
+        self._synced: Dict[Optional[str], float] = {}
+
+    # Replaces the passenger lists of the given routes, with the cache entry
+    # versions they were read from, and drops the removed routes.
+    def update(
+        self,
+        date: str,
+        manifests: Dict[str, Tuple[Any, List[Dict[str, Any]]]],
+        removed: Iterable[str] = (),
+    ) -> None:
+        with self._lock:
+            day = self.days.get(date) or DayIndex(date)
+            for route in removed:
+                day.remove(route)
+            for route, (version, passengers) in manifests.items():
+                day.add(route, passengers, version)
+            if day.manifests:
+                self.days[date] = day
+            else:
+                self.days.pop(date, None)
+
+    def _sync_day(self, redis: Redis, date: str) -> None:
+        routes = [member.decode() for member in redis.smembers(search_routes_key(date))]
+        with redis.pipeline(transaction=False) as pipe:
+            for route in routes:
+                pipe.hget(route_cache_key(int(route), date), "fresh_until")
+            versions = dict(zip(routes, pipe.execute()))
+
+        with self._lock:
+            day = self.days.get(date)
+            known = (
+                {route: day.version(route) for route in day.manifests} if day else {}
+            )
+        removed = [route for route in known if versions.get(route) is None]
+        changed = [
+            route
+            for route, version in versions.items()
+            if version is not None and version != known.get(route)
+        ]
+        with redis.pipeline(transaction=False) as pipe:
+            for route in changed:
+                pipe.hmget(route_cache_key(int(route), date), "body", "fresh_until")
+            entries = pipe.execute() if changed else []
+
+        manifests = {
+            route: (version, cached_passengers(body))
+            for route, (body, version) in zip(changed, entries)
+            if body is not None
+        }
+        self.update(date, manifests, removed)
+
+    # Without a date, loads the most recent dates and drops the others; a
+    # given date is loaded alongside them.
+    def sync(self, redis: Redis, date: Optional[str] = None) -> None:
+        now = time.monotonic()
+        if now - self._synced.get(date, -inf) < self.sync_interval:
+            return
+        if not self._syncing.acquire(blocking=False):
+            return
+        try:
+            self._synced = {
+                key: synced
+                for key, synced in self._synced.items()
+                if now - synced < self.sync_interval
+            }
+            self._synced[date] = now
+            recent = [
+                day.decode()
+                for day in redis.zrevrange(SEARCH_DATES_KEY, 0, self.max_days - 1)
+            ]
+            dates = recent if date is None else [date]
+            with self._lock:
+                for day in set(self.days) - set(recent) - set(dates):
+                    del self.days[day]
+            for day in dates:
+                self._sync_day(redis, day)
+        finally:
+            self._syncing.release()
+
+    def _days(self, date: Optional[str]) -> List[DayIndex]:
+        if date is None:
+            days = [self.days[day] for day in sorted(self.days, reverse=True)]
+        else:
+            days = [self.days[date]] if date in self.days else []
+        for day in days:
+            if day.stale:
+                day.rebuild()
+        return days
+
+    def find_ticket(
+        self, ticket_number: str, date: Optional[str] = None
+    ) -> List[SearchEntry]:
+        with self._lock:
+            return [
+                entry
+                for day in self._days(date)
+                for entry in day.find_ticket(ticket_number.strip())
+            ]
+
+    def find_name(
+        self, prefix: str, date: Optional[str] = None, limit: int = 20
+    ) -> List[SearchEntry]:
+        prefix = " ".join(fold(prefix).split())
+        results: List[SearchEntry] = []
+        with self._lock:
+            for day in self._days(date):
+                results.extend(day.find_name(prefix, limit - len(results)))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+search_index = SearchIndex(
+    settings.POLONUS_SEARCH_MAX_DAYS, settings.POLONUS_SEARCH_SYNC_INTERVAL
+)
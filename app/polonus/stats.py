@@ -0,0 +1,111 @@
+import itertools
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# numpy is imported inside the functions to keep worker startup fast.
+
+Manifest = Tuple[str, str, List[Dict[str, Any]]]
+
+
+# Integer codes for string columns, in first-seen order. A dict lookup per
+# value is several times faster than np.unique on a unicode array.
+def factorize(values: Iterable[str], count: int) -> Tuple[List[str], Any]:
+    import numpy as np  # type: ignore
+
+    codes: Dict[str, int] = {}
+    labels = np.fromiter(
+        (codes.setdefault(value, len(codes)) for value in values),
+        dtype=np.intp,
+        count=count,
+    )
+    return list(codes), labels
+
+
+def revenue_by_currency(currencies: Sequence[str], counts, sums) -> Dict[str, float]:
+    return {
+        currency: round(float(total), 2)
+        for currency, count, total in zip(currencies, counts, sums)
+        if count
+    }
+
+
+# Passenger counts and revenue (per currency) for each group code in `groups`.
+def grouped_totals(groups, group_count: int, currency_codes, currency_count, prices):
+    import numpy as np  # type: ignore
+
+    cells = groups * currency_count + currency_codes
+    size = group_count * currency_count
+    shape = (group_count, currency_count)
+    counts = np.bincount(cells, minlength=size).reshape(shape)
+    sums = np.bincount(cells, weights=prices, minlength=size).reshape(shape)
+    return counts, sums
+
+
+def passenger_stats(manifests: Sequence[Manifest]) -> Dict[str, Any]:
+    import numpy as np  # type: ignore
+
+    rows = [
+        (group, passenger)
+        for group, (_, _, passengers) in enumerate(manifests)
+        for passenger in passengers
+    ]
+    count = len(rows)
+
+    groups = np.fromiter((group for group, _ in rows), dtype=np.intp, count=count)
+    prices = np.fromiter(
+        (passenger["price"] for _, passenger in rows), dtype=np.float64, count=count
+    )
+    currencies, currency_codes = factorize(
+        (passenger["currency"] for _, passenger in rows), count
+    )
+    cities, city_codes = factorize(
+        itertools.chain(
+            (passenger["departure_city"] for _, passenger in rows),
+            (passenger["arrival_city"] for _, passenger in rows),
+        ),
+        2 * count,
+    )
+
+    route_counts, route_sums = grouped_totals(
+        groups, len(manifests), currency_codes, len(currencies), prices
+    )
+    routes = [
+        {
+            "date": date,
+            "route": route,
+            "passengers": int(counts.sum()),
+            "revenue": revenue_by_currency(currencies, counts, sums),
+        }
+        for (date, route, _), counts, sums in zip(manifests, route_counts, route_sums)
+    ]
+
+    # Origin/destination pairs are encoded as one integer so that np.unique
+    # finds the pairs that occur; the full city x city matrix is mostly empty.
+    pairs = city_codes[:count] * len(cities) + city_codes[count:]
+    pair_values, pair_codes = np.unique(pairs, return_inverse=True)
+    pair_counts, pair_sums = grouped_totals(
+        pair_codes, len(pair_values), currency_codes, len(currencies), prices
+    )
+    origin_destination = sorted(
+        (
+            {
+                "origin": cities[pair // len(cities)],
+                "destination": cities[pair % len(cities)],
+                "passengers": int(counts.sum()),
+                "revenue": revenue_by_currency(currencies, counts, sums),
+            }
+            for pair, counts, sums in zip(pair_values.tolist(), pair_counts, pair_sums)
+        ),
+        key=lambda row: row["passengers"],
+        reverse=True,
+    )
+
+    currency_totals = np.bincount(currency_codes, minlength=len(currencies))
+    currency_sums = np.bincount(
+        currency_codes, weights=prices, minlength=len(currencies)
+    )
+    return {
+        "passengers": count,
+        "revenue": revenue_by_currency(currencies, currency_totals, currency_sums),
+        "routes": routes,
+        "origin_destination": origin_destination,
+    }
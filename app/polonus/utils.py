@@ -1,16 +1,70 @@
+import asyncio
 import re
-from typing import Any, Dict, List
-
-import httpx  # type: ignore
-from bs4 import BeautifulSoup  # type: ignore
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from cachetools import TTLCache  # type: ignore
 from fastapi import HTTPException  # type: ignore
 
-BASE_URL = "https://polonus.dworzeconline.pl"
+from app.constants import settings
+from app.exceptions.polonus_exceptions import StatsTooLargeException
+from app.polonus.stats import Manifest
+from app.utils import logger
+from app.utils.metrics import UPSTREAM_REQUEST_DURATION
+from app.utils.profiling import phase
 
+# httpx and BeautifulSoup (with lxml) are imported inside the functions that
+# use them to keep worker startup fast.
+
+BASE_URL = settings.POLONUS_BASE_URL
+ROUTES_PAGE_PATH = "/diagrams/display/show/4385782a-5573-11e6-80f2-005056893b9e"
+
+CELL_TOKEN = re.compile(r"\w+")
+
+_http_client: Optional[Any] = None
+
+
+async def open_http_client() -> None:
+    global _http_client
+    import httpx  # type: ignore
+
+    _http_client = httpx.AsyncClient()
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@asynccontextmanager
+async def http_client() -> AsyncIterator[Any]:
+    if _http_client is not None:
+        yield _http_client
+        return
+
+    import httpx  # type: ignore
 
-async def fetch_routes_page(url: str, date: str) -> str:
     async with httpx.AsyncClient() as client:
-        response = await client.get(f"{url}?date={date}")
+        yield client
+
+
+async def fetch_routes_page(url: str, date: str) -> str:
+    with UPSTREAM_REQUEST_DURATION.time("routes_page"), phase("upstream"):
+        async with http_client() as client:
+            response = await client.get(f"{url}?date={date}")
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Failed to fetch routes page")
@@ -18,28 +72,97 @@ async def fetch_routes_page(url: str, date: str) -> str:
     return response.text
 
 
-def parse_routes_page(routes_page: str, route_id: str) -> str:
+class RouteIndex(NamedTuple):
+    routes: List[Dict[str, str]]
+    links: Dict[str, str]
+
+
+def build_route_index(routes_page: str) -> RouteIndex:
+    from bs4 import BeautifulSoup  # type: ignore
+
     soup = BeautifulSoup(routes_page, "lxml")
 
     table = soup.find("table")
 
+    routes = []
+    links: Dict[str, str] = {}
     for row in table.find_all("tr"):
         cells = row.find_all("td")
-        if not cells:
+        if len(cells) < 2:
             continue
 
-        for cell in cells:
-            if re.search(rf"\b{route_id}\b", cell.get_text(strip=True)):
-                link = cells[1].find("a")
-                if link and link.get("href"):
-                    return link["href"]
+        link = cells[1].find("a")
+        if not link or not link.get("href"):
+            continue
+
+        texts = [cell.get_text(strip=True) for cell in cells]
+        # A route id used to be found with \b{route_id}\b in any cell, so it
+        # matches every run of word characters it equals, first row first.
+        for text in texts:
+            for token in CELL_TOKEN.findall(text):
+                if token.isdigit():
+                    links.setdefault(token, link["href"])
+
+        number = re.search(r"\d+", texts[1])
+        routes.append(
+            {
+                "number": number.group(0) if number else "",
+                "departure_time": texts[0],
+                "relation": texts[2] if len(texts) > 2 else "",
+                "link": link["href"],
+            }
+        )
 
-    raise HTTPException(status_code=404, detail=f"Route ID {route_id} not found")
+    return RouteIndex(routes, links)
+
+
+def find_route(route_index: RouteIndex, route_id: str) -> str:
+    link = route_index.links.get(route_id)
+    if link is None:
+        raise HTTPException(status_code=404, detail=f"Route ID {route_id} not found")
+    return link
+
+
+def parse_routes_page(routes_page: str, route_id: str) -> str:
+    return find_route(build_route_index(routes_page), route_id)
+
+
+_route_indexes: TTLCache = TTLCache(
+    maxsize=settings.POLONUS_ROUTE_INDEX_SIZE, ttl=settings.POLONUS_ROUTE_INDEX_TTL
+)
+_route_index_fetches: Dict[str, "asyncio.Future[RouteIndex]"] = {}
+
+
+async def load_route_index(date: str) -> RouteIndex:
+    routes_page = await fetch_routes_page(f"{BASE_URL}{ROUTES_PAGE_PATH}", date)
+
+    with phase("parse"):
+        route_index = build_route_index(routes_page)
+
+    _route_indexes[date] = route_index
+    return route_index
+
+
+# Concurrent requests for a date that is not cached share one fetch and parse.
+async def get_route_index(date: str) -> RouteIndex:
+    route_index = _route_indexes.get(date)
+    if route_index is not None:
+        return route_index
+
+    fetch = _route_index_fetches.get(date)
+    if fetch is None:
+        fetch = asyncio.ensure_future(load_route_index(date))
+        _route_index_fetches[date] = fetch
+        fetch.add_done_callback(lambda _: _route_index_fetches.pop(date, None))
+
+    # One waiter being cancelled must not cancel the fetch for the others.
+    return await asyncio.shield(fetch)
 
 
 async def fetch_passenger_file(passenger_file_url: str) -> str:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(passenger_file_url)
+    with UPSTREAM_REQUEST_DURATION.time("passenger_file"), phase("upstream"):
+        async with http_client() as client:
+            response = await client.get(passenger_file_url)
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Failed to fetch passenger file")
@@ -124,16 +247,70 @@ def parse_passenger_data(text: str) -> List[Dict[str, Any]]:
     return passengers
 
 
+async def get_route_passengers(
+    date: str, route: str, link: str
+) -> List[Dict[str, Any]]:
+    passenger_file_text = await fetch_passenger_file(f"{BASE_URL}{link}")
+
+    with phase("parse"):
+        return parse_passenger_data(passenger_file_text)
+
+
 async def get_passenger_data(date: str, route_id: str) -> List[Dict[str, Any]]:
-    routes_page = await fetch_routes_page(
-        f"{BASE_URL}/diagrams/display/show/4385782a-5573-11e6-80f2-005056893b9e", date
+    route_index = await get_route_index(date)
+    return await get_route_passengers(date, route_id, find_route(route_index, route_id))
+
+
+FetchPassengers = Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]]
+
+
+# Passenger lists for one route, or every route, on each of the given dates.
+# At most `concurrency` upstream requests are in flight at once. A date or
+# route that cannot be fetched is returned in the second list, as (date, None)
+# when the whole date is missing.
+async def get_manifests(
+    dates: Sequence[str],
+    route_id: Optional[str],
+    concurrency: int,
+    max_routes: int,
+    fetch_passengers: FetchPassengers = get_route_passengers,
+) -> Tuple[List[Manifest], List[Tuple[str, Optional[str]]]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(fetch: Callable[..., Awaitable[Any]], *args: str) -> Any:
+        async with semaphore:
+            return await fetch(*args)
+
+    route_indexes = await asyncio.gather(
+        *(limited(get_route_index, date) for date in dates), return_exceptions=True
     )
 
-    passenger_file_url = parse_routes_page(routes_page, route_id)
-    passenger_file_url = f"{BASE_URL}{passenger_file_url}"
+    routes = []
+    failed: List[Tuple[str, Optional[str]]] = []
+    for date, route_index in zip(dates, route_indexes):
+        if isinstance(route_index, Exception):
+            logger.warning(f"Could not fetch routes on {date}: {route_index!r}")
+            failed.append((date, route_id))
+        elif route_id is None:
+            routes.extend(
+                (date, route["number"], route["link"]) for route in route_index.routes
+            )
+        elif route_id in route_index.links:
+            routes.append((date, route_id, route_index.links[route_id]))
 
-    passenger_file_text = await fetch_passenger_file(passenger_file_url)
+    if len(routes) > max_routes:
+        raise StatsTooLargeException(max_routes)
 
-    passengers = parse_passenger_data(passenger_file_text)
+    passenger_lists = await asyncio.gather(
+        *(limited(fetch_passengers, *route) for route in routes),
+        return_exceptions=True,
+    )
 
-    return passengers
+    manifests = []
+    for (date, number, _), passengers in zip(routes, passenger_lists):
+        if isinstance(passengers, Exception):
+            logger.warning(f"Could not fetch route {number} on {date}: {passengers!r}")
+            failed.append((date, number))
+        else:
+            manifests.append((date, number, passengers))
+    return manifests, failed
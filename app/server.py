@@ -0,0 +1,140 @@
+import argparse
+import math
+import os
+import random
+from pathlib import Path
+from typing import List, Optional
+
+import uvicorn  # type: ignore
+from uvicorn.supervisors import Multiprocess  # type: ignore
+
+from app.constants import settings
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+# CPUs the container may use under its CFS quota, if it has one (cgroup v2,
+# then v1). Affinity alone reports every CPU of the host.
+def cpu_quota(root: Path = CGROUP_ROOT) -> Optional[float]:
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        quota = (root / "cpu" / "cpu.cfs_quota_us").read_text()
+        period = (root / "cpu" / "cpu.cfs_period_us").read_text()
+    except OSError:
+        return None
+    if int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def default_workers(root: Path = CGROUP_ROOT) -> int:
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    quota = cpu_quota(root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, min(cpus, settings.SERVER_MAX_WORKERS))
+
+
+# run() executes in each worker process, so every worker draws its own
+# request limit and they are not all recycled at the same moment.
+class Server(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets=None) -> None:
+        if self.config.limit_max_requests and self.max_requests_jitter:
+            self.config.limit_max_requests += random.randint(
+                0, self.max_requests_jitter
+            )
+        super().run(sockets=sockets)
+
+
+def event_loop() -> str:
+    try:
+        import uvloop  # type: ignore # noqa: F401
+    except ImportError:
+        return "asyncio"
+    return "uvloop"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the API with uvicorn.")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="Number of worker processes, 0 to use one per available CPU.",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS,
+        help="Recycle a worker after this many requests, 0 to disable.",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS_JITTER,
+        help="Add up to this many requests to each worker's limit.",
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.SERVER_GRACEFUL_TIMEOUT
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="Single process that restarts on code changes, for development.",
+    )
+    return parser.parse_args(argv)
+
+
+def uvicorn_options(args: argparse.Namespace) -> dict:
+    options = {
+        "host": args.host,
+        "port": args.port,
+        "loop": event_loop(),
+        "http": "httptools",
+        "proxy_headers": True,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+    }
+    if args.reload:
+        return {**options, "reload": True}
+
+    return {
+        **options,
+        "workers": args.workers or default_workers(),
+        "limit_max_requests": args.max_requests or None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    options = uvicorn_options(args)
+    if args.reload:
+        uvicorn.run("app.main:app", **options)
+        return
+
+    config = uvicorn.Config("app.main:app", **options)
+    server = Server(config, args.max_requests_jitter)
+    if config.workers > 1:
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,50 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends  # type: ignore
+from fastapi import APIRouter, Body, Depends, Header, Response, status  # type: ignore
+from fastapi.responses import StreamingResponse  # type: ignore
+from redis import Redis  # type: ignore
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session  # type: ignore
 
+from app.auth.schemas import TokenUser
 from app.auth.utils import admin_only, get_current_user
-from app.db import get_db
+from app.constants import settings
+from app.db import get_db, get_read_db, get_redis
+from app.jobs import tasks
+from app.jobs.queue import JobQueue
+from app.jobs.schemas import JobAccepted
 from app.models.users import User
-from app.users.schemas import UserCreate, UserResponse, UserUpdate
-from app.users.utils import CRUDUser
+from app.users.schemas import UserCreate, UserCreateResponse, UserResponse, UserUpdate
+from app.users.utils import (
+    CRUDUser,
+    bump_users_version,
+    close_session_after,
+    etag_matches,
+    generate_random_password,
+    not_modified,
+    set_etag,
+    user_etag,
+    users_list_etag,
+    users_to_csv,
+    users_to_ndjson,
+)
+from app.utils import logger
 
 router = APIRouter()
 crud_user = CRUDUser(User)
 
 
 @router.get("/current", response_model=UserResponse)
-def get_current_user_info(current_user_info: User = Depends(get_current_user)):
+def get_current_user_info(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user_info: TokenUser = Depends(get_current_user),
+):
+    etag = user_etag(current_user_info)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
     return UserResponse(
         id=current_user_info.id,
         email=current_user_info.email,
@@ -22,21 +52,62 @@ def get_current_user_info(current_user_info: User = Depends(get_current_user)):
     )
 
 
+# Read from the primary: the ETag comes from a version bumped on every write,
+# and a lagging replica would cache an old list under the new ETag.
 @router.get("/list", response_model=List[UserResponse])
 def get_all_users(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(admin_only),
 ):
+    etag = users_list_etag(redis)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
     return crud_user.get_all_users(db)
 
 
+@router.get("/export")
+def export_users(
+    format: Literal["csv", "ndjson"] = "csv",
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(admin_only),
+):
+    users = crud_user.stream_users(db)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            close_session_after(users_to_ndjson(users), db),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="users.ndjson"'},
+        )
+
+    return StreamingResponse(
+        close_session_after(users_to_csv(users), db),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="users.csv"'},
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(admin_only),
 ):
-    return crud_user.get_user_by_id(db, user_id)
+    user = crud_user.get_user_by_id(db, user_id)
+
+    etag = user_etag(user)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    return user
 
 
 @router.put("/{user_id}", response_model=UserResponse)
@@ -44,26 +115,64 @@ def update_user(
     user_id: int,
     updates: UserUpdate,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(admin_only),
 ):
     user = crud_user.update_user(db, user_id, updates.model_dump(exclude_unset=True))
+    bump_users_version(redis)
     return user
 
 
-@router.post("/", response_model=UserResponse)
+@router.post("/", response_model=UserCreateResponse)
 async def create_user(
     request: UserCreate,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+    current_user: User = Depends(admin_only),
+):
+    password = generate_random_password()
+    user = await crud_user.create_user(request, db, password)
+    # The user is already committed, so a Redis outage must not turn this into
+    # a 500; the flag tells the admin to reset the password by hand.
+    email_queued = False
+    try:
+        JobQueue(redis).enqueue(
+            tasks.send_credentials_email, email=user.email, password=password
+        )
+        email_queued = True
+    except RedisError as exc:
+        logger.error(f"Could not queue credentials for {user.email}: {exc!r}")
+    bump_users_version(redis)
+    return UserCreateResponse(
+        **UserResponse.model_validate(user).model_dump(), email_queued=email_queued
+    )
+
+
+@router.post(
+    "/import", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED
+)
+def import_users(
+    response: Response,
+    users: List[UserCreate] = Body(
+        ..., min_length=1, max_length=settings.JOBS_IMPORT_MAX_USERS
+    ),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(admin_only),
 ):
-    return await crud_user.create_user(request, db)
+    job_id = JobQueue(redis).enqueue(
+        tasks.import_users, users=[user.model_dump() for user in users]
+    )
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return JobAccepted(job_id=job_id, status="queued")
 
 
 @router.delete("/{user_id}")
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(admin_only),
 ):
     crud_user.delete_user(db, user_id)
+    bump_users_version(redis)
     return {"message": f"User with ID {user_id} has been deleted."}
@@ -49,3 +49,7 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserCreateResponse(UserResponse):
+    email_queued: bool
@@ -1,7 +1,15 @@
+import csv
+import io
 import secrets
 import string
-from typing import Type
+import time
+from typing import Iterable, Iterator, Optional, Type
 
+from fastapi import Response, status  # type: ignore
+from redis import Redis  # type: ignore
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select, update  # type: ignore
+from sqlalchemy.dialects.postgresql import insert  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
 from app.exceptions.user_exceptions import (
@@ -10,7 +18,15 @@ from app.exceptions.user_exceptions import (
 )
 from app.models.users import User
 from app.users.schemas import UserCreate, UserResponse
+from app.utils import logger
 from app.utils.auth import get_password_hash
+from app.utils.profiling import timed_phase
+
+EXPORT_FIELDS = list(UserResponse.model_fields)
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+USERS_VERSION_KEY = "users:version"
 
 
 def generate_random_password(length: int = 12) -> str:
@@ -22,47 +38,178 @@ class CRUDUser:
     def __init__(self, model: Type[User]):
         self.model = model
 
+    @timed_phase("db")
     def get_all_users(self, db: Session) -> list[Type[User]]:
         return db.query(self.model).all()
 
+    def stream_users(
+        self, db: Session, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[UserResponse]:
+        columns = [getattr(self.model, field) for field in EXPORT_FIELDS]
+        rows = db.execute(
+            select(*columns)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            for row in rows:
+                yield UserResponse.model_validate(row)
+        finally:
+            rows.close()
+
+    @timed_phase("db")
     def get_user_by_id(self, db: Session, user_id: int) -> Type[User]:
         user = db.query(self.model).filter(self.model.id == user_id).first()
         if not user:
             raise UserNotFoundException(user_id)
         return user
 
-    async def create_user(self, request: UserCreate, db: Session) -> UserResponse:
-        existing_user = (
-            db.query(self.model).filter(self.model.email == request.email).first()
-        )
-        if existing_user:
-            raise UserAlreadyExistsException(request.email.__str__())
-
-        password = generate_random_password()
-        hashed_password = get_password_hash(password)
+    @timed_phase("db")
+    async def create_user(
+        self, request: UserCreate, db: Session, password: Optional[str] = None
+    ) -> UserResponse:
+        hashed_password = get_password_hash(password or generate_random_password())
 
-        new_user = self.model(
-            email=request.email,
-            hashed_password=hashed_password,
-            role=request.role,
+        new_user = db.scalar(
+            insert(self.model)
+            .values(
+                email=request.email,
+                hashed_password=hashed_password,
+                role=request.role,
+            )
+            .on_conflict_do_nothing(index_elements=[self.model.email])
+            .returning(self.model)
         )
+        if new_user is None:
+            db.rollback()
+            raise UserAlreadyExistsException(request.email.__str__())
 
-        db.add(new_user)
+        response = UserResponse.model_validate(new_user)
         db.commit()
-        db.refresh(new_user)
 
-        return UserResponse.model_validate(new_user)
+        return response
 
+    @timed_phase("db")
     def update_user(self, db: Session, user_id: int, updates: dict) -> UserResponse:
-        user = self.get_user_by_id(db, user_id)
-        for field, value in updates.items():
-            if hasattr(user, field):
-                setattr(user, field, value)
+        values = {
+            field: value
+            for field, value in updates.items()
+            if hasattr(self.model, field)
+        }
+        user = db.scalar(
+            update(self.model)
+            .where(self.model.id == user_id)
+            .values(**values, version=self.model.version + 1)
+            .returning(self.model)
+        )
+        if user is None:
+            db.rollback()
+            raise UserNotFoundException(user_id)
+
+        response = UserResponse.model_validate(user)
         db.commit()
-        db.refresh(user)
-        return UserResponse.model_validate(user)
+        return response
 
+    @timed_phase("db")
     def delete_user(self, db: Session, user_id: int):
-        user = self.get_user_by_id(db, user_id)
-        db.delete(user)
+        deleted_id = db.scalar(
+            delete(self.model).where(self.model.id == user_id).returning(self.model.id)
+        )
+        if deleted_id is None:
+            db.rollback()
+            raise UserNotFoundException(user_id)
+
         db.commit()
+
+
+def users_to_csv(users: Iterable[UserResponse]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    for user in users:
+        writer.writerow(getattr(user, field) for field in EXPORT_FIELDS)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def users_to_ndjson(users: Iterable[UserResponse]) -> Iterator[str]:
+    chunk = []
+    size = 0
+
+    for user in users:
+        line = user.model_dump_json(include=set(EXPORT_FIELDS)) + "\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+
+    yield "".join(chunk)
+
+
+def close_session_after(chunks: Iterable[str], db: Session) -> Iterator[str]:
+    # Dependencies with yield are torn down before a StreamingResponse body is
+    # sent, so the export reuses the session and releases it once drained.
+    try:
+        yield from chunks
+    finally:
+        db.close()
+
+
+def user_etag(user: User) -> str:
+    return f'W/"user-{user.id}-{user.version}"'
+
+
+def users_list_etag(redis: Redis) -> str:
+    # Seeding with a timestamp keeps old ETags from matching after a Redis flush.
+    pipe = redis.pipeline()
+    pipe.set(USERS_VERSION_KEY, time.time_ns(), nx=True)
+    pipe.get(USERS_VERSION_KEY)
+    _, version = pipe.execute()
+    return f'W/"users-{version}"'
+
+
+# Called after the change is committed, so a Redis outage is logged rather
+# than failing a request whose write already succeeded.
+def bump_users_version(redis: Redis) -> None:
+    pipe = redis.pipeline()
+    pipe.set(USERS_VERSION_KEY, time.time_ns(), nx=True)
+    pipe.incr(USERS_VERSION_KEY)
+    try:
+        pipe.execute()
+    except RedisError as exc:
+        logger.error(
+            f"Could not bump the user list version, /user/list may answer 304 "
+            f"with a stale list until the next change: {exc!r}"
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
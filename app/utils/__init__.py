@@ -1,3 +1,5 @@
+import atexit
+import copy
 import os
 import sys
 import time
@@ -5,17 +7,62 @@ from pathlib import Path
 
 from loguru import logger  # type: ignore
 
+from app.constants import settings
+from app.utils.log_sinks import QueuedSink
+from app.utils.metrics import LOG_RECORDS_DROPPED
+
 os.environ["TZ"] = "Europe/Kyiv"
 time.tzset()
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 
 logger.remove()
-logger.add(sys.stderr, level="INFO")
-logger.add(
+
+# Rotation and retention stay with loguru's file sink, but it lives on a
+# separate logger that only the writer thread touches.
+file_logger = copy.deepcopy(logger)
+file_logger.add(
     LOGS_DIR / "app.log",
     rotation="10 MB",
     retention="7 days",
     level="DEBUG",
+    format="{message}",
+)
+
+
+def write_to_file(message: str) -> None:
+    file_logger.opt(raw=True).debug(message)
+
+
+def record_dropped(sink: str) -> None:
+    LOG_RECORDS_DROPPED.inc(sink)
+
+
+logger.add(
+    QueuedSink(
+        sys.stderr.write,
+        "stderr",
+        maxsize=settings.LOG_QUEUE_SIZE,
+        policy=settings.LOG_QUEUE_POLICY,
+        on_drop=record_dropped,
+    ),
+    level="INFO",
+    colorize=sys.stderr.isatty() and not settings.LOG_JSON,
+    serialize=settings.LOG_JSON,
+)
+logger.add(
+    QueuedSink(
+        write_to_file,
+        "file",
+        maxsize=settings.LOG_QUEUE_SIZE,
+        policy=settings.LOG_QUEUE_POLICY,
+        on_drop=record_dropped,
+    ),
+    level="DEBUG",
     format="{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}",
+    serialize=settings.LOG_JSON,
 )
+
+# Removing the handlers stops the writer threads after they drain their queues.
+atexit.register(logger.remove)
+atexit.register(file_logger.remove)
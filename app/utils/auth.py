@@ -1,51 +1,194 @@
+import hashlib
+import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi.security import HTTPAuthorizationCredentials  # type: ignore
-from jose import jwt  # type: ignore
-from passlib.context import CryptContext  # type: ignore
 from redis import Redis  # type: ignore
+from redis.commands.core import Script
 
 from app.constants import settings
+from app.exceptions.token_exceptions import (
+    InvalidTokenException,
+    RefreshTokenReusedException,
+)
+from app.utils.jwt_keys import get_key_set
 
 SECRET_KEY = settings.JWT_SECRET_KEY.get_secret_value()
 ALGORITHM = settings.JWT_ALGORITHM
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def password_scheme_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {}
+    if "bcrypt" in settings.PASSWORD_SCHEMES:
+        options.update(
+            bcrypt__rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+        )
+    if "argon2" in settings.PASSWORD_SCHEMES:
+        options.update(
+            argon2__type="ID",
+            argon2__time_cost=settings.ARGON2_TIME_COST,
+            argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+            argon2__parallelism=settings.ARGON2_PARALLELISM,
+        )
+    return options
+
+
+# passlib and jose are imported on first use to keep worker startup fast.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext  # type: ignore
+
+    return CryptContext(
+        schemes=settings.PASSWORD_SCHEMES,
+        deprecated="auto",
+        **password_scheme_options(),
+    )
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt  # type: ignore
+
     to_encode = data.copy()
-    expire = (
-        datetime.now(timezone.utc) + expires_delta
-        if expires_delta
-        else datetime.now(timezone.utc) + timedelta(minutes=15)
+    expire = datetime.now(timezone.utc) + (
+        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+    key_set = get_key_set()
+    if key_set:
+        kid, key = key_set.signing_key()
+        return jwt.encode(
+            to_encode, key, algorithm=key_set.algorithm, headers={"kid": kid}
+        )
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def blacklist_token(token: str, expire_time: datetime, redis: Redis):
-    ttl = int((expire_time - datetime.now(timezone.utc)).total_seconds())
-    if ttl > 0:
-        redis.setex(f"blacklist:{token}", ttl, "blacklisted")
-        return True
 
-    return False
+def create_user_access_token(user: Any) -> str:
+    # Everything get_current_user needs travels in the token, so verifying it
+    # touches neither the database nor Redis.
+    return create_access_token(
+        {"sub": user.email, "uid": user.id, "role": user.role, "ver": user.version}
+    )
 
 
-def is_token_blacklisted(token: str, redis: Redis):
-    return redis.exists(f"blacklist:{token}")
+def refresh_token_key(family: str) -> str:
+    return f"refresh_token:{family}"
+
+
+def hash_refresh_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def split_refresh_token(token: str) -> Tuple[str, str]:
+    family, _, secret = token.partition(".")
+    return family, secret
+
+
+def create_refresh_token(redis: Redis, user_id: int) -> str:
+    family = secrets.token_urlsafe(16)
+    secret = secrets.token_urlsafe(32)
+    key = refresh_token_key(family)
+
+    pipeline = redis.pipeline()
+    pipeline.hset(key, mapping={"uid": user_id, "secret": hash_refresh_secret(secret)})
+    pipeline.expire(key, timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    pipeline.execute()
+    return f"{family}.{secret}"
+
+
+# Swaps the stored secret hash for a new one if the presented secret is the
+# current one. A rotated-out secret coming back means the token was copied,
+# so the whole family is revoked. Returns {1, uid}, {0} when the family is
+# unknown or expired, and {-1} on reuse.
+ROTATE_REFRESH_TOKEN_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'secret')
+if not current then
+    return {0}
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return {-1}
+end
+redis.call('HSET', KEYS[1], 'secret', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {1, redis.call('HGET', KEYS[1], 'uid')}
+"""
+rotate_refresh_token_script = Script(None, ROTATE_REFRESH_TOKEN_SCRIPT.encode())
+
+
+def rotate_refresh_token(redis: Redis, token: str) -> Tuple[int, str]:
+    family, secret = split_refresh_token(token)
+    if not family or not secret:
+        raise InvalidTokenException()
+
+    new_secret = secrets.token_urlsafe(32)
+    result = rotate_refresh_token_script(
+        keys=[refresh_token_key(family)],
+        args=[
+            hash_refresh_secret(secret),
+            hash_refresh_secret(new_secret),
+            int(timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()),
+        ],
+        client=redis,
+    )
+    if result[0] == -1:
+        raise RefreshTokenReusedException()
+    if result[0] == 0:
+        raise InvalidTokenException()
+    return int(result[1]), f"{family}.{new_secret}"
+
+
+# Deletes the family only for its current secret, so knowing a family id
+# is not enough to end someone else's session.
+REVOKE_REFRESH_TOKEN_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'secret') ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[1])
+"""
+revoke_refresh_token_script = Script(None, REVOKE_REFRESH_TOKEN_SCRIPT.encode())
+
+
+def revoke_refresh_token(redis: Redis, token: str) -> bool:
+    family, secret = split_refresh_token(token)
+    if not family or not secret:
+        return False
+
+    return bool(
+        revoke_refresh_token_script(
+            keys=[refresh_token_key(family)],
+            args=[hash_refresh_secret(secret)],
+            client=redis,
+        )
+    )
 
 
 def get_payload(token: HTTPAuthorizationCredentials):
+    from jose import jwt  # type: ignore
+
+    key_set = get_key_set()
+    if key_set:
+        kid = jwt.get_unverified_header(token.credentials).get("kid")
+        return jwt.decode(
+            token.credentials,
+            key_set.verification_key(kid),
+            algorithms=[key_set.algorithm],
+        )
     return jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
@@ -0,0 +1,188 @@
+import argparse
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from app.constants import settings
+
+ASYMMETRIC_PREFIXES = ("ES", "RS", "PS")
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm.startswith(ASYMMETRIC_PREFIXES)
+
+
+# Signing keys loaded from <JWT_KEYS_DIR>/<kid>.pem. Every key in the
+# directory verifies tokens and is published in the JWKS; only the active one,
+# named explicitly, signs. Keys are read once per process, so rotation takes
+# two deploys: first add the new key file everywhere, then make it active once
+# every worker has restarted with it. Delete the old file after the tokens it
+# signed have expired.
+class KeySet:
+    def __init__(self, directory: Path, algorithm: str, active_kid: str):
+        from jose import jwk  # type: ignore
+
+        self.algorithm = algorithm
+        self.private_keys: Dict[str, Any] = {}
+        self.public_keys: Dict[str, Any] = {}
+        for path in sorted(directory.glob("*.pem")):
+            private_key = jwk.construct(path.read_text(), algorithm)
+            self.private_keys[path.stem] = private_key
+            self.public_keys[path.stem] = private_key.public_key()
+
+        if not self.private_keys:
+            raise RuntimeError(f"No JWT signing keys found in {directory}")
+        self.active_kid = active_kid
+        if self.active_kid not in self.private_keys:
+            raise RuntimeError(f"Active JWT key {self.active_kid!r} not found")
+
+    def signing_key(self) -> Tuple[str, Any]:
+        return self.active_kid, self.private_keys[self.active_kid]
+
+    def verification_key(self, kid: Optional[str]) -> Any:
+        from jose import JWTError  # type: ignore
+
+        key = self.public_keys.get(kid or "")
+        if key is None:
+            raise JWTError(f"Unknown key id {kid!r}")
+        return key
+
+    def jwks(self) -> Dict[str, Any]:
+        return {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig", "alg": self.algorithm}
+                for kid, key in self.public_keys.items()
+            ]
+        }
+
+
+@lru_cache(maxsize=None)
+def get_key_set() -> Optional[KeySet]:
+    if not is_asymmetric(settings.JWT_ALGORITHM):
+        return None
+    if not settings.JWT_KEYS_DIR:
+        raise RuntimeError(f"JWT_KEYS_DIR is required for {settings.JWT_ALGORITHM}")
+    if not settings.JWT_ACTIVE_KID:
+        raise RuntimeError(f"JWT_ACTIVE_KID is required for {settings.JWT_ALGORITHM}")
+    return KeySet(
+        Path(settings.JWT_KEYS_DIR), settings.JWT_ALGORITHM, settings.JWT_ACTIVE_KID
+    )
+
+
+def jwks() -> Dict[str, Any]:
+    key_set = get_key_set()
+    return key_set.jwks() if key_set else {"keys": []}
+
+
+# Verifies our access tokens in another service without calling back. Public
+# keys from the JWKS URL are kept in memory for the max-age the endpoint
+# sends. A token with an unknown kid (a freshly rotated key) triggers a
+# refetch, at most once per min_refresh_interval, and keys already loaded keep
+# working if a refetch fails.
+class RemoteKeySet:
+    def __init__(
+        self,
+        url: str,
+        algorithms: Sequence[str] = ("ES256",),
+        default_max_age: int = 300,
+        min_refresh_interval: float = 30.0,
+        fetch: Optional[Callable[[str], Any]] = None,
+    ):
+        self.url = url
+        self.algorithms = list(algorithms)
+        self.default_max_age = default_max_age
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch or self._http_get
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _http_get(url: str) -> Any:
+        import httpx  # type: ignore
+
+        return httpx.get(url, timeout=5.0)
+
+    def _refresh(self) -> None:
+        from jose import jwk  # type: ignore
+
+        self._fetched_at = time.monotonic()
+        response = self._fetch(self.url)
+        response.raise_for_status()
+
+        keys = {}
+        for key in response.json()["keys"]:
+            if key.get("alg") in self.algorithms:
+                keys[key["kid"]] = jwk.construct(key, key["alg"])
+        self._keys = keys
+
+        match = MAX_AGE_PATTERN.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else self.default_max_age
+        self._expires_at = self._fetched_at + max_age
+
+    def _throttled(self, now: float) -> bool:
+        if self._fetched_at is None:
+            return False
+        return now - self._fetched_at < self.min_refresh_interval
+
+    def get_key(self, kid: Optional[str]) -> Any:
+        from jose import JWTError  # type: ignore
+
+        key = self._keys.get(kid or "")
+        if key is None or time.monotonic() >= self._expires_at:
+            with self._lock:
+                key = self._keys.get(kid or "")
+                now = time.monotonic()
+                stale = key is None or now >= self._expires_at
+                if stale and not self._throttled(now):
+                    try:
+                        self._refresh()
+                    except Exception:
+                        if not self._keys:
+                            raise
+                    key = self._keys.get(kid or "")
+
+        if key is None:
+            raise JWTError(f"Unknown key id {kid!r}")
+        return key
+
+    def decode(self, token: str, **options: Any) -> Dict[str, Any]:
+        from jose import jwt  # type: ignore
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        return jwt.decode(
+            token, self.get_key(kid), algorithms=self.algorithms, **options
+        )
+
+
+def generate_key(directory: Path, kid: Optional[str] = None) -> Path:
+    from cryptography.hazmat.primitives import serialization  # type: ignore
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    kid = kid or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{kid}.pem"
+    path.write_bytes(pem)
+    path.chmod(0o600)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate an ES256 signing key.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--kid", help="Key id, defaults to the current UTC time.")
+    args = parser.parse_args()
+    print(generate_key(args.directory, args.kid))
@@ -0,0 +1,68 @@
+import queue
+import threading
+from typing import Callable, Literal, Optional
+
+QueuePolicy = Literal["drop", "block"]
+
+
+class QueuedSink:
+    # Loguru calls write() on the request path; the actual I/O (including file
+    # rotation) happens on a dedicated writer thread behind a bounded queue.
+    def __init__(
+        self,
+        write: Callable[[str], object],
+        name: str,
+        maxsize: int = 10000,
+        policy: QueuePolicy = "drop",
+        on_drop: Optional[Callable[[str], None]] = None,
+        batch_size: int = 512,
+    ):
+        self.name = name
+        self.policy = policy
+        self.dropped = 0
+        self._write = write
+        self._on_drop = on_drop
+        self._batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-writer-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        if self.policy == "block":
+            self._queue.put(message)
+            return
+
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            if self._on_drop is not None:
+                self._on_drop(self.name)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Drain whatever is already queued so bursts cost one write call.
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in batch:
+                running = False
+                batch = batch[: batch.index(None)]
+            if not batch:
+                continue
+
+            try:
+                self._write("".join(batch))
+            except Exception:  # nosec B110 - a failing sink must not kill the writer
+                pass
@@ -0,0 +1,251 @@
+import abc
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple, TypeVar
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label_value(str(value))}"'
+        for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abc.abstractmethod
+    def render(self) -> List[str]:
+        pass
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count.
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._values.items()
+            ]
+
+        lines = self.header()
+        bucket_names = self.label_names + ("le",)
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(
+                    bucket_names, labels + (format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+MetricType = TypeVar("MetricType", bound=Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: MetricType) -> MetricType:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "Total HTTP requests by route template and status.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template.",
+        ("method", "route"),
+    )
+)
+HTTP_REQUESTS_IN_PROGRESS = registry.register(
+    Gauge(
+        "http_requests_in_progress",
+        "HTTP requests currently being served by route template.",
+        ("method", "route"),
+    )
+)
+UPSTREAM_REQUEST_DURATION = registry.register(
+    Histogram(
+        "upstream_request_duration_seconds",
+        "Latency of requests to upstream services.",
+        ("target",),
+    )
+)
+DB_QUERY_DURATION = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Database statement latency by statement type.",
+        ("operation",),
+    )
+)
+REDIS_COMMAND_DURATION = registry.register(
+    Histogram(
+        "redis_command_duration_seconds",
+        "Redis command latency by command.",
+        ("command",),
+    )
+)
+LOG_RECORDS_DROPPED = registry.register(
+    Counter(
+        "log_records_dropped_total",
+        "Log records dropped because the sink queue was full.",
+        ("sink",),
+    )
+)
+LOGIN_ATTEMPTS_REJECTED = registry.register(
+    Counter(
+        "login_attempts_rejected_total",
+        "Login attempts rejected by the rate limiter, by the limit that was hit.",
+        ("limit",),
+    )
+)
+POLONUS_LIVE_POLLERS = registry.register(
+    Gauge(
+        "polonus_live_pollers",
+        "Shared pollers running for subscribed (route_id, date) pairs.",
+    )
+)
+POLONUS_LIVE_SUBSCRIBERS = registry.register(
+    Gauge(
+        "polonus_live_subscribers",
+        "Open subscriptions to live manifest updates.",
+    )
+)
+JOBS_COMPLETED = registry.register(
+    Counter(
+        "jobs_completed_total",
+        "Background job attempts by job and outcome.",
+        ("job", "status"),
+    )
+)
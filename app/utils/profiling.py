@@ -0,0 +1,136 @@
+import asyncio
+import cProfile
+import functools
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PHASES = ("auth", "db", "redis", "upstream", "parse", "serialize")
+
+
+class RequestProfile:
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.profiler = cProfile.Profile()
+        self.thread_profilers: List[cProfile.Profile] = []
+        self.owner_thread = threading.get_ident()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def profile_thread(self) -> Iterator[None]:
+        # cProfile only sees the thread it was enabled in, so phases that run
+        # in the threadpool (sync endpoints and dependencies) get their own.
+        depth = getattr(self._local, "depth", 0)
+        if threading.get_ident() == self.owner_thread or depth:
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.thread_profilers.append(profiler)
+        self._local.depth = 1
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._local.depth = 0
+
+    def server_timing(self) -> str:
+        with self._lock:
+            phases = dict(self.phases)
+        metrics = [
+            f"{phase};dur={phases[phase] * 1000:.2f}"
+            for phase in PHASES
+            if phase in phases
+        ]
+        metrics.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def dump(self, output_dir: Path, keep: int) -> Path:
+        stats = pstats.Stats(self.profiler)
+        for profiler in self.thread_profilers:
+            stats.add(profiler)
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"{self.id}.prof"
+        stats.dump_stats(path)
+        prune_profiles(output_dir, keep)
+        return path
+
+
+# Keeps the newest `keep` profiles. Other workers prune the same directory,
+# so a file may already be gone.
+def prune_profiles(output_dir: Path, keep: int) -> None:
+    profiles = []
+    for path in output_dir.glob("*.prof"):
+        try:
+            profiles.append((path.stat().st_mtime_ns, path))
+        except FileNotFoundError:
+            pass
+    profiles.sort(reverse=True)
+    for _, path in profiles[keep:]:
+        path.unlink(missing_ok=True)
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        with profile.profile_thread():
+            yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+def timed_phase(name: str) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with phase(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
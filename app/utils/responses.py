@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse  # type: ignore
+from pydantic import BaseModel  # type: ignore
+from pydantic_core import to_json  # type: ignore
+
+from app.utils.profiling import phase
+
+
+class ModelResponse(ORJSONResponse):
+    # Returning a Response bypasses FastAPI's response_model validation, so
+    # models that are already validated are dumped once by pydantic-core.
+    def render(self, content: Any) -> bytes:
+        with phase("serialize"):
+            if isinstance(content, BaseModel):
+                return to_json(content)
+
+            return super().render(content)
@@ -0,0 +1,432 @@
+"""Drive the API endpoints at fixed concurrency levels and record latency.
+
+The app and the Polonus stub are served by uvicorn in a background thread of
+this process, against the PostgreSQL and Redis configured in .env. Users
+created by the run live in the @load.bench domain and are removed afterwards.
+bcrypt runs at the minimum cost unless BCRYPT_ROUNDS is set, so login and
+user creation measure the endpoints rather than the hash.
+
+Every scenario runs once per concurrency level for throughput and
+p50/p95/p99 latency, then once more under tracemalloc at the highest level
+for peak and retained memory. The traced pass includes the client side, so
+compare it between commits rather than reading it as the server's footprint.
+
+Usage:
+    python -m benchmarks.load.run [--concurrency 1 8 32] [--requests 200]
+        [--save benchmarks/load/baseline.json]
+        [--compare benchmarks/load/baseline.json] [--max-regression 0.15]
+"""
+
+import os
+
+STUB_PORT = 8099
+APP_PORT = 8098
+os.environ.setdefault("POLONUS_BASE_URL", f"http://127.0.0.1:{STUB_PORT}")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Measure the full fetch-and-parse path rather than Redis hits.
+os.environ.setdefault("POLONUS_CACHE_ENABLED", "false")
+# Concurrent logins for one user from one address would hit the login limits.
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import gc  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+from dataclasses import dataclass  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Any, Callable, Dict, List, Optional, Tuple  # noqa: E402
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.db import SessionLocal, get_redis_client  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+from app.utils.auth import (  # noqa: E402
+    create_refresh_token,
+    create_user_access_token,
+    get_password_hash,
+)
+from benchmarks.load import stub_polonus  # noqa: E402
+
+DOMAIN = "@load.bench"
+ADMIN_EMAIL = f"admin{DOMAIN}"
+MEMBER_EMAIL = f"member{DOMAIN}"
+PASSWORD = "load-bench-password"
+ROUTE_DATE = "2025-02-20"
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[dict, int], Request]
+    prepare: Optional[Callable[[dict, int], None]] = None
+    finish: Optional[Callable[[dict], None]] = None
+    expected_status: int = 200
+    share: float = 1.0
+
+
+def auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def delete_bench_users() -> None:
+    with SessionLocal() as db:
+        db.query(User).filter(User.email.like(f"%{DOMAIN}")).delete(
+            synchronize_session=False
+        )
+        db.commit()
+
+
+def seed_users() -> None:
+    delete_bench_users()
+    hashed_password = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        db.add_all(
+            [
+                User(email=ADMIN_EMAIL, hashed_password=hashed_password, role="admin"),
+                User(
+                    email=MEMBER_EMAIL,
+                    hashed_password=hashed_password,
+                    role="polonus_manager",
+                ),
+            ]
+        )
+        db.commit()
+
+
+def load_created_ids(state: dict) -> None:
+    with SessionLocal() as db:
+        state["created_ids"] = [
+            user_id
+            for (user_id,) in db.query(User.id)
+            .filter(User.email.like(f"created-%{DOMAIN}"))
+            .order_by(User.id)
+        ]
+
+
+def prepare_refresh_tokens(state: dict, count: int) -> None:
+    redis = get_redis_client()
+    state["refresh_tokens"] = [
+        create_refresh_token(redis, state["member_id"]) for _ in range(count)
+    ]
+
+
+def prepare_create(state: dict, count: int) -> None:
+    state["create_round"] = state.get("create_round", 0) + 1
+
+
+SCENARIOS = [
+    Scenario(
+        "login",
+        lambda state, i: (
+            "POST",
+            "/auth/login",
+            {"json": {"email": MEMBER_EMAIL, "password": PASSWORD}},
+        ),
+        share=0.25,
+    ),
+    Scenario(
+        "user_current",
+        lambda state, i: ("GET", "/user/current", {"headers": state["member_auth"]}),
+    ),
+    Scenario(
+        "user_list",
+        lambda state, i: ("GET", "/user/list", {"headers": state["admin_auth"]}),
+    ),
+    Scenario(
+        "user_get",
+        lambda state, i: (
+            "GET",
+            f"/user/{state['member_id']}",
+            {"headers": state["admin_auth"]},
+        ),
+    ),
+    Scenario(
+        "user_create",
+        lambda state, i: (
+            "POST",
+            "/user/",
+            {
+                "headers": state["admin_auth"],
+                "json": {
+                    "email": f"created-{state['create_round']}-{i}{DOMAIN}",
+                    "role": "dps_manager",
+                },
+            },
+        ),
+        prepare=prepare_create,
+        finish=load_created_ids,
+    ),
+    Scenario(
+        "user_update",
+        lambda state, i: (
+            "PUT",
+            f"/user/{state['created_ids'][i % len(state['created_ids'])]}",
+            {
+                "headers": state["admin_auth"],
+                "json": {"role": "polonus_manager" if i % 2 else "dps_manager"},
+            },
+        ),
+    ),
+    Scenario(
+        "user_delete",
+        lambda state, i: (
+            "DELETE",
+            f"/user/{state['created_ids'][i]}",
+            {"headers": state["admin_auth"]},
+        ),
+    ),
+    Scenario(
+        "refresh",
+        lambda state, i: (
+            "POST",
+            "/auth/refresh",
+            {"json": {"refresh_token": state["refresh_tokens"][i]}},
+        ),
+        prepare=prepare_refresh_tokens,
+    ),
+    Scenario(
+        "logout",
+        lambda state, i: (
+            "POST",
+            "/auth/logout",
+            {"json": {"refresh_token": state["refresh_tokens"][i]}},
+        ),
+        prepare=prepare_refresh_tokens,
+    ),
+    Scenario(
+        "polonus_get_passengers",
+        lambda state, i: (
+            "POST",
+            "/polonus/get-passengers",
+            {
+                "json": {
+                    "date": ROUTE_DATE,
+                    "route_id": state["route_ids"][i % len(state["route_ids"])],
+                }
+            },
+        ),
+    ),
+]
+
+
+class BackgroundServers:
+    def __init__(self, *configs: uvicorn.Config):
+        self.servers = [uvicorn.Server(config) for config in configs]
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        async def serve() -> None:
+            await asyncio.gather(*(server.serve() for server in self.servers))
+
+        asyncio.run(serve())
+
+    def __enter__(self) -> "BackgroundServers":
+        self.thread.start()
+        while not all(server.started for server in self.servers):
+            if not self.thread.is_alive():
+                raise RuntimeError("Servers failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        for server in self.servers:
+            server.should_exit = True
+        self.thread.join()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    state: dict,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors: List[str] = []
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        for index in next_index:
+            method, url, options = scenario.build(state, index)
+            started = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != scenario.expected_status:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    if errors:
+        print(f"    {len(errors)} unexpected responses, first: {errors[0]}")
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    state: dict,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    count = max(concurrency, int(requests * scenario.share))
+    if scenario.prepare:
+        scenario.prepare(state, count)
+    result = await drive(client, scenario, state, count, concurrency)
+    if scenario.finish:
+        scenario.finish(state)
+    return result
+
+
+async def run_all(args: argparse.Namespace) -> dict:
+    with SessionLocal() as db:
+        admin = db.query(User).filter_by(email=ADMIN_EMAIL).one()
+        member = db.query(User).filter_by(email=MEMBER_EMAIL).one()
+        state: Dict[str, Any] = {
+            "admin_auth": auth(create_user_access_token(admin)),
+            "member_auth": auth(create_user_access_token(member)),
+            "member_id": member.id,
+            "route_ids": stub_polonus.route_ids(),
+        }
+
+    results: Dict[str, Dict[str, float]] = {}
+    memory: Dict[str, Dict[str, float]] = {}
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=60
+    ) as client:
+        for concurrency in args.concurrency:
+            print(f"concurrency {concurrency}")
+            for scenario in SCENARIOS:
+                result = await run_scenario(
+                    client, scenario, state, args.requests, concurrency
+                )
+                results[f"{scenario.name}@{concurrency}"] = result
+                print(
+                    f"  {scenario.name:<24} {result['throughput_rps']:>9.1f} req/s"
+                    f"  p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}"
+                    f"  p99 {result['p99_ms']:>8.2f} ms"
+                )
+
+        print(f"memory (concurrency {max(args.concurrency)})")
+        tracemalloc.start()
+        for scenario in SCENARIOS:
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await run_scenario(
+                client, scenario, state, args.memory_requests, max(args.concurrency)
+            )
+            peak = tracemalloc.get_traced_memory()[1]
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+            memory[scenario.name] = {
+                "peak_kib": round((peak - before) / 1024, 1),
+                "retained_kib": round((retained - before) / 1024, 1),
+            }
+            print(
+                f"  {scenario.name:<24} peak {memory[scenario.name]['peak_kib']:>9.1f}"
+                f" KiB  retained {memory[scenario.name]['retained_kib']:>8.1f} KiB"
+            )
+        tracemalloc.stop()
+
+    return {"meta": metadata(args), "results": results, "memory": memory}
+
+
+def metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    ).stdout.strip()
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+    }
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> List[str]:
+    regressions = []
+    print(f"compared with {baseline['meta'].get('commit') or 'baseline'}")
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        p95_change = result["p95_ms"] / base["p95_ms"] - 1
+        throughput_change = result["throughput_rps"] / base["throughput_rps"] - 1
+        print(
+            f"  {key:<30} p95 {p95_change:+7.1%}  throughput {throughput_change:+7.1%}"
+        )
+        if p95_change > max_regression or throughput_change < -max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--memory-requests", type=int, default=100)
+    parser.add_argument("--save", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    args = parser.parse_args()
+
+    app_config = uvicorn.Config(
+        app, host="127.0.0.1", port=APP_PORT, http="httptools", log_level="warning"
+    )
+    stub_config = uvicorn.Config(
+        stub_polonus.app, host="127.0.0.1", port=STUB_PORT, log_level="warning"
+    )
+
+    with BackgroundServers(app_config, stub_config):
+        seed_users()
+        try:
+            report = asyncio.run(run_all(args))
+        finally:
+            delete_bench_users()
+
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"saved {args.save}")
+
+    if args.compare:
+        regressions = compare(
+            json.loads(args.compare.read_text()), report, args.max_regression
+        )
+        if regressions:
+            print(
+                f"regressed beyond {args.max_regression:.0%}: {', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Stand-in for the Polonus site that serves the captured pages in fixtures/.
+
+Every route id listed in routes.html resolves to the same passenger file with
+the route number substituted, so any of them can be requested.
+
+Usage: python -m benchmarks.load.stub_polonus [--port 8099]
+"""
+
+import argparse
+import re
+from pathlib import Path
+from typing import List
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse
+from starlette.routing import Route
+
+FIXTURES = Path(__file__).parent / "fixtures"
+ROUTES_PAGE = (FIXTURES / "routes.html").read_text(encoding="utf-8")
+PASSENGER_FILE = (FIXTURES / "passengers.txt").read_text(encoding="utf-8")
+
+
+def route_ids() -> List[int]:
+    return [int(route_id) for route_id in re.findall(r"Kurs (\d+)<", ROUTES_PAGE)]
+
+
+async def routes_page(request: Request) -> HTMLResponse:
+    return HTMLResponse(ROUTES_PAGE)
+
+
+async def passenger_file(request: Request) -> PlainTextResponse:
+    route_id = request.path_params["route_id"]
+    return PlainTextResponse(PASSENGER_FILE.replace("{route_id}", str(route_id)))
+
+
+app = Starlette(
+    routes=[
+        Route("/diagrams/display/show/{diagram_id}", routes_page),
+        Route("/diagrams/passengers/{route_id:int}.txt", passenger_file),
+    ]
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
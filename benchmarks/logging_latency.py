@@ -0,0 +1,100 @@
+"""Compare per-call logging latency of synchronous and queued sinks.
+
+The target file sleeps for --stall-ms every --stall-every bytes to emulate the
+disk flushes and rotation pauses that a synchronous sink puts on the request path.
+
+Usage: python -m benchmarks.logging_latency [--messages 50000] [--stall-ms 5]
+"""
+
+import argparse
+import copy
+import gc
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from loguru import logger
+
+from app.utils.log_sinks import QueuedSink
+
+FORMAT = "{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}"
+PAYLOAD = "GET /polonus/get-passengers route_id=1234 date=2025-02-20 " + "x" * 120
+
+
+class StallingFile:
+    def __init__(self, path: Path, stall_every: int, stall_seconds: float):
+        self.file = path.open("a", encoding="utf-8")
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.pending = 0
+
+    def write(self, message: str) -> None:
+        self.file.write(message)
+        self.pending += len(message)
+        if self.stall_seconds and self.pending >= self.stall_every:
+            self.file.flush()
+            time.sleep(self.stall_seconds)
+            self.pending = 0
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--stall-ms", type=float, default=5.0)
+    parser.add_argument("--stall-every", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    logger.remove()
+    print(
+        f"{args.messages} records, {args.stall_ms} ms stall every "
+        f"{args.stall_every} bytes (us per call)"
+    )
+    print(f"{'sink':<22}{'p50':>10}{'p99':>10}{'p99.9':>10}{'max':>10}{'dropped':>10}")
+
+    for name in ("synchronous", "loguru enqueue=True", "QueuedSink (drop)"):
+        bench_logger = copy.deepcopy(logger)
+        with tempfile.TemporaryDirectory() as directory:
+            target = StallingFile(
+                Path(directory) / "bench.log", args.stall_every, args.stall_ms / 1000
+            )
+            queued = None
+            if name == "synchronous":
+                bench_logger.add(target.write, format=FORMAT)
+            elif name == "loguru enqueue=True":
+                bench_logger.add(target.write, format=FORMAT, enqueue=True)
+            else:
+                queued = QueuedSink(target.write, "bench")
+                bench_logger.add(queued, format=FORMAT)
+
+            timings = []
+            # Collector pauses would otherwise dominate the tail of every sink.
+            gc.collect()
+            gc.disable()
+            for index in range(args.messages):
+                started = time.perf_counter()
+                bench_logger.info("{} {}", PAYLOAD, index)
+                timings.append((time.perf_counter() - started) * 1e6)
+            gc.enable()
+
+            bench_logger.remove()
+            target.close()
+
+        print(
+            f"{name:<22}{statistics.median(timings):>10.1f}"
+            f"{percentile(timings, 0.99):>10.1f}{percentile(timings, 0.999):>10.1f}"
+            f"{max(timings):>10.1f}{queued.dropped if queued else 0:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Measure per-request overhead of MetricsMiddleware against the real router.
+
+Usage: python -m benchmarks.metrics_overhead [--requests 100000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.main import app
+from app.middleware.metrics import MetricsMiddleware
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(asgi_app, requests: int) -> float:
+    started = time.perf_counter()
+    for index in range(requests):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "root_path": "",
+            "path": f"/user/{index % 500}",
+        }
+        await asgi_app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(endpoint, router=app.router)
+    bare = asyncio.run(run(endpoint, args.requests))
+    measured = asyncio.run(run(instrumented, args.requests))
+
+    print(f"bare endpoint:      {bare * 1e6:8.2f} us/request")
+    print(f"with metrics:       {measured * 1e6:8.2f} us/request")
+    print(f"overhead:           {(measured - bare) * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random
+from typing import List, Tuple
+
+FIRST_NAMES = ["JAN", "ANNA", "PIOTR", "KATARZYNA", "MAŁGORZATA", "ŁUKASZ", "ŻANETA"]
+LAST_NAMES = ["NOWAK", "WIŚNIEWSKA", "WÓJCIK", "KAMIŃSKI", "ZIELIŃSKI", "DĄBROWSKI"]
+CITIES = [
+    ("Warszawa", "Dworzec Zachodni"),
+    ("Łódź", "Fabryczna"),
+    ("Kraków", "MDA"),
+    ("Katowice", "Sądowa"),
+    ("Wrocław", "Dworzec Autobusowy"),
+    ("Gdańsk", "Dworzec PKS"),
+]
+
+ASCII_FOLD = str.maketrans("ĄĆĘŁŃÓŚŹŻąćęłńóśźż", "ACELNOSZZacelnoszz")
+
+
+def fold(text: str, diacritics: bool) -> str:
+    return text if diacritics else text.translate(ASCII_FOLD)
+
+
+def make_routes_page(
+    rows: int, diacritics: bool = True, seed: int = 0
+) -> Tuple[str, List[int]]:
+    rng = random.Random(seed)
+    route_ids = [1000 + index * 7 for index in range(rows)]
+    body = []
+    for index, route_id in enumerate(route_ids):
+        (origin, _), (destination, _) = rng.sample(CITIES, 2)
+        body.append(
+            f"<tr><td>{5 + index % 18:02d}:{index * 5 % 60:02d}</td>"
+            f'<td><a href="/diagrams/passengers/{route_id}.txt">Kurs {route_id}</a></td>'
+            f"<td>{fold(f'{origin} - {destination}', diacritics)}</td>"
+            f"<td>{rng.randint(10, 49)}</td></tr>"
+        )
+    page = (
+        '<html><head><meta charset="utf-8"></head><body>'
+        f"<h1>{fold('Wykaz kursów', diacritics)}</h1><table>"
+        "<tr><th>Godzina</th><th>Kurs</th><th>Relacja</th><th>Pasażerowie</th></tr>"
+        f"{''.join(body)}</table></body></html>"
+    )
+    return page, route_ids
+
+
+def make_passenger_file(
+    passengers: int,
+    stations: int = 4,
+    diacritics: bool = True,
+    route_id: int = 1234,
+    seed: int = 0,
+) -> str:
+    rng = random.Random(seed)
+    lines = [
+        f"#### Lista pasażerów - kurs nr {route_id} o godzinie 2025-02-20 08:00 ####",
+        "=" * 52,
+    ]
+    for station in range(stations):
+        city, name = CITIES[station % len(CITIES)]
+        departure = f"{8 + station:02d}:{station * 15 % 60:02d}"
+        lines.append(f"{fold(f'{city}, {name}', diacritics)} {departure}")
+        for _ in range(passengers // stations + (station < passengers % stations)):
+            full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            destination = ", ".join(rng.choice(CITIES))
+            lines.append(
+                f"{fold(full_name, diacritics)} {rng.randint(10000, 99999)}/2025 "
+                f"{rng.randint(39, 189)},{rng.choice(['00', '50', '99'])} zł "
+                f"{fold(destination, diacritics)}"
+            )
+        lines.append("=" * 52)
+    return "\n".join(lines) + "\n"
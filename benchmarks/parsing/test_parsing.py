@@ -0,0 +1,123 @@
+"""Microbenchmarks for the Polonus parsing functions.
+
+Record a run (the first one becomes the baseline):
+    pytest benchmarks/parsing --benchmark-autosave
+Record and compare with the previous run, failing on a >15% median slowdown:
+    tox -e benchmark
+Runs are stored under .benchmarks/ and can be listed with
+`pytest-benchmark list` or compared with `pytest-benchmark compare`.
+"""
+
+import pytest
+
+from app.polonus.search import SearchIndex
+from app.polonus.stats import passenger_stats
+from app.polonus.utils import (
+    build_route_index,
+    find_route,
+    parse_departure_date,
+    parse_passenger_data,
+    parse_route_number,
+    parse_routes_page,
+    parse_station_info,
+)
+from benchmarks.parsing.generators import make_passenger_file, make_routes_page
+
+ROUTE_ROWS = [50, 500, 2000]
+PASSENGERS = [50, 500, 5000]
+
+
+@pytest.mark.parametrize("diacritics", [True, False], ids=["diacritics", "ascii"])
+@pytest.mark.parametrize("rows", ROUTE_ROWS)
+def test_parse_routes_page(benchmark, rows, diacritics):
+    page, route_ids = make_routes_page(rows, diacritics=diacritics)
+    # The last row is the worst case: every row before it is scanned.
+    route_id = route_ids[-1]
+
+    href = benchmark(parse_routes_page, page, str(route_id))
+
+    assert href == f"/diagrams/passengers/{route_id}.txt"
+
+
+@pytest.mark.parametrize("rows", ROUTE_ROWS)
+def test_find_route(benchmark, rows):
+    # Lookups in an index that get_route_index already built and cached.
+    page, route_ids = make_routes_page(rows)
+    route_index = build_route_index(page)
+
+    href = benchmark(find_route, route_index, str(route_ids[-1]))
+
+    assert href == f"/diagrams/passengers/{route_ids[-1]}.txt"
+
+
+@pytest.mark.parametrize("diacritics", [True, False], ids=["diacritics", "ascii"])
+@pytest.mark.parametrize("passengers", PASSENGERS)
+def test_parse_passenger_data(benchmark, passengers, diacritics):
+    text = make_passenger_file(passengers, diacritics=diacritics)
+
+    result = benchmark(parse_passenger_data, text)
+
+    assert len(result) == passengers
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Warszawa, Dworzec Zachodni", "Łódź, Fabryczna, peron 3", "Białystok"],
+    ids=["station", "nested", "city-only"],
+)
+def test_parse_station_info(benchmark, text):
+    result = benchmark(parse_station_info, text)
+
+    assert result["city"] == text.split(",")[0]
+
+
+@pytest.mark.parametrize("passengers", PASSENGERS)
+def test_parse_route_number(benchmark, passengers):
+    text = make_passenger_file(passengers, route_id=4321)
+
+    assert benchmark(parse_route_number, text) == "4321"
+
+
+@pytest.mark.parametrize("passengers", PASSENGERS)
+def test_parse_departure_date(benchmark, passengers):
+    text = make_passenger_file(passengers)
+
+    assert benchmark(parse_departure_date, text) == "2025-02-20"
+
+
+@pytest.mark.parametrize("routes", [10, 100])
+def test_passenger_stats(benchmark, routes):
+    passengers = parse_passenger_data(make_passenger_file(500))
+    manifests = [("2025-02-20", str(route), passengers) for route in range(routes)]
+
+    stats = benchmark(passenger_stats, manifests)
+
+    assert stats["passengers"] == 500 * routes
+
+
+@pytest.mark.parametrize("lookup", ["ticket", "name"])
+@pytest.mark.parametrize("routes", [10, 100])
+def test_search_index_lookup(benchmark, routes, lookup):
+    index = SearchIndex(max_days=1, sync_interval=0)
+    # What sync() hands over after loading a day from the response cache.
+    index.update(
+        "2025-02-20",
+        {
+            str(route): (
+                "1",
+                parse_passenger_data(
+                    make_passenger_file(500, route_id=route, seed=route)
+                ),
+            )
+            for route in range(routes)
+        },
+    )
+    passenger = index.days["2025-02-20"].manifests[str(routes - 1)][1][-1]
+    index.find_ticket(passenger["ticket_number"])
+
+    if lookup == "ticket":
+        results = benchmark(index.find_ticket, passenger["ticket_number"])
+    else:
+        results = benchmark(index.find_name, passenger["full_name"], limit=1)
+
+    assert results
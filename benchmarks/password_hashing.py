@@ -0,0 +1,97 @@
+"""Pick password hashing parameters that fit the login latency budget.
+
+Times verify() for a grid of bcrypt costs and argon2id time/memory costs on
+this machine and marks the ones whose median fits --budget-ms. With
+--concurrency above 1 the verifications run in parallel threads, the way
+concurrent logins share a worker's threadpool and CPU cores.
+
+Usage: python -m benchmarks.password_hashing [--budget-ms 250] [--repeat 5]
+    [--concurrency 1]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from passlib.context import CryptContext
+
+PASSWORD = "correct horse battery staple"
+
+BCRYPT_ROUNDS = [10, 11, 12, 13, 14]
+ARGON2_TIME_COSTS = [2, 3, 4]
+ARGON2_MEMORY_COSTS = [19 * 1024, 46 * 1024, 64 * 1024, 128 * 1024]
+
+
+def candidates(parallelism: int) -> List[Tuple[str, Dict[str, Any]]]:
+    grid = [
+        (
+            f"bcrypt rounds={rounds}",
+            {"schemes": ["bcrypt"], "bcrypt__rounds": rounds},
+        )
+        for rounds in BCRYPT_ROUNDS
+    ]
+    grid += [
+        (
+            f"argon2id t={time_cost} m={memory_cost // 1024}MiB p={parallelism}",
+            {
+                "schemes": ["argon2"],
+                "argon2__type": "ID",
+                "argon2__time_cost": time_cost,
+                "argon2__memory_cost": memory_cost,
+                "argon2__parallelism": parallelism,
+            },
+        )
+        for memory_cost in ARGON2_MEMORY_COSTS
+        for time_cost in ARGON2_TIME_COSTS
+    ]
+    return grid
+
+
+def time_verify(context: CryptContext, repeat: int, concurrency: int) -> float:
+    hashed = context.hash(PASSWORD)
+
+    def verify(_: int) -> float:
+        started = time.perf_counter()
+        context.verify(PASSWORD, hashed)
+        return time.perf_counter() - started
+
+    timings: List[float] = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(repeat):
+            timings.extend(pool.map(verify, range(concurrency)))
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=250.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--argon2-parallelism", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"median verify latency, budget {args.budget_ms:.0f} ms, "
+        f"{args.concurrency} concurrent"
+    )
+    fitting: List[Tuple[float, str]] = []
+    for name, options in candidates(args.argon2_parallelism):
+        median_ms = (
+            time_verify(CryptContext(**options), args.repeat, args.concurrency) * 1000
+        )
+        fits = median_ms <= args.budget_ms
+        if fits:
+            fitting.append((median_ms, name))
+        print(f"  {name:<36} {median_ms:9.1f} ms  {'ok' if fits else 'over'}")
+
+    if fitting:
+        # The slowest parameters that still fit are the most expensive to attack.
+        print(f"strongest within budget: {max(fitting)[1]}")
+    else:
+        print("nothing fits the budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Compare response serialization paths for large RouteResponse payloads.
+
+Usage: python -m benchmarks.serialization [--passengers 10000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.polonus.schemas import RouteResponse
+from app.utils.responses import ModelResponse
+
+
+def make_route_response(passengers: int) -> RouteResponse:
+    return RouteResponse(
+        route_id=1234,
+        date="2025-02-20",
+        passengers=[
+            {
+                "full_name": f"KOWALSKI JAN {index}",
+                "ticket_number": f"{index}/2025",
+                "price": 120.0 + index % 50,
+                "currency": "zł",
+                "departure_city": "Warszawa",
+                "departure_station": "Dworzec Zachodni",
+                "arrival_city": "Kraków",
+                "arrival_station": "MDA",
+                "departure_time": "2025-02-20T08:00:00",
+            }
+            for index in range(passengers)
+        ],
+    )
+
+
+# The loop is created once so its setup and teardown are not timed.
+def fastapi_validated(
+    response_class: type, loop: asyncio.AbstractEventLoop
+) -> Callable[[RouteResponse], bytes]:
+    field = create_model_field(name="Response_bench", type_=RouteResponse)
+
+    def render(model: RouteResponse) -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=model, is_coroutine=True)
+        )
+        return response_class(content).body
+
+    return render
+
+
+def model_response(model: RouteResponse) -> bytes:
+    return ModelResponse(model).body
+
+
+def measure(
+    render: Callable[[RouteResponse], bytes], model: RouteResponse, repeat: int
+):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(model)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--passengers", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    model = make_route_response(args.passengers)
+    loop = asyncio.new_event_loop()
+    variants: Dict[str, Callable[[RouteResponse], bytes]] = {
+        "JSONResponse + response_model": fastapi_validated(JSONResponse, loop),
+        "ORJSONResponse + response_model": fastapi_validated(ORJSONResponse, loop),
+        "ModelResponse (no revalidation)": model_response,
+    }
+
+    print(f"{args.passengers} passengers, {args.repeat} runs (ms)")
+    print(f"{'variant':<34}{'min':>10}{'median':>10}{'max':>10}")
+    for name, render in variants.items():
+        render(model)
+        timings: List[float] = measure(render, model, args.repeat)
+        print(
+            f"{name:<34}{min(timings):>10.2f}"
+            f"{statistics.median(timings):>10.2f}{max(timings):>10.2f}"
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Measure worker import time with ``python -X importtime``.
+
+Each run imports the target module in a fresh interpreter and parses the
+importtime report from stderr. Reports the median total and the top-level
+packages that spend the most time importing their own modules.
+
+Usage: python -m benchmarks.startup [--module app.main] [--runs 5] [--top 15]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    packages: Dict[str, int] = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_part, _, name = line.split("|")
+        self_us = int(self_part.rsplit(":", 1)[1])
+        total += self_us
+        packages[name.strip().split(".")[0]] += self_us
+    return total, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals: List[int] = []
+    packages: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        total, self_times = import_times(args.module)
+        totals.append(total)
+        for package, value in self_times.items():
+            packages[package].append(value)
+
+    print(
+        f"import {args.module}: median {statistics.median(totals) / 1000:.1f} ms, "
+        f"min {min(totals) / 1000:.1f} ms over {args.runs} runs"
+    )
+    slowest = sorted(
+        packages.items(), key=lambda item: statistics.median(item[1]), reverse=True
+    )
+    for package, values in slowest[: args.top]:
+        print(f"  {package:<24} {statistics.median(values) / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
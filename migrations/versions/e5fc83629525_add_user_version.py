@@ -0,0 +1,29 @@
+"""add user version
+
+Revision ID: e5fc83629525
+Revises: 314924a0bf78
+Create Date: 2026-10-19 10:02:41.118520
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5fc83629525"
+down_revision: Union[str, None] = "314924a0bf78"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "version")
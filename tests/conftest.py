@@ -1,37 +1,67 @@
-import pytest
-import redis
-from fastapi.security import HTTPAuthorizationCredentials
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
-from app.constants import settings
-from app.db import Base, get_db, get_redis
-from app.main import app
-from app.models import User
-from app.utils.auth import get_password_hash
-
-engine = create_engine(settings.TEST_DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+import os
+from functools import lru_cache
+
+# The app's lifespan targets the main database; tests manage their own schema.
+os.environ.setdefault("DB_CREATE_TABLES_ON_STARTUP", "never")
+os.environ.setdefault("DB_POOL_WARMUP", "0")
+os.environ.setdefault("REDIS_POOL_WARMUP", "0")
+# Minimum bcrypt cost; production keeps the BCRYPT_ROUNDS default.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+import redis  # noqa: E402
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.constants import settings  # noqa: E402
+from app.db import Base, get_binary_redis, get_db, get_redis  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+from app.polonus.endpoints import polonus  # noqa: E402
+from app.utils.auth import get_password_hash  # noqa: E402
+
+# Under pytest-xdist every worker gets its own schema and Redis database.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "")
+TEST_SCHEMA = f"test_{XDIST_WORKER}" if XDIST_WORKER else "public"
+TEST_REDIS_DB = settings.TEST_DB_REDIS + int(XDIST_WORKER.removeprefix("gw") or 0)
+
+engine = create_engine(
+    settings.TEST_DATABASE_URL,
+    connect_args={"options": f"-csearch_path={TEST_SCHEMA}"},
+)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, join_transaction_mode="create_savepoint"
+)
 
 
 @pytest.fixture(scope="session", autouse=True)
 def prepare_database():
+    with engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{TEST_SCHEMA}"'))
     Base.metadata.create_all(bind=engine)
     yield
-    Base.metadata.drop_all(bind=engine)
+    if XDIST_WORKER:
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA "{TEST_SCHEMA}" CASCADE'))
+    else:
+        Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture(scope="function")
 def db_session():
-    session = TestingSessionLocal()
+    # Commits inside a test only release a SAVEPOINT; the outer transaction
+    # is rolled back afterwards, so nothing persists between tests.
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection)
     try:
-        for table in reversed(Base.metadata.sorted_tables):
-            session.execute(table.delete())
-        session.commit()
         yield session
     finally:
         session.close()
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture(scope="function")
@@ -54,7 +84,7 @@ def redis_test():
     redis_client = redis.Redis(
         host=settings.TEST_HOST_REDIS,
         port=settings.TEST_PORT_REDIS,
-        db=settings.TEST_DB_REDIS,
+        db=TEST_REDIS_DB,
         decode_responses=True,
     )
 
@@ -66,11 +96,33 @@ def redis_test():
 
 
 @pytest.fixture(scope="function")
-def override_get_redis(redis_test):
+def redis_binary_test(redis_test):
+    redis_client = redis.Redis(
+        host=settings.TEST_HOST_REDIS,
+        port=settings.TEST_PORT_REDIS,
+        db=TEST_REDIS_DB,
+    )
+
+    yield redis_client
+
+    redis_client.close()
+
+
+@pytest.fixture(scope="function")
+def override_get_redis(redis_test, redis_binary_test):
     def _override_get_redis():
         yield redis_test
 
-    app.dependency_overrides[get_redis] = _override_get_redis
+    def _override_get_binary_redis():
+        yield redis_binary_test
+
+    # Mounted sub-apps resolve dependencies with their own overrides.
+    for application in (app, polonus):
+        application.dependency_overrides[get_redis] = _override_get_redis
+        application.dependency_overrides[get_binary_redis] = _override_get_binary_redis
+
+
+cached_password_hash = lru_cache(maxsize=None)(get_password_hash)
 
 
 @pytest.fixture
@@ -82,7 +134,9 @@ def create_user(db_session):
         if existing_user:
             return existing_user
 
-        user = User(email=email, hashed_password=get_password_hash(password), role=role)
+        user = User(
+            email=email, hashed_password=cached_password_hash(password), role=role
+        )
 
         db_session.add(user)
         db_session.commit()
@@ -5,15 +5,10 @@ from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 from jose import jwt
 
-from app.auth.utils import admin_only, get_current_user, get_user, logout_user
+from app.auth.utils import admin_only, get_current_user, get_user
 from app.constants import settings
 from app.exceptions.user_exceptions import UserNotFoundException
-
-
-def test_logout_user_invalid_token(db_session, redis_test):
-    result = logout_user(token_str="invalid_token", redis=redis_test, db=db_session)
-
-    assert result == {"detail": "Token already invalid"}
+from app.utils.auth import create_user_access_token
 
 
 def test_get_user_not_found(db_session):
@@ -24,10 +19,25 @@ def test_get_user_not_found(db_session):
     assert "User with email nonexistent@example.com not found" in exc_info.value.detail
 
 
-def test_get_current_user_user_not_found(db_session, redis_test):
+def test_get_current_user_from_token_claims(test_user):
+    token = create_user_access_token(test_user)
+    token_credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    current_user = get_current_user(token=token_credentials)
+
+    assert current_user.id == test_user.id
+    assert current_user.email == test_user.email
+    assert current_user.role == test_user.role
+    assert current_user.version == test_user.version
+
+
+def test_get_current_user_does_not_query_database():
     token = jwt.encode(
         {
             "sub": "nonexistent@example.com",
+            "uid": 999,
+            "role": "admin",
+            "ver": 1,
             "exp": datetime.now(timezone.utc).timestamp() + 3600,
         },
         settings.JWT_SECRET_KEY.get_secret_value(),
@@ -35,26 +45,24 @@ def test_get_current_user_user_not_found(db_session, redis_test):
     )
     token_credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
 
-    with pytest.raises(UserNotFoundException) as exc_info:
-        get_current_user(token=token_credentials, db=db_session, redis=redis_test)
+    current_user = get_current_user(token=token_credentials)
 
-    assert exc_info.value.status_code == 404
-    assert exc_info.value.detail == "User with email nonexistent@example.com not found."
+    assert current_user.id == 999
 
 
-def test_get_current_user_invalid_token(db_session, redis_test):
+def test_get_current_user_invalid_token():
     invalid_token = HTTPAuthorizationCredentials(
         scheme="Bearer", credentials="invalid_token"
     )
 
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token=invalid_token, db=db_session, redis=redis_test)
+        get_current_user(token=invalid_token)
 
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Could not validate credentials"
 
 
-def test_get_current_user_expired_token(db_session, redis_test):
+def test_get_current_user_expired_token():
     expired_token = jwt.encode(
         {"sub": "test@example.com", "exp": 1},
         settings.JWT_SECRET_KEY.get_secret_value(),
@@ -65,15 +73,13 @@ def test_get_current_user_expired_token(db_session, redis_test):
     )
 
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(
-            token=expired_token_credentials, db=db_session, redis=redis_test
-        )
+        get_current_user(token=expired_token_credentials)
 
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Could not validate credentials"
 
 
-def test_get_current_user_invalid_payload(db_session, redis_test):
+def test_get_current_user_invalid_payload():
     invalid_token = jwt.encode(
         {"wrong_field": "test@example.com"},
         settings.JWT_SECRET_KEY.get_secret_value(),
@@ -85,9 +91,7 @@ def test_get_current_user_invalid_payload(db_session, redis_test):
     )
 
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(
-            token=invalid_token_credentials, db=db_session, redis=redis_test
-        )
+        get_current_user(token=invalid_token_credentials)
 
     assert exc_info.value.status_code == 401
     assert exc_info.value.detail == "Could not validate credentials"
@@ -0,0 +1,54 @@
+import pytest
+
+from app.constants import settings
+from app.utils.auth import get_pwd_context
+
+
+@pytest.fixture
+def argon2_primary(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_SCHEMES", ["argon2", "bcrypt"])
+    monkeypatch.setattr(settings, "ARGON2_TIME_COST", 1)
+    monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 1024)
+    monkeypatch.setattr(settings, "ARGON2_PARALLELISM", 1)
+    get_pwd_context.cache_clear()
+    yield
+    get_pwd_context.cache_clear()
+
+
+def test_login_rehashes_outdated_scheme(client, db_session, test_user, argon2_primary):
+    assert test_user.hashed_password.startswith("$2b$")
+
+    response = client.post(
+        "/auth/login", json={"email": test_user.email, "password": "testpassword123"}
+    )
+
+    assert response.status_code == 200
+    db_session.refresh(test_user)
+    assert test_user.hashed_password.startswith("$argon2id$")
+    assert get_pwd_context().verify("testpassword123", test_user.hashed_password)
+
+
+def test_login_keeps_current_hash(client, db_session, test_user):
+    hashed_password = test_user.hashed_password
+
+    response = client.post(
+        "/auth/login", json={"email": test_user.email, "password": "testpassword123"}
+    )
+
+    assert response.status_code == 200
+    db_session.refresh(test_user)
+    assert test_user.hashed_password == hashed_password
+
+
+def test_login_wrong_password_does_not_rehash(
+    client, db_session, test_user, argon2_primary
+):
+    hashed_password = test_user.hashed_password
+
+    response = client.post(
+        "/auth/login", json={"email": test_user.email, "password": "wrongpassword"}
+    )
+
+    assert response.status_code == 401
+    db_session.refresh(test_user)
+    assert test_user.hashed_password == hashed_password
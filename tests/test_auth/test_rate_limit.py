@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from app.auth.rate_limit import login_rate_limit_keys, reserve_login_attempt
+from app.constants import settings
+from app.exceptions.auth_exceptions import TooManyLoginAttemptsException
+from app.utils.metrics import LOGIN_ATTEMPTS_REJECTED
+
+
+@pytest.fixture
+def login_limits(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_WINDOW", 60)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_IP", 5)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_EMAIL", 3)
+
+
+def login(client, email, password="wrongpassword"):
+    return client.post("/auth/login", json={"email": email, "password": password})
+
+
+def test_failed_logins_are_limited_per_email(client, test_user, login_limits):
+    rejected = LOGIN_ATTEMPTS_REJECTED.value("email")
+    for _ in range(3):
+        assert login(client, test_user.email).status_code == 401
+
+    response = login(client, test_user.email, "testpassword123")
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= 60
+    assert LOGIN_ATTEMPTS_REJECTED.value("email") == rejected + 1
+
+
+def test_failed_logins_are_limited_per_ip(client, login_limits):
+    rejected = LOGIN_ATTEMPTS_REJECTED.value("ip")
+    for index in range(5):
+        assert login(client, f"user{index}@example.com").status_code == 404
+
+    assert login(client, "another@example.com").status_code == 429
+    assert LOGIN_ATTEMPTS_REJECTED.value("ip") == rejected + 1
+
+
+def test_attempts_in_flight_count_against_limit(redis_test, login_limits):
+    # Parallel guesses whose passwords are still being checked.
+    for _ in range(3):
+        assert reserve_login_attempt(redis_test, "10.0.0.1", "user@example.com")
+
+    with pytest.raises(TooManyLoginAttemptsException):
+        reserve_login_attempt(redis_test, "10.0.0.2", "user@example.com")
+
+
+def test_successful_logins_are_not_counted(client, redis_test, test_user, login_limits):
+    for _ in range(5):
+        assert login(client, test_user.email, "testpassword123").status_code == 200
+    assert all(
+        redis_test.zcard(key) == 0
+        for key in login_rate_limit_keys("testclient", test_user.email)
+    )
+
+    assert login(client, test_user.email).status_code == 401
+
+
+def test_attempts_expire_after_window(client, redis_test, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_WINDOW", 1)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_EMAIL", 1)
+
+    assert login(client, test_user.email).status_code == 401
+    assert login(client, test_user.email).status_code == 429
+
+    time.sleep(1.1)
+
+    assert login(client, test_user.email, "testpassword123").status_code == 200
+    assert all(
+        redis_test.zcard(key) == 0
+        for key in login_rate_limit_keys("testclient", test_user.email)
+    )
+
+
+def test_rate_limit_can_be_disabled(client, test_user, login_limits, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_ENABLED", False)
+
+    for _ in range(5):
+        assert login(client, test_user.email).status_code == 401
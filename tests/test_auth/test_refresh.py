@@ -0,0 +1,107 @@
+import pytest
+
+
+@pytest.fixture
+def tokens(client, test_user):
+    response = client.post(
+        "/auth/login", json={"email": test_user.email, "password": "testpassword123"}
+    )
+    return response.json()
+
+
+def test_login_returns_refresh_token(tokens):
+    assert tokens["token_type"] == "bearer"
+    assert tokens["access_token"]
+    assert "." in tokens["refresh_token"]
+
+
+def test_refresh_rotates_tokens(client, tokens):
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    current = client.get(
+        "/user/current",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"},
+    )
+    assert current.status_code == 200
+
+
+def test_refresh_token_reuse_revokes_session(client, tokens):
+    rotated = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    reused = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert reused.status_code == 401
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_refresh_picks_up_role_changes(client, db_session, test_user, tokens):
+    test_user.role = "dps_manager"
+    test_user.version += 1
+    db_session.commit()
+
+    refreshed = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+    current = client.get(
+        "/user/current",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"},
+    )
+
+    assert current.json()["role"] == "dps_manager"
+
+
+def test_refresh_for_deleted_user(client, db_session, test_user, tokens):
+    db_session.delete(test_user)
+    db_session.commit()
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client, tokens):
+    response = client.post(
+        "/auth/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Logout successful"}
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_invalid_token(client):
+    response = client.post("/auth/logout", json={"refresh_token": "invalid_token"})
+
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Token already invalid"}
+
+
+def test_logout_requires_current_secret(client, tokens):
+    family = tokens["refresh_token"].split(".")[0]
+
+    response = client.post("/auth/logout", json={"refresh_token": f"{family}.guess"})
+
+    assert response.json() == {"detail": "Token already invalid"}
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
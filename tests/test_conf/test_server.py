@@ -0,0 +1,74 @@
+import os
+
+import pytest
+import uvicorn
+
+from app.constants import settings
+from app.polonus import utils as polonus_utils
+from app.server import Server, default_workers, parse_args, uvicorn_options
+
+
+def test_production_options():
+    options = uvicorn_options(parse_args(["--workers", "0", "--max-requests", "500"]))
+
+    assert options["workers"] == default_workers()
+    assert options["limit_max_requests"] == 500
+    assert options["http"] == "httptools"
+    assert "reload" not in options
+
+
+def test_reload_runs_single_process():
+    options = uvicorn_options(parse_args(["--reload"]))
+
+    assert options["reload"] is True
+    assert "workers" not in options
+
+
+def test_max_requests_zero_disables_recycling():
+    options = uvicorn_options(parse_args(["--max-requests", "0"]))
+
+    assert options["limit_max_requests"] is None
+
+
+def test_lifespan_manages_shared_http_client(client):
+    assert polonus_utils._http_client is not None
+    assert not polonus_utils._http_client.is_closed
+
+
+@pytest.mark.parametrize(
+    "files, expected",
+    [
+        ({"cpu.max": "200000 100000\n"}, 2),
+        ({"cpu.max": "150000 100000\n"}, 2),
+        ({"cpu.max": "max 100000\n"}, None),
+        ({"cpu/cpu.cfs_quota_us": "300000\n", "cpu/cpu.cfs_period_us": "100000\n"}, 3),
+        ({"cpu/cpu.cfs_quota_us": "-1\n", "cpu/cpu.cfs_period_us": "100000\n"}, None),
+        ({}, None),
+    ],
+)
+def test_default_workers_respects_cpu_quota(tmp_path, monkeypatch, files, expected):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(64)))
+    monkeypatch.setattr(settings, "SERVER_MAX_WORKERS", 100)
+    for name, content in files.items():
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text(content)
+
+    assert default_workers(tmp_path) == (expected or 64)
+
+
+def test_default_workers_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(64)))
+
+    assert default_workers(tmp_path) == settings.SERVER_MAX_WORKERS
+
+
+def test_worker_request_limit_is_jittered(monkeypatch):
+    monkeypatch.setattr(uvicorn.Server, "run", lambda self, sockets=None: None)
+    limits = set()
+    for _ in range(20):
+        config = uvicorn.Config("app.main:app", limit_max_requests=1000)
+        Server(config, max_requests_jitter=100).run()
+        limits.add(config.limit_max_requests)
+
+    assert all(1000 <= limit <= 1100 for limit in limits)
+    assert len(limits) > 1
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+from app import conf
+
+LAZY_MODULES = ("bs4", "fastapi_mail", "httpx", "jose", "lxml", "numpy", "passlib")
+
+
+def test_heavy_modules_not_imported_on_startup():
+    code = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
+
+
+@pytest.mark.parametrize(
+    "mode, at_head, expected",
+    [
+        ("always", True, True),
+        ("never", False, False),
+        ("auto", True, False),
+        ("auto", False, True),
+    ],
+)
+def test_create_tables_mode(monkeypatch, mode, at_head, expected):
+    calls = []
+    monkeypatch.setattr(conf.settings, "DB_CREATE_TABLES_ON_STARTUP", mode)
+    monkeypatch.setattr(conf, "migrations_at_head", lambda: at_head)
+    monkeypatch.setattr(
+        conf.Base.metadata, "create_all", lambda **kwargs: calls.append(kwargs)
+    )
+
+    conf.create_tables()
+
+    assert bool(calls) is expected
@@ -0,0 +1,53 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy.orm import Session
+
+from app.constants import settings
+from app.jobs import tasks
+from app.jobs.queue import JobQueue
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def queue(redis_test):
+    return JobQueue(redis_test)
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_SERVER", controller.hostname)
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.port)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def job_db(db_session, monkeypatch):
+    # Jobs open their own sessions; these join the test's transaction.
+    monkeypatch.setattr(
+        tasks,
+        "SessionLocal",
+        lambda: Session(
+            bind=db_session.connection(), join_transaction_mode="create_savepoint"
+        ),
+    )
+    return db_session
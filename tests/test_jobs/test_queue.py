@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from app.constants import settings
+from app.jobs.queue import RUNNING_KEY, SCHEDULED_KEY, job, job_key
+
+
+@job("test_echo", max_attempts=2)
+def echo(context, value):
+    return value
+
+
+@pytest.fixture(autouse=True)
+def fixed_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_RETRY_BACKOFF", 10.0)
+
+
+def test_enqueue_claim_complete(queue, redis_test):
+    job_id = queue.enqueue(echo, value={"a": 1})
+
+    queued = queue.get(job_id)
+    assert (queued.name, queued.status, queued.attempts) == ("test_echo", "queued", 0)
+    assert queued.args == {"value": {"a": 1}}
+
+    claimed = queue.claim(timeout=60)
+    assert (claimed.id, claimed.status, claimed.attempts) == (job_id, "running", 1)
+    assert redis_test.zscore(RUNNING_KEY, job_id) > time.time()
+    assert queue.claim(timeout=60) is None
+
+    queue.complete(claimed, {"a": 1})
+    done = queue.get(job_id)
+    assert (done.status, done.result, done.args) == ("succeeded", {"a": 1}, {})
+    assert redis_test.zscore(RUNNING_KEY, job_id) is None
+    assert 0 < redis_test.ttl(job_key(job_id)) <= settings.JOBS_RESULT_TTL
+
+
+def test_failed_attempt_is_retried_with_backoff(queue, redis_test):
+    job_id = queue.enqueue(echo, value=1)
+    claimed = queue.claim(timeout=60)
+
+    assert queue.fail(claimed, "boom") == "retrying"
+    retrying = queue.get(job_id)
+    assert (retrying.status, retrying.error) == ("retrying", "boom")
+    assert redis_test.zscore(SCHEDULED_KEY, job_id) == pytest.approx(
+        time.time() + 10, abs=1
+    )
+    assert queue.requeue_due() == 0
+
+    redis_test.zadd(SCHEDULED_KEY, {job_id: 0})
+    assert queue.requeue_due() == 1
+    assert queue.claim(timeout=60).attempts == 2
+
+
+def test_job_fails_after_max_attempts(queue, redis_test):
+    job_id = queue.enqueue(echo, value=1)
+    queue.fail(queue.claim(timeout=60), "first")
+    redis_test.zadd(SCHEDULED_KEY, {job_id: 0})
+    queue.requeue_due()
+
+    assert queue.fail(queue.claim(timeout=60), "second") == "failed"
+    failed = queue.get(job_id)
+    assert (failed.status, failed.error, failed.args) == ("failed", "second", {})
+    assert redis_test.zscore(SCHEDULED_KEY, job_id) is None
+
+
+def test_expired_running_job_is_requeued(queue):
+    job_id = queue.enqueue(echo, value=1)
+    queue.claim(timeout=-1)
+
+    assert queue.requeue_due() == 1
+    assert queue.get(job_id).status == "queued"
+    assert queue.claim(timeout=60).attempts == 2
+
+
+def test_get_job_status(client, queue, test_admin_token):
+    job_id = queue.enqueue(echo, value=1)
+
+    response = client.get(
+        f"/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["id"], body["name"], body["status"]) == (job_id, "test_echo", "queued")
+    assert "args" not in body
+
+
+def test_get_unknown_job(client, test_admin_token):
+    response = client.get(
+        "/jobs/missing",
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 404
+
+
+def test_get_job_requires_admin(client, queue, test_user_token):
+    job_id = queue.enqueue(echo, value=1)
+
+    response = client.get(
+        f"/jobs/{job_id}",
+        headers={"Authorization": f"Bearer {test_user_token.credentials}"},
+    )
+
+    assert response.status_code == 403
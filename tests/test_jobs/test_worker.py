@@ -0,0 +1,249 @@
+import asyncio
+import email
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.constants import settings
+from app.jobs import tasks
+from app.jobs.queue import QUEUE_KEY, JobContext, JobQueue, job, job_state_key
+from app.jobs.worker import Worker
+from app.models.users import User
+from app.utils.auth import verify_password
+
+calls = {"flaky": 0, "limited": 0, "in_flight": 0, "max_in_flight": 0, "slow": 0}
+
+
+@job("test_flaky", max_attempts=3)
+def flaky(context, fail_times):
+    calls["flaky"] += 1
+    if context.attempt <= fail_times:
+        raise RuntimeError(f"attempt {context.attempt}")
+    return context.attempt
+
+
+@job("test_limited", concurrency=1)
+async def limited(context):
+    calls["in_flight"] += 1
+    calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+    await asyncio.sleep(0.01)
+    calls["in_flight"] -= 1
+
+
+@job("test_slow")
+async def slow(context):
+    calls["slow"] += 1
+    await asyncio.sleep(0.6)
+
+
+@pytest.fixture(autouse=True)
+def reset(monkeypatch):
+    for key in calls:
+        calls[key] = 0
+    monkeypatch.setattr(settings, "JOBS_RETRY_BACKOFF", 0.0)
+    monkeypatch.setattr(settings, "JOBS_POLL_INTERVAL", 0.01)
+
+
+def run_worker(queue, concurrency=4):
+    asyncio.run(Worker(queue, concurrency).run(burst=True))
+
+
+def test_worker_retries_until_success(queue):
+    job_id = queue.enqueue(flaky, fail_times=2)
+
+    run_worker(queue)
+
+    done = queue.get(job_id)
+    assert (done.status, done.attempts, done.result) == ("succeeded", 3, 3)
+    assert calls["flaky"] == 3
+
+
+def test_worker_gives_up_after_max_attempts(queue):
+    job_id = queue.enqueue(flaky, fail_times=5)
+
+    run_worker(queue)
+
+    failed = queue.get(job_id)
+    assert (failed.status, failed.attempts) == ("failed", 3)
+    assert failed.error == "RuntimeError('attempt 3')"
+
+
+def test_job_lost_on_last_attempt_is_failed(queue):
+    job_id = queue.enqueue(flaky, fail_times=0)
+    # Three claims whose worker never reported back.
+    for _ in range(3):
+        queue.claim(timeout=-1)
+        queue.requeue_due()
+
+    run_worker(queue)
+
+    lost = queue.get(job_id)
+    assert (lost.status, lost.error) == ("failed", "Worker lost the job")
+    assert calls["flaky"] == 0
+
+
+def test_job_concurrency_limit(queue):
+    for _ in range(4):
+        queue.enqueue(limited)
+
+    run_worker(queue, concurrency=4)
+
+    assert calls["max_in_flight"] == 1
+
+
+def test_worker_survives_redis_errors(queue, monkeypatch):
+    job_id = queue.enqueue(flaky, fail_times=0)
+    claim = queue.claim
+    failures = []
+
+    def fail_twice(timeout):
+        if len(failures) < 2:
+            failures.append(timeout)
+            raise ConnectionError("Redis is down")
+        return claim(timeout)
+
+    monkeypatch.setattr(queue, "claim", fail_twice)
+
+    run_worker(queue)
+
+    assert len(failures) == 2
+    assert queue.get(job_id).status == "succeeded"
+
+
+def test_heartbeat_keeps_long_job_claimed(queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_VISIBILITY_TIMEOUT", 0.3)
+    job_id = queue.enqueue(slow)
+
+    run_worker(queue)
+
+    done = queue.get(job_id)
+    assert (done.status, done.attempts) == ("succeeded", 1)
+    assert calls["slow"] == 1
+
+
+def test_create_user_emails_credentials(
+    client, queue, job_db, smtp_server, test_admin_token
+):
+    response = client.post(
+        "/user/",
+        json={"email": "new@example.com", "role": "polonus_manager"},
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+    assert response.status_code == 200
+
+    run_worker(queue)
+
+    [envelope] = smtp_server.messages
+    assert envelope.rcpt_tos == ["new@example.com"]
+    message = email.message_from_bytes(envelope.content)
+    [body] = [
+        part.get_payload(decode=True).decode()
+        for part in message.walk()
+        if part.get_content_type() == "text/plain"
+    ]
+    password = body.split("Password: ")[1].splitlines()[0]
+    user = job_db.query(User).filter_by(email="new@example.com").one()
+    assert verify_password(password, user.hashed_password)
+
+
+def test_import_users(client, queue, job_db, smtp_server, test_user, test_admin_token):
+    response = client.post(
+        "/user/import",
+        json=[
+            {"email": "one@example.com", "role": "polonus_manager"},
+            {"email": "two@example.com", "role": "dps_manager"},
+            {"email": test_user.email, "role": "admin"},
+        ],
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+
+    run_worker(queue)
+
+    done = queue.get(job_id)
+    assert done.status == "succeeded"
+    assert done.result == {"created": 2, "skipped": [test_user.email]}
+    emails = {user.email: user.role for user in job_db.query(User)}
+    assert emails["two@example.com"] == "dps_manager"
+    assert emails[test_user.email] == "polonus_manager"
+    assert sorted(m.rcpt_tos[0] for m in smtp_server.messages) == [
+        "one@example.com",
+        "two@example.com",
+    ]
+
+
+def test_import_users_rejects_empty_list(client, test_admin_token):
+    response = client.post(
+        "/user/import",
+        json=[],
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_create_user_survives_enqueue_failure(
+    client, job_db, test_admin_token, monkeypatch
+):
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(JobQueue, "enqueue", unavailable)
+
+    response = client.post(
+        "/user/",
+        json={"email": "new@example.com", "role": "polonus_manager"},
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["email_queued"] is False
+    assert job_db.query(User).filter_by(email="new@example.com").one()
+
+
+def test_import_retried_after_commit_still_emails(
+    client, queue, redis_test, job_db, smtp_server, test_admin_token, monkeypatch
+):
+    queue_email = tasks.queue_credentials_email
+    failures = []
+
+    def fail_once(context, email, password):
+        if not failures:
+            failures.append(email)
+            raise ConnectionError("Redis went away")
+        queue_email(context, email, password)
+
+    monkeypatch.setattr(tasks, "queue_credentials_email", fail_once)
+    response = client.post(
+        "/user/import",
+        json=[
+            {"email": "one@example.com", "role": "polonus_manager"},
+            {"email": "two@example.com", "role": "dps_manager"},
+        ],
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+    job_id = response.json()["job_id"]
+
+    run_worker(queue)
+
+    done = queue.get(job_id)
+    assert (done.status, done.attempts) == ("succeeded", 2)
+    assert done.result == {"created": 2, "skipped": []}
+    assert sorted(m.rcpt_tos[0] for m in smtp_server.messages) == [
+        "one@example.com",
+        "two@example.com",
+    ]
+    assert not redis_test.exists(job_state_key(job_id))
+
+
+def test_import_running_twice_queues_emails_once(queue, redis_test, job_db):
+    users = [{"email": "one@example.com", "role": "polonus_manager"}]
+    context = JobContext(queue, "import", 1)
+
+    first = tasks.import_users(context, users)
+    second = tasks.import_users(context, users)
+
+    assert first == second == {"created": 1, "skipped": []}
+    assert redis_test.llen(QUEUE_KEY) == 1
@@ -0,0 +1,160 @@
+import gzip
+import zlib
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.constants import settings
+from app.middleware.compression import CompressionMiddleware, accepted_encodings
+from app.polonus import endpoints as polonus_endpoints
+from app.polonus.schemas import RouteResponse
+
+STOPS = [
+    ("Warszawa", "Dworzec Zachodni"),
+    ("Łódź", "Fabryczna"),
+    ("Kraków", "MDA"),
+    ("Gdańsk", "Dworzec PKS"),
+]
+
+
+def make_manifest(passengers=500):
+    rows = []
+    for index in range(passengers):
+        departure = STOPS[index % 2]
+        arrival = STOPS[2 + index % 2]
+        rows.append(
+            {
+                "full_name": f"KOWALSKA ZOFIA {index}",
+                "ticket_number": f"{100000 + index}/2025",
+                "price": 89.0 + index % 7,
+                "currency": "zł",
+                "departure_city": departure[0],
+                "departure_station": departure[1],
+                "arrival_city": arrival[0],
+                "arrival_station": arrival[1],
+                "departure_time": "2025-02-20T08:15:00",
+            }
+        )
+    return rows
+
+
+@pytest.fixture
+def compressed_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse("Warszawa, Dworzec Zachodni " * 100)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (f"Kraków, MDA {index}\n" for index in range(1000)), media_type="text/plain"
+        )
+
+    @app.get("/encoded")
+    def encoded():
+        return PlainTextResponse(
+            gzip.compress(b"x" * 1000), headers={"Content-Encoding": "gzip"}
+        )
+
+    return TestClient(app)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("gzip;q=1.0, br;q=0") == {"gzip"}
+    assert accepted_encodings("") == {""}
+
+
+def test_small_response_is_not_compressed(compressed_app):
+    response = compressed_app.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_large_response_is_compressed(compressed_app, encoding):
+    response = compressed_app.get("/large", headers={"Accept-Encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.text == "Warszawa, Dworzec Zachodni " * 100
+
+
+def test_brotli_is_preferred(compressed_app):
+    response = compressed_app.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_streaming_response_is_compressed(compressed_app):
+    with compressed_app.stream(
+        "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert zlib.decompress(raw, zlib.MAX_WBITS | 16).decode() == "".join(
+        f"Kraków, MDA {index}\n" for index in range(1000)
+    )
+
+
+def test_already_encoded_response_is_passed_through(compressed_app):
+    with compressed_app.stream(
+        "GET", "/encoded", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert gzip.decompress(raw) == b"x" * 1000
+
+
+@pytest.mark.parametrize(
+    "encoding, decompress, max_ratio",
+    [
+        ("gzip", gzip.decompress, 0.1),
+        ("br", brotli.decompress, 0.1),
+    ],
+)
+def test_passenger_manifest_byte_savings(
+    client, monkeypatch, encoding, decompress, max_ratio
+):
+    manifest = make_manifest()
+    # Cached responses are always stored gzipped; this measures the middleware.
+    monkeypatch.setattr(settings, "POLONUS_CACHE_ENABLED", False)
+
+    async def fake_get_passenger_data(date, route_id):
+        return manifest
+
+    monkeypatch.setattr(
+        polonus_endpoints, "get_passenger_data", fake_get_passenger_data
+    )
+
+    with client.stream(
+        "POST",
+        "/polonus/get-passengers",
+        json={"date": "2025-02-20", "route_id": 1234},
+        headers={"Accept-Encoding": encoding},
+    ) as response:
+        raw = b"".join(response.iter_raw())
+
+    body = decompress(raw)
+    ratio = len(raw) / len(body)
+    print(f"{encoding}: {len(body)} -> {len(raw)} bytes ({ratio:.1%})")
+
+    assert response.headers["content-encoding"] == encoding
+    assert (
+        RouteResponse.model_validate_json(body).passengers[0].arrival_city == "Kraków"
+    )
+    assert ratio < max_ratio
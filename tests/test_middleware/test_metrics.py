@@ -0,0 +1,51 @@
+from app.polonus import endpoints as polonus_endpoints
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+
+def test_requests_are_labelled_by_route_template(client, test_admin, test_admin_token):
+    user_id = test_admin.id
+    before = HTTP_REQUESTS.value("GET", "/user/{user_id}", "200")
+
+    client.get(
+        f"/user/{user_id}",
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert HTTP_REQUESTS.value("GET", "/user/{user_id}", "200") == before + 1
+    assert HTTP_REQUEST_DURATION.count("GET", "/user/{user_id}") >= 1
+
+
+def test_mounted_routes_are_labelled(client, monkeypatch):
+    async def fake_get_passenger_data(date, route_id):
+        return []
+
+    monkeypatch.setattr(
+        polonus_endpoints, "get_passenger_data", fake_get_passenger_data
+    )
+    before = HTTP_REQUESTS.value("POST", "/polonus/get-passengers", "200")
+
+    client.post("/polonus/get-passengers", json={"date": "2025-02-20", "route_id": 1})
+
+    assert HTTP_REQUESTS.value("POST", "/polonus/get-passengers", "200") == before + 1
+
+
+def test_unmatched_routes_share_a_label(client):
+    before = HTTP_REQUESTS.value("GET", "<unmatched>", "404")
+
+    client.get("/does-not-exist/1")
+    client.get("/does-not-exist/2")
+
+    assert HTTP_REQUESTS.value("GET", "<unmatched>", "404") == before + 2
+
+
+def test_metrics_endpoint(client):
+    client.get("/does-not-exist")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"}' in (
+        response.text
+    )
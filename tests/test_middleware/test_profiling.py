@@ -0,0 +1,93 @@
+import os
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.profiling import ProfilingMiddleware
+from app.utils.profiling import phase, timed_phase
+
+
+@timed_phase("db")
+def load_rows():
+    return sum(range(1000))
+
+
+def make_client(tmp_path, **options):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, output_dir=tmp_path, **options)
+
+    @app.get("/sync")
+    def sync_endpoint():
+        with phase("auth"):
+            rows = load_rows()
+        return {"rows": rows}
+
+    @app.get("/async")
+    async def async_endpoint():
+        with phase("parse"):
+            return {"rows": sum(range(1000))}
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def profiled_client(tmp_path):
+    return make_client(tmp_path, token="secret")
+
+
+def test_request_without_header_is_not_profiled(profiled_client, tmp_path):
+    response = profiled_client.get("/sync")
+
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_request_with_wrong_token_is_not_profiled(profiled_client):
+    response = profiled_client.get("/sync", headers={"X-Profile": "wrong"})
+
+    assert "server-timing" not in response.headers
+
+
+def test_profiled_sync_request(profiled_client, tmp_path):
+    response = profiled_client.get("/sync", headers={"X-Profile": "secret"})
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("auth;dur=")
+    assert "db;dur=" in timing
+    assert "total;dur=" in timing
+
+    profile_path = tmp_path / f"{response.headers['x-profile-id']}.prof"
+    functions = {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+    assert "load_rows" in functions
+
+
+def test_profiled_async_request(profiled_client):
+    response = profiled_client.get("/async", headers={"X-Profile": "secret"})
+
+    assert response.headers["server-timing"].startswith("parse;dur=")
+
+
+def test_sampled_request_is_profiled(tmp_path):
+    client = make_client(tmp_path, sample_rate=1.0)
+
+    response = client.get("/async")
+
+    assert "x-profile-id" in response.headers
+
+
+def test_only_newest_profiles_are_kept(tmp_path):
+    for age, name in enumerate(["old", "older"], start=1):
+        path = tmp_path / f"{name}.prof"
+        path.write_bytes(b"")
+        os.utime(path, (0, 1000 - age))
+    client = make_client(tmp_path, sample_rate=1.0, max_profiles=2)
+
+    response = client.get("/async")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"{response.headers['x-profile-id']}.prof",
+        "old.prof",
+    ]
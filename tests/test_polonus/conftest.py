@@ -0,0 +1,59 @@
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+
+from app.constants import settings
+from app.polonus import endpoints as polonus_endpoints
+from app.polonus import utils as polonus_utils
+from app.polonus.search import SearchIndex
+
+FIXTURES = Path(__file__).parents[2] / "benchmarks" / "load" / "fixtures"
+ROUTES_PAGE = (FIXTURES / "routes.html").read_text(encoding="utf-8")
+PASSENGER_FILE = (FIXTURES / "passengers.txt").read_text(encoding="utf-8")
+
+
+def fresh_search_index() -> SearchIndex:
+    # Synced on every search, so results reflect the previous request.
+    return SearchIndex(settings.POLONUS_SEARCH_MAX_DAYS, sync_interval=0)
+
+
+@pytest.fixture(autouse=True)
+def clear_route_indexes(monkeypatch):
+    polonus_utils._route_indexes.clear()
+    monkeypatch.setattr(polonus_endpoints, "search_index", fresh_search_index())
+    yield
+    polonus_utils._route_indexes.clear()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    # Tests can replace a route's passenger file through calls["files"].
+    calls = {"routes_page": 0, "passenger_file": 0, "files": {}}
+    in_flight = {"now": 0, "max": 0}
+
+    async def track(delay):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(delay)
+        in_flight["now"] -= 1
+
+    async def fake_fetch_routes_page(url, date):
+        calls["routes_page"] += 1
+        await track(0.01)
+        return ROUTES_PAGE
+
+    async def fake_fetch_passenger_file(url):
+        calls["passenger_file"] += 1
+        await track(0.001)
+        route_id = re.search(r"(\d+)\.txt$", url).group(1)
+        text = calls["files"].get(route_id, PASSENGER_FILE)
+        return text.replace("{route_id}", route_id)
+
+    monkeypatch.setattr(polonus_utils, "fetch_routes_page", fake_fetch_routes_page)
+    monkeypatch.setattr(
+        polonus_utils, "fetch_passenger_file", fake_fetch_passenger_file
+    )
+    calls["max_in_flight"] = in_flight
+    return calls
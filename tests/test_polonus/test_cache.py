@@ -0,0 +1,182 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.constants import settings
+from app.polonus import endpoints as polonus_endpoints
+from app.polonus.cache import claim_route_refresh, route_cache_key
+from app.polonus.schemas import RouteResponse
+
+PAST_DATE = "2025-02-20"
+PASSENGER = {
+    "full_name": "JAN KOWALSKI",
+    "ticket_number": "123/456",
+    "price": 45.0,
+    "currency": "zł",
+    "departure_city": "Warszawa",
+    "departure_station": "Dworzec Zachodni",
+    "arrival_city": "Kraków",
+    "arrival_station": "MDA",
+    "departure_time": f"{PAST_DATE}T08:00:00",
+}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+
+    async def fake_get_passenger_data(day, route_id):
+        calls.append((day, route_id))
+        return [PASSENGER]
+
+    monkeypatch.setattr(
+        polonus_endpoints, "get_passenger_data", fake_get_passenger_data
+    )
+    return calls
+
+
+def get_passengers(client, route_id=1234, day=PAST_DATE, encoding="gzip"):
+    return client.post(
+        "/polonus/get-passengers",
+        json={"date": day, "route_id": route_id},
+        headers={"Accept-Encoding": encoding},
+    )
+
+
+def test_response_is_cached_gzipped(client, upstream):
+    first = get_passengers(client)
+    second = get_passengers(client)
+
+    assert [first.headers["x-cache"], second.headers["x-cache"]] == ["MISS", "HIT"]
+    assert second.headers["content-encoding"] == "gzip"
+    route = RouteResponse.model_validate_json(second.content)
+    assert route.route_id == 1234
+    assert route.passengers[0].arrival_city == "Kraków"
+    assert len(upstream) == 1
+
+
+def test_cached_response_without_gzip_support(client, upstream):
+    get_passengers(client)
+    response = get_passengers(client, encoding="identity")
+
+    assert response.headers["x-cache"] == "HIT"
+    assert "content-encoding" not in response.headers
+    assert response.json()["passengers"] == [PASSENGER]
+
+
+def test_entries_are_keyed_by_route_and_date(client, upstream):
+    get_passengers(client, route_id=1)
+    get_passengers(client, route_id=2)
+    get_passengers(client, route_id=1, day="2025-02-21")
+
+    assert len(upstream) == 3
+
+
+@pytest.mark.parametrize(
+    "day, ttl_setting, stale_setting",
+    [
+        (PAST_DATE, "POLONUS_CACHE_TTL_PAST", "POLONUS_CACHE_STALE_PAST"),
+        (
+            date.today().isoformat(),
+            "POLONUS_CACHE_TTL_CURRENT",
+            "POLONUS_CACHE_STALE_CURRENT",
+        ),
+    ],
+)
+def test_ttls_depend_on_date(
+    client, upstream, redis_binary_test, day, ttl_setting, stale_setting
+):
+    get_passengers(client, day=day)
+
+    ttl = getattr(settings, ttl_setting) + getattr(settings, stale_setting)
+    assert ttl - 2 <= redis_binary_test.ttl(route_cache_key(1234, day)) <= ttl
+
+
+def test_stale_entry_is_served_and_refreshed(client, upstream, redis_binary_test):
+    get_passengers(client)
+    redis_binary_test.hset(route_cache_key(1234, PAST_DATE), "fresh_until", 0)
+
+    stale = get_passengers(client)
+    fresh = get_passengers(client)
+
+    assert stale.headers["x-cache"] == "STALE"
+    assert fresh.headers["x-cache"] == "HIT"
+    assert len(upstream) == 2
+
+
+def test_stale_entry_is_refreshed_once(client, upstream, redis_binary_test):
+    get_passengers(client)
+    redis_binary_test.hset(route_cache_key(1234, PAST_DATE), "fresh_until", 0)
+    assert claim_route_refresh(redis_binary_test, 1234, PAST_DATE)
+
+    response = get_passengers(client)
+
+    assert response.headers["x-cache"] == "STALE"
+    assert len(upstream) == 1
+
+
+def test_failed_refresh_keeps_stale_entry(
+    client, upstream, redis_binary_test, monkeypatch
+):
+    get_passengers(client)
+    redis_binary_test.hset(route_cache_key(1234, PAST_DATE), "fresh_until", 0)
+
+    async def failing_get_passenger_data(day, route_id):
+        raise HTTPException(status_code=500, detail="Failed to fetch routes page")
+
+    monkeypatch.setattr(
+        polonus_endpoints, "get_passenger_data", failing_get_passenger_data
+    )
+
+    assert get_passengers(client).headers["x-cache"] == "STALE"
+    assert get_passengers(client).headers["x-cache"] == "STALE"
+
+
+def test_errors_are_not_cached(client, monkeypatch):
+    calls = []
+
+    async def missing_route(day, route_id):
+        calls.append(route_id)
+        raise HTTPException(status_code=404, detail=f"Route ID {route_id} not found")
+
+    monkeypatch.setattr(polonus_endpoints, "get_passenger_data", missing_route)
+
+    assert get_passengers(client).status_code == 404
+    assert get_passengers(client).status_code == 404
+    assert len(calls) == 2
+
+
+def test_admin_can_invalidate_cache(client, upstream, test_admin_token):
+    headers = {"Authorization": f"Bearer {test_admin_token.credentials}"}
+    get_passengers(client, day=PAST_DATE)
+    get_passengers(client, day="2025-02-21")
+
+    response = client.delete(
+        "/polonus/cache/1234", params={"date": PAST_DATE}, headers=headers
+    )
+    assert response.json() == {"deleted": 1}
+    assert get_passengers(client, day=PAST_DATE).headers["x-cache"] == "MISS"
+
+    response = client.delete("/polonus/cache/1234", headers=headers)
+    assert response.json() == {"deleted": 2}
+    assert get_passengers(client, day="2025-02-21").headers["x-cache"] == "MISS"
+
+
+def test_invalidation_requires_admin(client, test_user_token):
+    response = client.delete(
+        "/polonus/cache/1234",
+        headers={"Authorization": f"Bearer {test_user_token.credentials}"},
+    )
+
+    assert response.status_code == 403
+
+
+def test_cache_can_be_disabled(client, upstream, monkeypatch):
+    monkeypatch.setattr(settings, "POLONUS_CACHE_ENABLED", False)
+
+    get_passengers(client)
+    response = get_passengers(client)
+
+    assert "x-cache" not in response.headers
+    assert len(upstream) == 2
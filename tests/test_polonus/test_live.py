@@ -0,0 +1,141 @@
+import asyncio
+import time
+from datetime import date, timedelta
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.constants import settings
+from app.polonus.live import RoutePoller, live_routes
+from tests.test_polonus.conftest import PASSENGER_FILE
+
+TODAY = date.today().isoformat()
+FIRST_PASSENGER = "JAN ZIELIŃSKI 40013/2025 189,00 zł Katowice, Sądowa\n"
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def live_url(token, route_id=1000, day=TODAY):
+    return (
+        f"/polonus/ws/passengers?route_id={route_id}&date={day}"
+        f"&token={token.credentials}"
+    )
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(settings, "POLONUS_LIVE_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def url(test_user_token):
+    return live_url(test_user_token)
+
+
+def assert_refused(client, url, code, **kwargs):
+    with client.websocket_connect(url, **kwargs) as websocket:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+    assert exc_info.value.code == code
+
+
+def test_subscriber_gets_snapshot_then_changes(client, upstream, url):
+    with client.websocket_connect(url) as websocket:
+        snapshot = websocket.receive_json()
+        new_passenger = "ANNA NOWAK 99999/2025 10,00 zł Katowice, Sądowa\n"
+        changed_price = FIRST_PASSENGER.replace("189,00", "150,00")
+        upstream["files"]["1000"] = PASSENGER_FILE.replace(
+            FIRST_PASSENGER, new_passenger + changed_price
+        )
+        diff = websocket.receive_json()
+
+    assert snapshot["type"] == "snapshot"
+    assert (snapshot["route_id"], snapshot["date"]) == (1000, TODAY)
+    assert snapshot["passengers"][0]["ticket_number"] == "40013/2025"
+    assert diff["type"] == "diff"
+    assert [row["full_name"] for row in diff["added"]] == ["ANNA NOWAK"]
+    assert [row["price"] for row in diff["changed"]] == [150.0]
+    assert diff["removed"] == []
+
+
+def test_subscribers_share_one_poller(client, upstream, url):
+    with client.websocket_connect(url) as first, client.websocket_connect(
+        url
+    ) as second:
+        first.receive_json()
+        second.receive_json()
+
+        assert len(live_routes.pollers) == 1
+        (poller,) = live_routes.pollers.values()
+        assert len(poller.subscriptions) == 2
+
+        upstream["files"]["1000"] = PASSENGER_FILE.replace(FIRST_PASSENGER, "")
+        assert first.receive_json() == second.receive_json()
+
+    wait_until(lambda: not live_routes.pollers)
+
+
+def test_unknown_route_closes_subscription(client, upstream, test_user_token):
+    with client.websocket_connect(live_url(test_user_token, 1)) as websocket:
+        message = websocket.receive_json()
+
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+
+    assert message == {"type": "error", "detail": "Route ID 1 not found"}
+    assert exc_info.value.code == 1000
+
+
+def test_token_in_header(client, upstream, test_user_token):
+    url = f"/polonus/ws/passengers?route_id=1000&date={TODAY}"
+    headers = {"Authorization": f"Bearer {test_user_token.credentials}"}
+    with client.websocket_connect(url, headers=headers) as websocket:
+        assert websocket.receive_json()["type"] == "snapshot"
+
+
+def test_subscribing_requires_login(client, upstream):
+    assert_refused(client, f"/polonus/ws/passengers?route_id=1000&date={TODAY}", 1008)
+    assert_refused(
+        client, f"/polonus/ws/passengers?route_id=1000&date={TODAY}&token=bad", 1008
+    )
+    assert upstream["passenger_file"] == 0
+
+
+def test_date_far_from_today_is_refused(client, upstream, test_user_token):
+    day = (
+        date.today() - timedelta(days=settings.POLONUS_LIVE_MAX_DAYS + 1)
+    ).isoformat()
+
+    assert_refused(client, live_url(test_user_token, day=day), 1008)
+    assert not live_routes.pollers
+
+
+def test_pollers_are_capped(client, upstream, test_user_token, monkeypatch):
+    monkeypatch.setattr(settings, "POLONUS_LIVE_MAX_POLLERS", 1)
+    with client.websocket_connect(live_url(test_user_token)) as first:
+        first.receive_json()
+
+        assert_refused(client, live_url(test_user_token, 1007), 1013)
+        # Another subscriber of a route already polled shares its poller.
+        with client.websocket_connect(live_url(test_user_token)) as second:
+            assert second.receive_json()["type"] == "snapshot"
+
+
+def test_slow_subscriber_is_disconnected():
+    async def overflow():
+        poller = RoutePoller((1000, "2025-02-20"), interval=1, queue_size=2)
+        slow = poller.subscribe()
+        for message in ("one", "two", "three"):
+            poller.broadcast(message)
+        return poller, slow, [await slow.queue.get() for _ in range(2)]
+
+    poller, slow, messages = asyncio.run(overflow())
+
+    assert messages == ["two", None]
+    assert slow.close_code == 1013
+    assert poller.subscriptions == set()
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.polonus import utils as polonus_utils
+from app.polonus.utils import build_route_index, get_route_index, parse_routes_page
+from tests.test_polonus.conftest import ROUTES_PAGE
+
+DATE = "2025-02-20"
+
+
+def test_route_index_lists_every_route():
+    routes = build_route_index(ROUTES_PAGE).routes
+
+    assert routes[0] == {
+        "number": "1000",
+        "departure_time": "05:00",
+        "relation": "Poznań - Łódź",
+        "link": "/diagrams/passengers/1000.txt",
+    }
+    assert len(routes) == ROUTES_PAGE.count("/diagrams/passengers/")
+
+
+def test_route_index_matches_whole_words_first_row_first():
+    page = """
+    <table>
+      <tr><th>Godzina</th><th>Kurs</th></tr>
+      <tr><td>05:00</td><td>Kurs 12 (odwołany)</td></tr>
+      <tr><td>06:00</td><td><a href="/a.txt">Kurs 1234</a></td><td>12</td></tr>
+      <tr><td>07:00</td><td><a href="/b.txt">Kurs 12</a></td><td>x123</td></tr>
+      <tr><td>08:00</td><td><a href="/c.txt">Kurs</a></td><td><b>4</b>56</td></tr>
+    </table>
+    """
+
+    assert parse_routes_page(page, "1234") == "/a.txt"
+    # Rows without a link are skipped and the earlier row wins.
+    assert parse_routes_page(page, "12") == "/a.txt"
+    # Cell text is joined without separators before matching.
+    assert parse_routes_page(page, "456") == "/c.txt"
+    for route_id in ("123", "5", "4"):
+        with pytest.raises(HTTPException):
+            parse_routes_page(page, route_id)
+
+
+def test_routes_endpoint(client, upstream):
+    response = client.get("/polonus/routes", params={"date": DATE})
+
+    assert response.status_code == 200
+    assert response.json()["date"] == DATE
+    assert response.json()["routes"][1]["number"] == "1007"
+
+
+def test_routes_endpoint_validates_date(client, upstream):
+    response = client.get("/polonus/routes", params={"date": "20-02-2025"})
+
+    assert response.status_code == 422
+    assert upstream["routes_page"] == 0
+
+
+def test_route_index_is_cached(client, upstream):
+    client.get("/polonus/routes", params={"date": DATE})
+    client.get("/polonus/routes", params={"date": DATE})
+    client.get("/polonus/routes", params={"date": "2025-02-21"})
+
+    assert upstream["routes_page"] == 2
+
+
+def test_concurrent_requests_share_one_fetch(upstream):
+    async def load():
+        return await asyncio.gather(*(get_route_index(DATE) for _ in range(5)))
+
+    indexes = asyncio.run(load())
+
+    assert upstream["routes_page"] == 1
+    assert all(index is indexes[0] for index in indexes)
+
+
+def test_unknown_route_is_rejected_from_index(client, upstream, monkeypatch):
+    monkeypatch.setattr(polonus_utils.settings, "POLONUS_CACHE_ENABLED", False)
+
+    known = client.post(
+        "/polonus/get-passengers", json={"date": DATE, "route_id": 1000}
+    )
+    unknown = client.post(
+        "/polonus/get-passengers", json={"date": DATE, "route_id": 999999}
+    )
+
+    assert known.status_code == 200
+    assert unknown.status_code == 404
+    assert upstream["routes_page"] == 1
+    assert upstream["passenger_file"] == 1
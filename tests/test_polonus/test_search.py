@@ -0,0 +1,209 @@
+import pytest
+
+from app.constants import settings
+from app.polonus import endpoints
+from app.polonus.cache import invalidate_routes
+from app.polonus.search import SearchIndex, fold
+from tests.test_polonus.conftest import PASSENGER_FILE, fresh_search_index
+
+
+def passenger(full_name, ticket_number):
+    return {"full_name": full_name, "ticket_number": ticket_number}
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(max_days=2, sync_interval=0)
+    index.update(
+        "2025-02-20",
+        {
+            "1000": (
+                "1",
+                [
+                    passenger("ŁUKASZ WÓJCIK", "1/2025"),
+                    passenger("JAN KOWALSKI", "2/2025"),
+                    passenger("JANINA KOWALCZYK", "3/2025"),
+                ],
+            )
+        },
+    )
+    index.update("2025-02-21", {"1007": ("1", [passenger("JAN NOWAK", "4/2025")])})
+    return index
+
+
+def names(entries):
+    return [entry.passenger["full_name"] for entry in entries]
+
+
+def test_fold_removes_polish_diacritics():
+    assert fold("ŁUKASZ WÓJCIK Żaneta Dąbrowska") == "lukasz wojcik zaneta dabrowska"
+
+
+def test_find_ticket(index):
+    (entry,) = index.find_ticket("2/2025")
+
+    assert (entry.date, entry.route) == ("2025-02-20", "1000")
+    assert entry.passenger["full_name"] == "JAN KOWALSKI"
+    assert index.find_ticket("9/2025") == []
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("wojc", ["ŁUKASZ WÓJCIK"]),
+        ("Łukasz W", ["ŁUKASZ WÓJCIK"]),
+        ("kowal", ["JANINA KOWALCZYK", "JAN KOWALSKI"]),
+        ("jan", ["JAN NOWAK", "JAN KOWALSKI", "JANINA KOWALCZYK"]),
+        ("jan  kowalski", ["JAN KOWALSKI"]),
+        ("nowakowski", []),
+    ],
+)
+def test_find_name_by_prefix(index, query, expected):
+    assert names(index.find_name(query)) == expected
+
+
+def test_find_name_limit_and_date(index):
+    assert len(index.find_name("jan", limit=2)) == 2
+    assert names(index.find_name("jan", date="2025-02-21")) == ["JAN NOWAK"]
+    assert index.find_name("jan", date="2025-01-01") == []
+
+
+def test_refetched_manifest_replaces_previous(index):
+    index.update("2025-02-20", {"1000": ("2", [passenger("ANNA NOWAK", "5/2025")])})
+
+    assert index.find_ticket("2/2025") == []
+    assert names(index.find_name("nowak")) == ["JAN NOWAK", "ANNA NOWAK"]
+
+
+def test_removing_last_route_drops_date(index):
+    index.update("2025-02-20", {}, removed=["1000"])
+
+    assert sorted(index.days) == ["2025-02-21"]
+    assert index.find_ticket("2/2025") == []
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token.credentials}"}
+
+
+def fetch_route(client, route_id, date="2025-02-20"):
+    response = client.post(
+        "/polonus/get-passengers", json={"date": date, "route_id": route_id}
+    )
+    assert response.status_code == 200
+
+
+def search(client, token, **params):
+    response = client.get("/polonus/search", params=params, headers=auth(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_endpoint_finds_fetched_passengers(client, upstream, test_user_token):
+    fetch_route(client, 1000)
+
+    by_ticket = search(client, test_user_token, ticket="40013/2025")
+    by_name = search(client, test_user_token, name="jan zielin", date="2025-02-20")
+
+    assert by_ticket == by_name
+    (result,) = by_ticket
+    assert result["date"] == "2025-02-20"
+    assert result["route"] == "1000"
+    assert result["passenger"]["full_name"] == "JAN ZIELIŃSKI"
+
+
+def test_search_sees_routes_served_by_other_workers(
+    client, upstream, test_user_token, monkeypatch
+):
+    fetch_route(client, 1000)
+    fetch_route(client, 1007)
+    # Another worker starts with an empty index; cache hits count too.
+    monkeypatch.setattr(endpoints, "search_index", fresh_search_index())
+    fetch_route(client, 1007)
+    monkeypatch.setattr(endpoints, "search_index", fresh_search_index())
+
+    results = search(client, test_user_token, ticket="40013/2025")
+
+    assert sorted(result["route"] for result in results) == ["1000", "1007"]
+    assert upstream["passenger_file"] == 2
+
+
+def test_search_reloads_refreshed_routes(
+    client, upstream, redis_binary_test, test_user_token
+):
+    fetch_route(client, 1000)
+    assert search(client, test_user_token, ticket="40013/2025")
+
+    upstream["files"]["1000"] = PASSENGER_FILE.replace("40013/2025", "77777/2025")
+    invalidate_routes(redis_binary_test, 1000, "2025-02-20")
+    fetch_route(client, 1000)
+
+    assert search(client, test_user_token, ticket="40013/2025") == []
+    assert search(client, test_user_token, ticket="77777/2025")
+
+
+def test_sync_is_throttled(client, upstream, redis_binary_test):
+    index = SearchIndex(max_days=2, sync_interval=60)
+    fetch_route(client, 1000)
+    index.sync(redis_binary_test)
+    fetch_route(client, 1007)
+
+    index.sync(redis_binary_test)
+
+    assert [entry.route for entry in index.find_ticket("40013/2025")] == ["1000"]
+
+
+def test_search_skips_expired_routes(
+    client, upstream, redis_binary_test, test_user_token
+):
+    fetch_route(client, 1000)
+    assert search(client, test_user_token, ticket="40013/2025")
+
+    invalidate_routes(redis_binary_test, 1000, "2025-02-20")
+
+    assert search(client, test_user_token, ticket="40013/2025") == []
+
+
+def test_search_ignores_stats_fetches(
+    client, upstream, test_admin_token, test_user_token
+):
+    fetch_route(client, 1000, date="2025-02-20")
+    client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-03-01", "date_to": "2025-03-05", "route_id": 1000},
+        headers=auth(test_admin_token),
+    )
+
+    (result,) = search(client, test_user_token, ticket="40013/2025")
+    assert result["date"] == "2025-02-20"
+
+
+def test_search_keeps_most_recent_dates(client, upstream, test_user_token, monkeypatch):
+    monkeypatch.setattr(settings, "POLONUS_SEARCH_MAX_DAYS", 2)
+    for date in ("2025-02-20", "2025-02-22", "2025-02-21"):
+        fetch_route(client, 1000, date=date)
+
+    results = search(client, test_user_token, ticket="40013/2025")
+    older = search(client, test_user_token, ticket="40013/2025", date="2025-02-20")
+
+    assert [result["date"] for result in results] == ["2025-02-22", "2025-02-21"]
+    assert [result["date"] for result in older] == ["2025-02-20"]
+
+
+def test_search_requires_login(client, upstream):
+    fetch_route(client, 1000)
+
+    response = client.get("/polonus/search", params={"ticket": "40013/2025"})
+
+    assert response.status_code in (401, 403)
+
+
+@pytest.mark.parametrize(
+    "params", [{}, {"ticket": "40013/2025", "name": "jan"}], ids=["none", "both"]
+)
+def test_search_endpoint_needs_ticket_or_name(client, test_user_token, params):
+    response = client.get(
+        "/polonus/search", params=params, headers=auth(test_user_token)
+    )
+
+    assert response.status_code == 400
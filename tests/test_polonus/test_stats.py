@@ -0,0 +1,219 @@
+import pytest
+from fastapi import HTTPException
+
+from app.constants import settings
+from app.polonus import utils as polonus_utils
+from app.polonus.stats import passenger_stats
+from app.polonus.utils import parse_passenger_data
+from tests.test_polonus.conftest import PASSENGER_FILE
+
+
+def passenger(origin, destination, price, currency="zł"):
+    return {
+        "price": price,
+        "currency": currency,
+        "departure_city": origin,
+        "arrival_city": destination,
+    }
+
+
+def test_passenger_stats():
+    manifests = [
+        (
+            "2025-02-20",
+            "1000",
+            [
+                passenger("Warszawa", "Kraków", 100.0),
+                passenger("Warszawa", "Kraków", 50.5),
+                passenger("Łódź", "Kraków", 20.0, "EUR"),
+            ],
+        ),
+        ("2025-02-20", "1007", []),
+        ("2025-02-21", "1000", [passenger("Warszawa", "Kraków", 10.0)]),
+    ]
+
+    stats = passenger_stats(manifests)
+
+    assert stats["passengers"] == 4
+    assert stats["revenue"] == {"EUR": 20.0, "zł": 160.5}
+    assert stats["routes"] == [
+        {
+            "date": "2025-02-20",
+            "route": "1000",
+            "passengers": 3,
+            "revenue": {"EUR": 20.0, "zł": 150.5},
+        },
+        {"date": "2025-02-20", "route": "1007", "passengers": 0, "revenue": {}},
+        {
+            "date": "2025-02-21",
+            "route": "1000",
+            "passengers": 1,
+            "revenue": {"zł": 10.0},
+        },
+    ]
+    assert stats["origin_destination"] == [
+        {
+            "origin": "Warszawa",
+            "destination": "Kraków",
+            "passengers": 3,
+            "revenue": {"zł": 160.5},
+        },
+        {
+            "origin": "Łódź",
+            "destination": "Kraków",
+            "passengers": 1,
+            "revenue": {"EUR": 20.0},
+        },
+    ]
+
+
+def test_passenger_stats_without_passengers():
+    stats = passenger_stats([("2025-02-20", "1000", [])])
+
+    assert stats == {
+        "passengers": 0,
+        "revenue": {},
+        "routes": [
+            {"date": "2025-02-20", "route": "1000", "passengers": 0, "revenue": {}}
+        ],
+        "origin_destination": [],
+    }
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token.credentials}"}
+
+
+def test_stats_for_one_route_over_date_range(client, upstream, test_admin_token):
+    expected = parse_passenger_data(PASSENGER_FILE.replace("{route_id}", "1000"))
+
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-02-20", "date_to": "2025-02-22", "route_id": 1000},
+        headers=auth(test_admin_token),
+    )
+
+    stats = response.json()
+    assert response.status_code == 200
+    assert [(route["date"], route["route"]) for route in stats["routes"]] == [
+        ("2025-02-20", "1000"),
+        ("2025-02-21", "1000"),
+        ("2025-02-22", "1000"),
+    ]
+    assert stats["passengers"] == 3 * len(expected)
+    assert stats["revenue"]["zł"] == pytest.approx(
+        3 * sum(row["price"] for row in expected)
+    )
+    assert "full_name" not in response.text
+    assert stats["failed"] == []
+
+
+def test_stats_for_all_routes_limit_concurrency(
+    client, upstream, test_admin_token, monkeypatch
+):
+    monkeypatch.setattr(settings, "POLONUS_STATS_CONCURRENCY", 3)
+
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-02-20", "date_to": "2025-02-20"},
+        headers=auth(test_admin_token),
+    )
+
+    routes = response.json()["routes"]
+    assert len(routes) == upstream["passenger_file"] > 1
+    assert upstream["max_in_flight"]["max"] == 3
+
+
+def test_stats_skip_dates_without_route(client, upstream, test_admin_token):
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-02-20", "date_to": "2025-02-20", "route_id": 1},
+        headers=auth(test_admin_token),
+    )
+
+    assert response.json()["routes"] == []
+    assert upstream["passenger_file"] == 0
+
+
+@pytest.mark.parametrize(
+    "date_from, date_to, status_code",
+    [
+        ("2025-02-21", "2025-02-20", 400),
+        ("2025-01-01", "2025-03-01", 400),
+        ("2025-02-30", "2025-03-01", 422),
+    ],
+)
+def test_stats_reject_invalid_ranges(
+    client, upstream, test_admin_token, date_from, date_to, status_code
+):
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": date_from, "date_to": date_to},
+        headers=auth(test_admin_token),
+    )
+
+    assert response.status_code == status_code
+    assert upstream["routes_page"] == 0
+
+
+def test_stats_reject_too_many_routes(client, upstream, test_admin_token, monkeypatch):
+    monkeypatch.setattr(settings, "POLONUS_STATS_MAX_ROUTES", 2)
+
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-02-20", "date_to": "2025-02-20"},
+        headers=auth(test_admin_token),
+    )
+
+    assert response.status_code == 400
+    assert upstream["passenger_file"] == 0
+
+
+def test_stats_read_through_response_cache(client, upstream, test_admin_token):
+    params = {"date_from": "2025-02-20", "date_to": "2025-02-21", "route_id": 1000}
+    first = client.get("/polonus/stats", params=params, headers=auth(test_admin_token))
+    second = client.get("/polonus/stats", params=params, headers=auth(test_admin_token))
+
+    assert first.json() == second.json()
+    assert upstream["passenger_file"] == 2
+
+    response = client.post(
+        "/polonus/get-passengers", json={"date": "2025-02-20", "route_id": 1000}
+    )
+    assert response.headers["X-Cache"] == "HIT"
+
+
+def test_stats_report_failed_manifests(client, upstream, test_admin_token, monkeypatch):
+    fetch = polonus_utils.fetch_passenger_file
+
+    async def failing_fetch(url):
+        if url.endswith("/1007.txt"):
+            raise HTTPException(
+                status_code=500, detail="Failed to fetch passenger file"
+            )
+        return await fetch(url)
+
+    monkeypatch.setattr(polonus_utils, "fetch_passenger_file", failing_fetch)
+
+    response = client.get(
+        "/polonus/stats",
+        params={"date_from": "2025-02-20", "date_to": "2025-02-20"},
+        headers=auth(test_admin_token),
+    )
+
+    stats = response.json()
+    assert response.status_code == 200
+    assert stats["failed"] == [{"date": "2025-02-20", "route": "1007"}]
+    assert "1007" not in [route["route"] for route in stats["routes"]]
+    assert len(stats["routes"]) == upstream["passenger_file"]
+
+
+def test_stats_require_admin(client, upstream, test_user_token):
+    params = {"date_from": "2025-02-20", "date_to": "2025-02-20"}
+
+    assert client.get("/polonus/stats", params=params).status_code in (401, 403)
+    response = client.get(
+        "/polonus/stats", params=params, headers=auth(test_user_token)
+    )
+    assert response.status_code == 403
+    assert upstream["routes_page"] == 0
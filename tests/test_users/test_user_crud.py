@@ -82,3 +82,19 @@ def test_delete_user(db_session: Session, test_user):
 
     assert ex.value.status_code == 404
     assert ex.value.detail == f"User with ID {test_user.id} not found."
+
+
+def test_update_user_not_found(db_session: Session):
+    with pytest.raises(UserNotFoundException) as ex:
+        crud_user.update_user(db_session, 999, {"role": "admin"})
+
+    assert ex.value.status_code == 404
+    assert ex.value.detail == "User with ID 999 not found."
+
+
+def test_delete_user_not_found(db_session: Session):
+    with pytest.raises(UserNotFoundException) as ex:
+        crud_user.delete_user(db_session, 999)
+
+    assert ex.value.status_code == 404
+    assert ex.value.detail == "User with ID 999 not found."
@@ -0,0 +1,97 @@
+from redis.client import Pipeline
+from redis.exceptions import ConnectionError
+
+from app.users.utils import etag_matches
+
+
+def auth_headers(token, **headers):
+    return {"Authorization": f"Bearer {token.credentials}", **headers}
+
+
+def test_etag_matches():
+    assert etag_matches('W/"user-1-1"', 'W/"user-1-1"')
+    assert etag_matches('"user-1-1"', 'W/"user-1-1"')
+    assert etag_matches('W/"user-1-0", W/"user-1-1"', 'W/"user-1-1"')
+    assert etag_matches("*", 'W/"user-1-1"')
+    assert not etag_matches('W/"user-1-2"', 'W/"user-1-1"')
+    assert not etag_matches(None, 'W/"user-1-1"')
+
+
+def test_current_user_not_modified(client, test_user_token):
+    response = client.get("/user/current", headers=auth_headers(test_user_token))
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+
+    response = client.get(
+        "/user/current",
+        headers=auth_headers(test_user_token, **{"If-None-Match": etag}),
+    )
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_user_by_id_etag_changes_on_update(client, test_user, test_admin_token):
+    user_id = test_user.id
+    response = client.get(f"/user/{user_id}", headers=auth_headers(test_admin_token))
+    etag = response.headers["ETag"]
+
+    client.put(
+        f"/user/{user_id}",
+        json={"role": "dps_manager"},
+        headers=auth_headers(test_admin_token),
+    )
+    response = client.get(
+        f"/user/{user_id}",
+        headers=auth_headers(test_admin_token, **{"If-None-Match": etag}),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["role"] == "dps_manager"
+
+
+def test_user_list_etag_changes_on_create(client, test_admin_token):
+    response = client.get("/user/list", headers=auth_headers(test_admin_token))
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/user/list", headers=auth_headers(test_admin_token, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+
+    client.post(
+        "/user/",
+        json={"email": "new@example.com", "role": "polonus_manager"},
+        headers=auth_headers(test_admin_token),
+    )
+    response = client.get(
+        "/user/list", headers=auth_headers(test_admin_token, **{"If-None-Match": etag})
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_writes_survive_failed_version_bump(
+    client, test_user, test_admin_token, monkeypatch
+):
+    def unavailable(self):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(Pipeline, "execute", unavailable)
+
+    response = client.put(
+        f"/user/{test_user.id}",
+        json={"role": "dps_manager"},
+        headers=auth_headers(test_admin_token),
+    )
+    assert response.status_code == 200
+
+    response = client.delete(
+        f"/user/{test_user.id}", headers=auth_headers(test_admin_token)
+    )
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+
+from sqlalchemy.orm import Session
+
+from app.models.users import User
+from app.users.utils import EXPORT_FIELDS, CRUDUser
+
+crud_user = CRUDUser(User)
+
+
+def test_stream_users(db_session: Session, test_user, test_admin):
+    users = list(crud_user.stream_users(db_session, batch_size=1))
+
+    assert [user.email for user in users] == [test_user.email, test_admin.email]
+    assert all(set(user.model_dump()) == set(EXPORT_FIELDS) for user in users)
+
+
+def test_export_users_csv(client, test_user, test_admin_token):
+    expected_emails = {test_user.email, "admin@example.com"}
+    response = client.get(
+        "/user/export",
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert {row["email"] for row in rows} == expected_emails
+
+
+def test_export_users_ndjson(client, test_user, test_admin_token):
+    expected_emails = {test_user.email, "admin@example.com"}
+    response = client.get(
+        "/user/export",
+        params={"format": "ndjson"},
+        headers={"Authorization": f"Bearer {test_admin_token.credentials}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert {user["email"] for user in users} == expected_emails
+    assert all(set(user) == set(EXPORT_FIELDS) for user in users)
+
+
+def test_export_users_requires_admin(client, test_user_token):
+    response = client.get(
+        "/user/export",
+        headers={"Authorization": f"Bearer {test_user_token.credentials}"},
+    )
+
+    assert response.status_code == 403
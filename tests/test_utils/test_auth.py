@@ -5,12 +5,17 @@ from fastapi.security import HTTPAuthorizationCredentials
 from jose import jwt
 
 from app.constants import settings
+from app.exceptions.token_exceptions import (
+    InvalidTokenException,
+    RefreshTokenReusedException,
+)
 from app.utils.auth import (
-    blacklist_token,
     create_access_token,
+    create_refresh_token,
     get_password_hash,
     get_payload,
-    is_token_blacklisted,
+    revoke_refresh_token,
+    rotate_refresh_token,
     verify_password,
 )
 
@@ -28,6 +33,12 @@ def test_password_hashing():
     assert not verify_password("wrongpassword", hashed)
 
 
+def test_password_hash_uses_configured_rounds():
+    hashed = get_password_hash("testpassword123")
+
+    assert hashed.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+
 def test_create_access_token_with_default_expiry():
     data = {"sub": "test@example.com"}
     token = create_access_token(data)
@@ -56,54 +67,53 @@ def test_create_access_token_with_custom_expiry():
     ) < timedelta(seconds=1)
 
 
-def test_blacklist_token_success(redis_test):
-    token = "test_token"
-    expire_time = datetime.now(timezone.utc) + timedelta(minutes=15)
-
-    result = blacklist_token(token, expire_time, redis_test)
-
-    assert result is True
-
-    blacklist_key = f"blacklist:{token}"
-    assert redis_test.exists(blacklist_key) == 1
-    assert redis_test.get(blacklist_key) == "blacklisted"
+def test_create_refresh_token_stores_only_secret_hash(redis_test):
+    token = create_refresh_token(redis_test, 42)
+    family, secret = token.split(".")
 
-    ttl = redis_test.ttl(blacklist_key)
-    assert ttl > 0
-    assert ttl <= 15 * 60
+    stored = redis_test.hgetall(f"refresh_token:{family}")
 
+    assert stored["uid"] == "42"
+    assert stored["secret"] != secret
+    assert 0 < redis_test.ttl(f"refresh_token:{family}") <= 14 * 24 * 3600
 
-def test_blacklist_token_expired(redis_test):
-    token = "expired_token"
-    expire_time = datetime.now(timezone.utc) - timedelta(minutes=1)
 
-    result = blacklist_token(token, expire_time, redis_test)
+def test_rotate_refresh_token(redis_test):
+    token = create_refresh_token(redis_test, 42)
 
-    assert result is False
-    assert redis_test.exists(f"blacklist:{token}") == 0
+    user_id, rotated = rotate_refresh_token(redis_test, token)
 
+    assert user_id == 42
+    assert rotated != token
+    assert rotated.split(".")[0] == token.split(".")[0]
 
-def test_is_token_blacklisted(redis_test):
-    token = "test_token"
-    blacklist_key = f"blacklist:{token}"
 
-    assert not is_token_blacklisted(token, redis_test)
+def test_rotate_refresh_token_reuse_revokes_family(redis_test):
+    token = create_refresh_token(redis_test, 42)
+    _, rotated = rotate_refresh_token(redis_test, token)
 
-    redis_test.setex(blacklist_key, 300, "blacklisted")
-    assert is_token_blacklisted(token, redis_test)
+    with pytest.raises(RefreshTokenReusedException):
+        rotate_refresh_token(redis_test, token)
 
+    with pytest.raises(InvalidTokenException):
+        rotate_refresh_token(redis_test, rotated)
 
-def test_is_token_blacklisted_expired(redis_test):
-    token = "test_token"
-    blacklist_key = f"blacklist:{token}"
 
-    redis_test.setex(blacklist_key, 1, "blacklisted")
+@pytest.mark.parametrize("token", ["", "malformed", "unknown.secret"])
+def test_rotate_refresh_token_invalid(redis_test, token):
+    with pytest.raises(InvalidTokenException):
+        rotate_refresh_token(redis_test, token)
 
-    import time
 
-    time.sleep(1.1)
+def test_revoke_refresh_token(redis_test):
+    token = create_refresh_token(redis_test, 42)
 
-    assert not is_token_blacklisted(token, redis_test)
+    assert not revoke_refresh_token(redis_test, token.split(".")[0])
+    assert not revoke_refresh_token(redis_test, token + "x")
+    assert revoke_refresh_token(redis_test, token)
+    assert not revoke_refresh_token(redis_test, token)
+    with pytest.raises(InvalidTokenException):
+        rotate_refresh_token(redis_test, token)
 
 
 def test_get_payload_valid_token():
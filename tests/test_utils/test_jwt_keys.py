@@ -0,0 +1,139 @@
+import httpx
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError, jwt
+
+from app.constants import settings
+from app.utils.auth import create_access_token, get_payload
+from app.utils.jwt_keys import RemoteKeySet, generate_key, get_key_set
+
+
+@pytest.fixture
+def es256_keys(tmp_path, monkeypatch):
+    generate_key(tmp_path, "2025-01")
+    generate_key(tmp_path, "2025-02")
+    monkeypatch.setattr(settings, "JWT_ALGORITHM", "ES256")
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "2025-01")
+    get_key_set.cache_clear()
+    yield tmp_path
+    get_key_set.cache_clear()
+
+
+def credentials(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_tokens_are_signed_with_active_key(es256_keys):
+    token = create_access_token({"sub": "test@example.com"})
+
+    assert jwt.get_unverified_header(token) == {
+        "alg": "ES256",
+        "kid": "2025-01",
+        "typ": "JWT",
+    }
+    assert get_payload(credentials(token))["sub"] == "test@example.com"
+
+
+def test_tokens_from_previous_key_verify_after_rotation(es256_keys, monkeypatch):
+    old_token = create_access_token({"sub": "test@example.com"})
+
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "2025-02")
+    get_key_set.cache_clear()
+    new_token = create_access_token({"sub": "test@example.com"})
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "2025-02"
+    assert get_payload(credentials(old_token))["sub"] == "test@example.com"
+
+
+def test_token_with_removed_key_is_rejected(es256_keys):
+    token = create_access_token({"sub": "test@example.com"})
+
+    (es256_keys / "2025-01.pem").unlink()
+    get_key_set.cache_clear()
+    settings.JWT_ACTIVE_KID = "2025-02"
+
+    with pytest.raises(JWTError):
+        get_payload(credentials(token))
+
+
+def test_jwks_endpoint_publishes_public_keys(client, es256_keys):
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=300"
+    keys = response.json()["keys"]
+    assert [key["kid"] for key in keys] == ["2025-01", "2025-02"]
+    assert all(key["alg"] == "ES256" and "d" not in key for key in keys)
+
+
+def test_jwks_endpoint_without_asymmetric_keys(client):
+    assert client.get("/.well-known/jwks.json").json() == {"keys": []}
+
+
+def jwks_fetcher(client):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        response = client.get(url)
+        return httpx.Response(
+            response.status_code,
+            json=response.json(),
+            headers={"Cache-Control": response.headers["cache-control"]},
+            request=httpx.Request("GET", url),
+        )
+
+    return fetch, calls
+
+
+def test_remote_key_set_caches_keys(client, es256_keys):
+    fetch, calls = jwks_fetcher(client)
+    remote = RemoteKeySet("/.well-known/jwks.json", fetch=fetch)
+
+    for _ in range(3):
+        token = create_access_token({"sub": "test@example.com"})
+        assert remote.decode(token)["sub"] == "test@example.com"
+
+    assert len(calls) == 1
+
+
+def test_remote_key_set_refetches_for_new_kid(client, es256_keys, monkeypatch):
+    fetch, calls = jwks_fetcher(client)
+    remote = RemoteKeySet("/.well-known/jwks.json", fetch=fetch, min_refresh_interval=0)
+    remote.decode(create_access_token({"sub": "test@example.com"}))
+
+    generate_key(es256_keys, "2025-03")
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "2025-03")
+    get_key_set.cache_clear()
+
+    payload = remote.decode(create_access_token({"sub": "rotated@example.com"}))
+
+    assert payload["sub"] == "rotated@example.com"
+    assert len(calls) == 2
+
+
+def test_remote_key_set_rejects_unknown_kid(client, es256_keys):
+    fetch, calls = jwks_fetcher(client)
+    remote = RemoteKeySet("/.well-known/jwks.json", fetch=fetch)
+    token = jwt.encode(
+        {"sub": "test@example.com"},
+        (es256_keys / "2025-01.pem").read_text(),
+        algorithm="ES256",
+        headers={"kid": "unknown"},
+    )
+
+    with pytest.raises(JWTError):
+        remote.decode(token)
+    with pytest.raises(JWTError):
+        remote.decode(token)
+
+    assert len(calls) == 1
+
+
+def test_active_key_must_be_named(es256_keys, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", None)
+    get_key_set.cache_clear()
+
+    with pytest.raises(RuntimeError, match="JWT_ACTIVE_KID"):
+        get_key_set()
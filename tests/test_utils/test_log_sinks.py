@@ -0,0 +1,64 @@
+import threading
+
+from app.utils.log_sinks import QueuedSink
+
+
+class BlockingWriter:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.messages = []
+
+    def write(self, message):
+        self.started.set()
+        self.release.wait(5)
+        self.messages.append(message)
+
+
+def test_queued_sink_writes_messages_in_order():
+    written = []
+    sink = QueuedSink(written.append, "test")
+
+    for index in range(100):
+        sink.write(f"{index}\n")
+    sink.stop()
+
+    assert "".join(written) == "".join(f"{index}\n" for index in range(100))
+
+
+def test_queued_sink_drops_when_full():
+    writer = BlockingWriter()
+    dropped = []
+    sink = QueuedSink(writer.write, "test", maxsize=2, on_drop=dropped.append)
+
+    sink.write("first\n")
+    writer.started.wait(5)
+    for index in range(5):
+        sink.write(f"{index}\n")
+    writer.release.set()
+    sink.stop()
+
+    assert sink.dropped == 3
+    assert dropped == ["test"] * 3
+    assert "".join(writer.messages) == "first\n0\n1\n"
+
+
+def test_queued_sink_blocks_when_full():
+    writer = BlockingWriter()
+    sink = QueuedSink(writer.write, "test", maxsize=1, policy="block")
+
+    sink.write("first\n")
+    writer.started.wait(5)
+    sink.write("second\n")
+    producer = threading.Thread(target=sink.write, args=("third\n",))
+    producer.start()
+    producer.join(0.1)
+
+    assert producer.is_alive()
+
+    writer.release.set()
+    producer.join(5)
+    sink.stop()
+
+    assert sink.dropped == 0
+    assert "".join(writer.messages) == "first\nsecond\nthird\n"
@@ -0,0 +1,67 @@
+import pytest
+
+from app.utils.metrics import Counter, Gauge, Histogram, Metric, Registry
+
+
+def test_counter_render():
+    counter = Counter("jobs_total", "Jobs.", ("queue",))
+    counter.inc("emails")
+    counter.inc("emails", amount=2)
+
+    assert counter.value("emails") == 3
+    assert counter.render() == [
+        "# HELP jobs_total Jobs.",
+        "# TYPE jobs_total counter",
+        'jobs_total{queue="emails"} 3',
+    ]
+
+
+def test_gauge_inc_dec():
+    gauge = Gauge("in_flight", "In flight.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert gauge.value() == 1
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+
+def test_histogram_time():
+    histogram = Histogram("work_seconds", "Work.")
+    with histogram.time():
+        pass
+
+    assert histogram.count() == 1
+
+
+def test_label_values_are_escaped():
+    counter = Counter("escaped_total", "Escaped.", ("value",))
+    counter.inc('a"b\\c')
+
+    assert counter.render()[-1] == 'escaped_total{value="a\\"b\\\\c"} 1'
+
+
+def test_registry_render():
+    registry = Registry()
+    registry.register(Counter("a_total", "A.")).inc()
+
+    assert registry.render() == "# HELP a_total A.\n# TYPE a_total counter\na_total 1\n"
+
+
+def test_metric_requires_render():
+    with pytest.raises(TypeError):
+        Metric("abstract", "Abstract.")
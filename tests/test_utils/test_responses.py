@@ -0,0 +1,30 @@
+import orjson
+
+from app.polonus.schemas import Passenger, RouteResponse
+from app.utils.responses import ModelResponse
+
+
+def test_model_response_renders_model():
+    passenger = Passenger(
+        full_name="KOWALSKI JAN",
+        ticket_number="1/2025",
+        price=120.0,
+        currency="zł",
+        departure_city="Warszawa",
+        departure_station="Dworzec Zachodni",
+        arrival_city="Kraków",
+        arrival_station="MDA",
+        departure_time="2025-02-20T08:00:00",
+    )
+    model = RouteResponse(route_id=1, date="2025-02-20", passengers=[passenger])
+
+    response = ModelResponse(model)
+
+    assert response.media_type == "application/json"
+    assert orjson.loads(response.body) == model.model_dump()
+
+
+def test_model_response_renders_plain_content():
+    response = ModelResponse({"detail": "ok"})
+
+    assert orjson.loads(response.body) == {"detail": "ok"}